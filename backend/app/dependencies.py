@@ -1,14 +1,23 @@
 import os
+from typing import Optional
 
+from app.services.async_garmin_service import AsyncGarminService
 from app.services.coach_orchestrator import CoachOrchestrator
-from app.services.garmin_service import GarminService
+from app.services.garmin_service import DEFAULT_USER_ID, GarminService
+from app.services.garmin_session_cache import GarminSessionCache
+from app.services.garmin_store import GarminStore
+from app.services.prefetch_scheduler import DailyPrefetcher
+from app.services.synthetic_data import SyntheticPopulation
 from dotenv import load_dotenv
+from fastapi import Header, HTTPException
 
 load_dotenv()
 
 # Global instances for dependency injection
 # In a production app, these might be scoped per request or handled via a more robust DI framework
 _garmin_service = None
+_async_garmin_service = None
+_daily_prefetcher = None
 _coach_orchestrator = None
 
 
@@ -24,13 +33,67 @@ def get_garmin_service() -> GarminService:
         display_name = os.getenv("GARMIN_DISPLAY_NAME")
 
         # Initialize with credentials if available, otherwise it defaults to mock mode
+        # Real data is cached in the local store (FITSENSE_DB_PATH) and synced incrementally
+        # Garmin sessions are cached in GARMIN_SESSION_DIR so logins can skip SSO
+        # FITSENSE_SYNTHETIC_DATA points at a JSONL population written by
+        # generate_synthetic_data.py; its users are served instead of the mock data
+        synthetic_path = os.getenv("FITSENSE_SYNTHETIC_DATA")
+        synthetic = (
+            SyntheticPopulation.from_jsonl(synthetic_path) if synthetic_path else None
+        )
         _garmin_service = GarminService(
-            email=email, password=password, display_name=display_name
+            email=email,
+            password=password,
+            display_name=display_name,
+            store=GarminStore(),
+            session_cache=GarminSessionCache(),
+            synthetic=synthetic,
         )
 
     return _garmin_service
 
 
+def get_user_id(
+    user_id: str = DEFAULT_USER_ID,
+    x_fitsense_user_token: Optional[str] = Header(None),
+) -> str:
+    """
+    The user a request acts for (the optional user_id parameter).
+    Until the API has its own authentication, a non-default user's Garmin session
+    is only used with the user token returned when they logged in, sent in the
+    X-FitSense-User-Token header.
+    """
+    if not get_garmin_service().authorize(user_id, x_fitsense_user_token):
+        raise HTTPException(
+            status_code=403, detail=f"Missing or invalid user token for {user_id}"
+        )
+    return user_id
+
+
+def get_async_garmin_service() -> AsyncGarminService:
+    """
+    Returns a singleton-like AsyncGarminService sharing the GarminService state.
+    Its pooled HTTP client is shared by every request on this worker.
+    """
+    global _async_garmin_service
+    if _async_garmin_service is None:
+        _async_garmin_service = AsyncGarminService(get_garmin_service())
+
+    return _async_garmin_service
+
+
+def get_daily_prefetcher() -> DailyPrefetcher:
+    """
+    Returns the singleton-like DailyPrefetcher holding the shared cache of today's data.
+    Its polling loop is started from the app lifespan (see GARMIN_PREFETCH_ENABLED).
+    """
+    global _daily_prefetcher
+    if _daily_prefetcher is None:
+        _daily_prefetcher = DailyPrefetcher(get_async_garmin_service())
+
+    return _daily_prefetcher
+
+
 def get_coach_orchestrator() -> CoachOrchestrator:
     """
     Returns a singleton-like instance of CoachOrchestrator.
@@ -39,6 +102,10 @@ def get_coach_orchestrator() -> CoachOrchestrator:
     global _coach_orchestrator
     if _coach_orchestrator is None:
         garmin_service = get_garmin_service()
-        _coach_orchestrator = CoachOrchestrator(garmin_service=garmin_service)
+        _coach_orchestrator = CoachOrchestrator(
+            garmin_service=garmin_service,
+            async_garmin_service=get_async_garmin_service(),
+            prefetcher=get_daily_prefetcher(),
+        )
 
     return _coach_orchestrator
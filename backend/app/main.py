@@ -1,20 +1,37 @@
 import os
+from contextlib import asynccontextmanager
 from typing import Optional
 
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 # Adjust import based on how the app is run (module vs script)
 try:
-    from app.dependencies import get_garmin_service
+    from app.dependencies import (
+        get_async_garmin_service,
+        get_daily_prefetcher,
+        get_garmin_service,
+        get_user_id,
+    )
     from app.routers.coach import router as coach_router
-    from app.services.garmin_service import GarminService
+    from app.services.ai_agents import get_response_cache
+    from app.services.async_garmin_service import AsyncGarminService
+    from app.services.garmin_service import DEFAULT_USER_ID, GarminService
+    from app.services.prefetch_scheduler import PREFETCH_ENABLED
 except ImportError:
-    from dependencies import get_garmin_service
+    from dependencies import (
+        get_async_garmin_service,
+        get_daily_prefetcher,
+        get_garmin_service,
+        get_user_id,
+    )
     from routers.coach import router as coach_router
-    from services.garmin_service import GarminService
+    from services.ai_agents import get_response_cache
+    from services.async_garmin_service import AsyncGarminService
+    from services.garmin_service import DEFAULT_USER_ID, GarminService
+    from services.prefetch_scheduler import PREFETCH_ENABLED
 
 load_dotenv()
 
@@ -23,7 +40,22 @@ try:
 except ImportError:
     opik = None
 
-app = FastAPI(title="FitSense AI API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep today's Garmin data warm in the background
+    prefetcher = get_daily_prefetcher()
+    if PREFETCH_ENABLED:
+        if get_garmin_service().is_authenticated:
+            prefetcher.register(DEFAULT_USER_ID)
+        prefetcher.start()
+    yield
+    await prefetcher.stop()
+    # Release the pooled Garmin HTTP connections
+    await get_async_garmin_service().aclose()
+
+
+app = FastAPI(title="FitSense AI API", lifespan=lifespan)
 
 if opik:
 
@@ -50,23 +82,21 @@ app.add_middleware(
 # Include Routers
 app.include_router(coach_router)
 
-# Initialize Garmin Service
-# We try to initialize with env vars. If not present, it will run in mock mode
-# unless login is called later.
-garmin_service = get_garmin_service()
+# The Garmin services (and the local store behind them) are built on first use:
+# from env vars if present, otherwise in mock mode unless login is called later.
 
 
 @app.get("/")
-async def read_root():
+async def read_root(garmin_service: GarminService = Depends(get_garmin_service)):
     """
     Root endpoint to verify API is running.
     """
     return {
         "message": "Welcome to FitSense AI API",
         "docs_url": "/docs",
-        "garmin_status": "Authenticated"
-        if garmin_service.is_authenticated
-        else "Mock Mode",
+        "garmin_status": (
+            "Authenticated" if garmin_service.is_authenticated else "Mock Mode"
+        ),
     }
 
 
@@ -81,13 +111,17 @@ class GarminAuthRequest(BaseModel):
 
 
 @app.post("/api/garmin/auth")
-async def authenticate_garmin(request: GarminAuthRequest):
+async def authenticate_garmin(
+    request: GarminAuthRequest,
+    async_garmin_service: AsyncGarminService = Depends(get_async_garmin_service),
+):
     """
     Verify Garmin credentials.
     """
     try:
         # Try to login to verify credentials
-        garmin_service.login(request.email, request.password)
+        await async_garmin_service.login(request.email, request.password)
+        get_daily_prefetcher().register(DEFAULT_USER_ID)
         return {"status": "success", "message": "Authentication successful"}
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
@@ -100,33 +134,50 @@ class GarminSyncRequest(BaseModel):
 
 
 @app.post("/api/garmin/sync/{user_id}")
-async def sync_garmin_data_post(user_id: str, request: GarminSyncRequest):
+async def sync_garmin_data_post(
+    user_id: str,
+    request: GarminSyncRequest,
+    x_fitsense_user_token: Optional[str] = Header(None),
+    async_garmin_service: AsyncGarminService = Depends(get_async_garmin_service),
+):
     """
     Trigger a sync of Garmin data for a specific user using provided credentials.
+    The response carries a user_token for acting as this user without credentials.
+    Linking a user_id that already has a session to a different Garmin account
+    requires that user's current X-FitSense-User-Token.
     """
     try:
-        result = garmin_service.sync_user_data(
+        result = await async_garmin_service.sync_user_data(
             user_id=user_id,
             email=request.email,
             password=request.password,
             days_back=request.days,
+            current_token=x_fitsense_user_token,
         )
         return result
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/garmin/sync/{user_id}")
-async def sync_garmin_data_get(user_id: str, days: int = 7):
+async def sync_garmin_data_get(
+    user_id: str = Depends(get_user_id),
+    days: int = 7,
+    async_garmin_service: AsyncGarminService = Depends(get_async_garmin_service),
+):
     """
     Trigger a sync of Garmin data for a specific user.
+    Users with their own Garmin session need the X-FitSense-User-Token returned
+    by the POST variant.
     If backend is authenticated with real Garmin creds, fetches real data.
     Otherwise returns mocked data.
     """
     try:
         # In a real scenario, user-specific tokens would be retrieved here.
         # Since we are using a single account for the hackathon demo or mock data:
-        result = garmin_service.sync_user_data(
+        result = await async_garmin_service.sync_user_data(
             user_id=user_id,
             access_token="mock_token",  # Handled internally by service if using garth
             access_secret="mock_secret",
@@ -137,6 +188,25 @@ async def sync_garmin_data_get(user_id: str, days: int = 7):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/garmin/metrics")
+async def garmin_request_metrics(
+    garmin_service: GarminService = Depends(get_garmin_service),
+):
+    """
+    Pacing and retry metrics of the Garmin request scheduler.
+    """
+    return garmin_service.scheduler.snapshot()
+
+
+@app.get("/api/agents/cache")
+async def agent_cache_metrics():
+    """
+    Size and per-agent hit/miss counters of the agent response cache.
+    """
+    cache = get_response_cache()
+    return cache.snapshot() if cache else {"enabled": False}
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,10 +1,33 @@
 from datetime import date, datetime
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Collection, Dict, Optional, Tuple, Type
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
-class GarminData(BaseModel):
+@lru_cache(maxsize=None)
+def _excluded_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(name for name, info in model.model_fields.items() if info.exclude)
+
+
+class GarminModel(BaseModel):
+    """
+    Base for Garmin rows with a cheap plain-dict view for hot loops.
+    """
+
+    def to_record(self, exclude: Collection[str] = ()) -> Dict[str, Any]:
+        """
+        Shallow dict of the field values: model_dump() without the serializer walk
+        (about 5x cheaper). Fields marked exclude (raw_data) are left out, as are
+        `exclude`. Values are shared with the model, so treat the dict as read-only.
+        """
+        record = self.__dict__.copy()
+        for name in (*_excluded_fields(type(self)), *exclude):
+            record.pop(name, None)
+        return record
+
+
+class GarminData(GarminModel):
     """
     Pydantic model for daily Garmin health and wellness data.
     Corresponds to Phase 2, Step 2.2 of the dev guide.
@@ -37,10 +60,12 @@ class GarminData(BaseModel):
     muscle_mass_kg: Optional[float] = None
 
     # Raw data for full Garmin response
-    raw_data: Optional[Dict[str, Any]] = None
+    # Kept out of dumps; persisted compressed by the store and loaded by raw_data_id
+    raw_data: Optional[Dict[str, Any]] = Field(default=None, exclude=True)
+    raw_data_id: Optional[str] = None
 
 
-class GarminActivity(BaseModel):
+class GarminActivity(GarminModel):
     """
     Pydantic model for individual Garmin workouts/activities.
     Corresponds to Phase 2, Step 2.2 of the dev guide.
@@ -67,4 +92,6 @@ class GarminActivity(BaseModel):
     anaerobic_training_effect: Optional[float] = None
 
     # Raw data
-    raw_data: Optional[Dict[str, Any]] = None
+    # Kept out of dumps; persisted compressed by the store and loaded by raw_data_id
+    raw_data: Optional[Dict[str, Any]] = Field(default=None, exclude=True)
+    raw_data_id: Optional[str] = None
@@ -0,0 +1,286 @@
+import json
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import chain
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, get_args
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.models.garmin_data import GarminActivity, GarminData
+
+
+def _numeric_fields(model: Type[BaseModel]) -> Dict[str, type]:
+    """
+    Map each int/float field of a model to its Python type.
+    """
+    fields = {}
+    for name, info in model.model_fields.items():
+        types = set(get_args(info.annotation)) or {info.annotation}
+        if int in types:
+            fields[name] = int
+        elif float in types:
+            fields[name] = float
+    return fields
+
+
+SUMMARY_FIELDS = _numeric_fields(GarminData)
+ACTIVITY_FIELDS = _numeric_fields(GarminActivity)
+
+
+def _columns(
+    rows: List[BaseModel], fields: Dict[str, type]
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """
+    Build float64 value arrays and presence masks for the given fields.
+    All fields are read in one pass (one attrgetter call per row) into a [rows, fields]
+    matrix, which is then split into columns.
+    """
+    names = list(fields)
+    flat = chain.from_iterable(map(attrgetter(*names), rows))
+    matrix = np.fromiter(
+        (np.nan if v is None else v for v in flat),
+        dtype=np.float64,
+        count=len(rows) * len(names),
+    ).reshape(len(rows), len(names))
+    present = ~np.isnan(matrix)
+    values = {name: matrix[:, i].copy() for i, name in enumerate(names)}
+    masks = {name: present[:, i].copy() for i, name in enumerate(names)}
+    return values, masks
+
+
+def _records(
+    n: int,
+    values: Dict[str, np.ndarray],
+    masks: Dict[str, np.ndarray],
+    fields: Dict[str, type],
+    extra: Dict[str, np.ndarray],
+) -> List[Dict[str, Any]]:
+    """
+    Turn columns back into one dict per row, with None for missing values.
+    """
+    columns = {name: column.tolist() for name, column in extra.items()}
+    for name, kind in fields.items():
+        column = values[name]
+        if kind is int:
+            column = np.where(masks[name], column, 0).astype(np.int64)
+        columns[name] = [
+            value if present else None
+            for value, present in zip(column.tolist(), masks[name].tolist())
+        ]
+    return [{name: column[i] for name, column in columns.items()} for i in range(n)]
+
+
+def _date_range(
+    days: np.ndarray, start_date: Optional[date], end_date: Optional[date]
+) -> slice:
+    """
+    Index range of a sorted datetime64[D] array between two dates (inclusive).
+    """
+    lo = np.searchsorted(days, np.datetime64(start_date, "D")) if start_date else 0
+    hi = (
+        np.searchsorted(days, np.datetime64(end_date, "D"), "right")
+        if end_date
+        else len(days)
+    )
+    return slice(lo, hi)
+
+
+@dataclass
+class HistoryFrame:
+    """
+    Columnar view of a user's history.
+    Daily summaries are held as one float64 array per GarminData field plus a
+    boolean mask of which values are present, aligned to a sorted array of dates.
+    Activities are a parallel struct-of-arrays sorted by start time. Raw Garmin
+    payloads are not carried.
+    """
+
+    dates: np.ndarray  # datetime64[D], sorted and unique
+    values: Dict[str, np.ndarray]
+    masks: Dict[str, np.ndarray]
+    activity_start: np.ndarray  # datetime64[s], sorted
+    activity_type: np.ndarray  # str
+    activity_values: Dict[str, np.ndarray]
+    activity_masks: Dict[str, np.ndarray]
+
+    @classmethod
+    def from_models(
+        cls,
+        summaries: Iterable[GarminData],
+        activities: Iterable[GarminActivity] = (),
+    ) -> "HistoryFrame":
+        """
+        Build a frame from Garmin models. Later summaries for the same day win.
+        """
+        by_day = {summary.date: summary for summary in summaries}
+        summary_rows = [by_day[day] for day in sorted(by_day)]
+        activity_rows = sorted(activities, key=lambda activity: activity.start_time)
+
+        values, masks = _columns(summary_rows, SUMMARY_FIELDS)
+        activity_values, activity_masks = _columns(activity_rows, ACTIVITY_FIELDS)
+        return cls(
+            dates=np.array([row.date for row in summary_rows], dtype="datetime64[D]"),
+            values=values,
+            masks=masks,
+            activity_start=np.array(
+                [row.start_time for row in activity_rows], dtype="datetime64[s]"
+            ),
+            activity_type=np.array(
+                [row.activity_type for row in activity_rows], dtype=str
+            ),
+            activity_values=activity_values,
+            activity_masks=activity_masks,
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def num_activities(self) -> int:
+        return len(self.activity_start)
+
+    def column(self, name: str) -> np.ma.MaskedArray:
+        """
+        A daily summary field as a masked array (masked where the value is missing).
+        """
+        return np.ma.MaskedArray(self.values[name], mask=~self.masks[name])
+
+    def activity_column(self, name: str) -> np.ma.MaskedArray:
+        return np.ma.MaskedArray(
+            self.activity_values[name], mask=~self.activity_masks[name]
+        )
+
+    def slice(
+        self, start_date: Optional[date] = None, end_date: Optional[date] = None
+    ) -> "HistoryFrame":
+        """
+        Days (and activities) between start_date and end_date, both inclusive.
+        """
+        days = _date_range(self.dates, start_date, end_date)
+        acts = _date_range(
+            self.activity_start.astype("datetime64[D]"), start_date, end_date
+        )
+        return HistoryFrame(
+            dates=self.dates[days],
+            values={name: column[days] for name, column in self.values.items()},
+            masks={name: column[days] for name, column in self.masks.items()},
+            activity_start=self.activity_start[acts],
+            activity_type=self.activity_type[acts],
+            activity_values={
+                name: column[acts] for name, column in self.activity_values.items()
+            },
+            activity_masks={
+                name: column[acts] for name, column in self.activity_masks.items()
+            },
+        )
+
+    def last(self, days: int, end_date: Optional[date] = None) -> "HistoryFrame":
+        """
+        The trailing window of `days` calendar days ending at end_date (default: last day).
+        """
+        if end_date is None:
+            if not len(self):
+                return self
+            end_date = self.dates[-1].astype(object)
+        return self.slice(end_date - timedelta(days=days - 1), end_date)
+
+    def _window_bounds(self, window: int) -> np.ndarray:
+        # Index of the first row inside each row's trailing calendar window
+        return np.searchsorted(self.dates, self.dates - np.timedelta64(window - 1, "D"))
+
+    def rolling_mean(self, name: str, window: int) -> np.ndarray:
+        """
+        Trailing mean of a field over `window` calendar days ending at each row.
+        Missing values are skipped; NaN where a window has no data.
+        """
+        sums, counts = self._rolling_sums(name, window, power=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def rolling_std(self, name: str, window: int) -> np.ndarray:
+        """
+        Trailing population standard deviation over `window` calendar days.
+        """
+        sums, counts = self._rolling_sums(name, window, power=1)
+        squares, _ = self._rolling_sums(name, window, power=2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = sums / counts
+            variance = np.maximum(squares / counts - mean**2, 0.0)
+            return np.where(counts > 0, np.sqrt(variance), np.nan)
+
+    def _rolling_sums(
+        self, name: str, window: int, power: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        mask = self.masks[name]
+        filled = np.where(mask, self.values[name], 0.0) ** power
+        cumulative = np.concatenate(([0.0], np.cumsum(filled)))
+        present = np.concatenate(([0], np.cumsum(mask)))
+        start = self._window_bounds(window)
+        end = np.arange(1, len(self) + 1)
+        return cumulative[end] - cumulative[start], present[end] - present[start]
+
+    def daily_activity_totals(
+        self, name: str = "duration_minutes", activity_type: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Sum of an activity field per summary day (aligned with dates).
+        Activities on days without a summary row are dropped.
+        """
+        totals = np.zeros(len(self))
+        if not len(self) or not self.num_activities:
+            return totals
+
+        selected = np.ones(self.num_activities, dtype=bool)
+        if activity_type is not None:
+            selected &= self.activity_type == activity_type
+        activity_days = self.activity_start.astype("datetime64[D]")
+        index = np.searchsorted(self.dates, activity_days)
+        selected &= index < len(self)
+        selected[selected] &= self.dates[index[selected]] == activity_days[selected]
+
+        contribution = np.where(
+            self.activity_masks[name], self.activity_values[name], 0.0
+        )
+        np.add.at(totals, index[selected], contribution[selected])
+        return totals
+
+    def summary_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Daily summaries in the dict form the agents consume (same keys as GarminData).
+        """
+        return _records(
+            len(self),
+            self.values,
+            self.masks,
+            SUMMARY_FIELDS,
+            {"date": self.dates.astype(object)},
+        )
+
+    def activity_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Activities in the dict form the agents consume (same keys as GarminActivity).
+        """
+        return _records(
+            self.num_activities,
+            self.activity_values,
+            self.activity_masks,
+            ACTIVITY_FIELDS,
+            {
+                "activity_type": self.activity_type,
+                "start_time": self.activity_start.astype(object),
+            },
+        )
+
+    def to_json(self) -> str:
+        """
+        Compact JSON with daily_summaries and activities.
+        """
+        return json.dumps(
+            {
+                "daily_summaries": self.summary_dicts(),
+                "activities": self.activity_dicts(),
+            },
+            default=lambda value: value.isoformat(),
+        )
@@ -1,16 +1,22 @@
 import logging
 from typing import Any, Dict, List, Optional
 
-from app.dependencies import get_coach_orchestrator
+from app.dependencies import get_coach_orchestrator, get_user_id
 from app.services.coach_orchestrator import CoachOrchestrator
+from app.services.serialization import CompactJSONResponse, dumps
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/coach", tags=["Coach"])
+# Responses are returned as CompactJSONResponse directly, which skips FastAPI's
+# jsonable_encoder pass and renders with orjson when it is installed
+router = APIRouter(
+    prefix="/api/coach", tags=["Coach"], default_response_class=CompactJSONResponse
+)
 
 
 # --- Pydantic Models for Request/Response ---
@@ -41,6 +47,7 @@ class DailyGuidanceRequest(BaseModel):
 @router.post("/plan")
 async def generate_weekly_plan(
     user_profile: UserProfile,
+    user_id: str = Depends(get_user_id),
     orchestrator: CoachOrchestrator = Depends(get_coach_orchestrator),
 ):
     """
@@ -49,16 +56,56 @@ async def generate_weekly_plan(
     try:
         # Convert Pydantic model to dict for the orchestrator
         profile_dict = user_profile.model_dump()
-        result = orchestrator.generate_weekly_plan(user_profile=profile_dict)
-        return result
+        result = await orchestrator.agenerate_weekly_plan(
+            user_profile=profile_dict, user_id=user_id
+        )
+        return CompactJSONResponse(result)
     except Exception as e:
         logger.error(f"Error generating weekly plan: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/plan/stream")
+async def stream_weekly_plan(
+    user_profile: UserProfile,
+    user_id: str = Depends(get_user_id),
+    orchestrator: CoachOrchestrator = Depends(get_coach_orchestrator),
+):
+    """
+    Same as /plan, streamed as Server-Sent Events so the client can render days as
+    they are generated: a `recovery_analysis` event, one `day` event per entry of
+    daily_plans, then `weekly_plan` with the complete plan. Failures are sent as
+    an `error` event.
+    """
+    profile_dict = user_profile.model_dump()
+
+    async def events():
+        try:
+            async for event, data in orchestrator.astream_weekly_plan(
+                user_profile=profile_dict, user_id=user_id
+            ):
+                yield _sse(event, data)
+        except Exception as e:
+            logger.error(f"Error streaming weekly plan: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: Any) -> str:
+    # Compact JSON never contains a newline, so each event fits one data line
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
 @router.post("/daily")
 async def get_daily_guidance(
     request: DailyGuidanceRequest,
+    user_id: str = Depends(get_user_id),
     orchestrator: CoachOrchestrator = Depends(get_coach_orchestrator),
 ):
     """
@@ -71,10 +118,10 @@ async def get_daily_guidance(
         if request.scheduled_workout:
             scheduled_workout_dict = request.scheduled_workout.model_dump()
 
-        result = orchestrator.get_daily_guidance(
-            scheduled_workout=scheduled_workout_dict
+        result = await orchestrator.aget_daily_guidance(
+            scheduled_workout=scheduled_workout_dict, user_id=user_id
         )
-        return result
+        return CompactJSONResponse(result)
     except Exception as e:
         logger.error(f"Error getting daily guidance: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -82,14 +129,33 @@ async def get_daily_guidance(
 
 @router.get("/insights")
 async def get_insights(
-    days: int = 30, orchestrator: CoachOrchestrator = Depends(get_coach_orchestrator)
+    days: int = 30,
+    user_id: str = Depends(get_user_id),
+    orchestrator: CoachOrchestrator = Depends(get_coach_orchestrator),
 ):
     """
     Generate actionable insights based on historical data.
     """
     try:
-        result = orchestrator.get_insights(days_back=days)
-        return result
+        result = await orchestrator.aget_insights(days_back=days, user_id=user_id)
+        return CompactJSONResponse(result)
     except Exception as e:
         logger.error(f"Error generating insights: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/training-load")
+async def get_training_load(
+    user_id: str = Depends(get_user_id),
+    orchestrator: CoachOrchestrator = Depends(get_coach_orchestrator),
+):
+    """
+    Current acute/chronic training load and fitness/fatigue/form (TRIMP based).
+    """
+    try:
+        return CompactJSONResponse(
+            await orchestrator.aget_training_load(user_id=user_id)
+        )
+    except Exception as e:
+        logger.error(f"Error computing training load: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
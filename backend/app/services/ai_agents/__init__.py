@@ -3,6 +3,7 @@ from .analysis_agent import AnalysisAgent
 from .base_agent import BaseAgent
 from .insights_agent import InsightsAgent
 from .planning_agent import PlanningAgent
+from .response_cache import AgentResponseCache, get_response_cache
 
 __all__ = [
     "BaseAgent",
@@ -10,4 +11,6 @@ __all__ = [
     "PlanningAgent",
     "AdaptationAgent",
     "InsightsAgent",
+    "AgentResponseCache",
+    "get_response_cache",
 ]
@@ -20,6 +20,8 @@ Your primary directive is "Safety First, Consistency Second, Intensity Third".
 
 Analyze the input data using these rules. IMPORTANT: Do NOT use Body Battery or Sleep Score in your decision making. Rely on Stress, Resting Heart Rate (RHR), and Training Load.
 
+`recent_training_load` holds TRIMP-based loads: `acute_load` (7-day) and `chronic_load` (28-day) exponentially weighted averages, their ratio `acwr`, and Banister `fitness`, `fatigue` and `form` (fitness minus fatigue). Treat an `acwr` above 1.5 as very high recent acute load and 1.3-1.5 as high; strongly negative `form` also indicates accumulated fatigue.
+
 1. **Critical Recovery Failure (RED ZONE)**:
    - IF (Stress > 70 AND RHR significantly elevated) OR very high recent acute load:
    - **ACTION**: Change workout to "Rest" or "Active Recovery" (e.g., light walking, stretching, yoga).
@@ -81,15 +83,42 @@ If `modification_status` is "unchanged", `adapted_workout` should match the orig
         Returns:
             Dictionary containing the adaptation decision and the resulting workout.
         """
-        user_input = {
+        user_input = self._adaptation_input(
+            scheduled_workout, today_recovery, recent_training_load
+        )
+        return self._parse_adaptation(self.run(user_input), scheduled_workout)
+
+    async def aadapt_workout(
+        self,
+        scheduled_workout: Dict[str, Any],
+        today_recovery: Dict[str, Any],
+        recent_training_load: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        Async variant of adapt_workout (awaits Gemini without a thread).
+        """
+        user_input = self._adaptation_input(
+            scheduled_workout, today_recovery, recent_training_load
+        )
+        return self._parse_adaptation(await self.arun(user_input), scheduled_workout)
+
+    @staticmethod
+    def _adaptation_input(
+        scheduled_workout: Dict[str, Any],
+        today_recovery: Dict[str, Any],
+        recent_training_load: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        return {
             "task": "Adapt scheduled workout based on recovery.",
             "scheduled_workout": scheduled_workout,
             "current_recovery_metrics": today_recovery,
             "recent_training_load": recent_training_load,
         }
 
-        result = self.run(user_input)
-
+    @staticmethod
+    def _parse_adaptation(
+        result: Dict[str, Any], scheduled_workout: Dict[str, Any]
+    ) -> Dict[str, Any]:
         if result["status"] == "success":
             data = result["data"]
             if isinstance(data, str):
@@ -9,6 +9,9 @@ class AnalysisAgent(BaseAgent):
     Agent responsible for analyzing Garmin data to determine recovery status.
     """
 
+    # Receives daily summaries and activity lists
+    prompt_format = "tabular"
+
     def _build_system_prompt(self) -> str:
         return """
 You are an expert sports scientist and recovery analyst for the FitSense AI system.
@@ -79,15 +82,35 @@ Do not include any markdown formatting or explanations outside the JSON object.
         Returns:
             Dictionary with analysis results matching the OUTPUT FORMAT schema.
         """
+        return self._parse_analysis(self.run(self._analysis_input(garmin_data)))
+
+    async def aanalyze_recovery_status(
+        self, garmin_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Async variant of analyze_recovery_status (awaits Gemini without a thread).
+        """
+        return self._parse_analysis(await self.arun(self._analysis_input(garmin_data)))
+
+    @staticmethod
+    def _analysis_input(garmin_data: Dict[str, Any]) -> Dict[str, Any]:
         # Prepare the input for the agent
         # We wrap the data to be explicit about what the agent is looking at
-        user_input = {
+        return {
             "task": "Analyze recovery status based on the following Garmin data.",
             "data": garmin_data,
         }
 
-        result = self.run(user_input)
+    @staticmethod
+    def is_fallback(analysis: Dict[str, Any]) -> bool:
+        """
+        Whether an analysis is the placeholder returned when the call or the
+        parsing of its response failed.
+        """
+        return analysis.get("source") == "fallback"
 
+    @staticmethod
+    def _parse_analysis(result: Dict[str, Any]) -> Dict[str, Any]:
         if result["status"] == "success":
             # The BaseAgent._extract_reasoning attempts to parse JSON
             # Check if result['data'] is indeed a dict, if not try to parse it
@@ -108,6 +131,7 @@ Do not include any markdown formatting or explanations outside the JSON object.
                             "advice": "Analysis format error. Proceed with caution.",
                         },
                         "reasoning": f"Raw response could not be parsed: {data[:100]}...",
+                        "source": "fallback",
                     }
             return data
         else:
@@ -123,4 +147,5 @@ Do not include any markdown formatting or explanations outside the JSON object.
                     "advice": "Could not analyze data due to service error. Listen to your body.",
                 },
                 "reasoning": f"Agent error: {result.get('error')}",
+                "source": "fallback",
             }
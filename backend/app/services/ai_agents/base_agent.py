@@ -1,12 +1,19 @@
-import datetime
 import json
 import logging
 import os
 import time
-from typing import Any, Dict, Optional, Union
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Union
 
 import google.generativeai as genai
-from google.generativeai.types import HarmBlockThreshold, HarmCategory
+
+from ..prompt_encoding import PROMPT_FORMATS, TABULAR_PROMPT_NOTE
+from .gemini_client import SAFETY_SETTINGS, configure_genai, get_model
+from .response_cache import (
+    CACHE_TTL_SECONDS,
+    AgentResponseCache,
+    cache_key,
+    get_response_cache,
+)
 
 try:
     from opik import track
@@ -28,20 +35,40 @@ class BaseAgent:
     logging, error handling, and Opik tracing.
     """
 
-    def __init__(self, model: str = "gemini-pro"):
+    # Encoding of dict inputs, a key of PROMPT_FORMATS: "json" (compact JSON) or
+    # "tabular" (lists of records as header-plus-rows tables). Agents that receive
+    # history override it; FITSENSE_PROMPT_FORMAT forces one format for all agents.
+    prompt_format: str = "json"
+
+    # Passed to Gemini as GenerationConfig; part of the response cache key
+    generation_config: Dict[str, Any] = {"max_output_tokens": 8192, "temperature": 0.7}
+
+    # How long identical calls are answered from the response cache
+    # (None: FITSENSE_AGENT_CACHE_TTL_SECONDS, 0: never cached)
+    cache_ttl_seconds: Optional[float] = None
+
+    def __init__(
+        self,
+        model: str = "gemini-pro",
+        cache: Optional[AgentResponseCache] = None,
+    ):
         """
         Initialize the agent with Google Gemini client and model selection.
+        Responses are cached in `cache`, by default the process-wide response cache.
         """
         self.model_name = os.getenv("GEMINI_MODEL", model)
+        self.cache = cache if cache is not None else get_response_cache()
+        if self.cache_ttl_seconds is None:
+            self.cache_ttl_seconds = CACHE_TTL_SECONDS
+        self.prompt_format = os.getenv("FITSENSE_PROMPT_FORMAT", self.prompt_format)
+        if self.prompt_format not in PROMPT_FORMATS:
+            raise ValueError(f"Unknown prompt format: {self.prompt_format}")
 
-        # Initialize Google GenAI client
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            logger.warning(
-                "GEMINI_API_KEY not found in environment variables. Agent calls will fail."
-            )
-        else:
-            genai.configure(api_key=api_key)
+        # Built once per agent; models are shared per (model, system prompt)
+        self._generation_config = genai.types.GenerationConfig(**self.generation_config)
+
+        # Initialize Google GenAI client (once per process)
+        configure_genai()
 
         # Opik is initialized via environment variables (OPIK_API_KEY, OPIK_WORKSPACE)
         # and the @track decorator.
@@ -56,17 +83,13 @@ class BaseAgent:
     def _format_user_message(self, user_input: Union[Dict[str, Any], str]) -> str:
         """
         Format the user input into a string message for the LLM.
-        Can be overridden or used as is.
+        Dicts are encoded in the agent's prompt_format (compact either way:
+        indentation only costs prompt tokens). Can be overridden or used as is.
         """
         if isinstance(user_input, str):
             return user_input
 
-        def json_serial(obj):
-            if isinstance(obj, (datetime.date, datetime.datetime)):
-                return obj.isoformat()
-            raise TypeError(f"Type {type(obj)} not serializable")
-
-        return json.dumps(user_input, indent=2, default=json_serial)
+        return PROMPT_FORMATS[self.prompt_format](user_input)
 
     def _extract_reasoning(self, response_text: str) -> Any:
         """
@@ -103,6 +126,110 @@ class BaseAgent:
             # Return as plain text if not JSON
             return response_text
 
+    def _prepare(
+        self,
+        user_input: Union[Dict[str, Any], str],
+        context: Optional[Dict[str, Any]],
+        start_time: float,
+    ) -> Tuple[str, str, Optional[str], Optional[Dict[str, Any]]]:
+        """
+        System prompt, formatted message and cache key for a call, plus the full
+        response when the call can be answered from the cache.
+        """
+        system_prompt = self._build_system_prompt()
+        if self.prompt_format == "tabular":
+            system_prompt += TABULAR_PROMPT_NOTE
+        formatted_message = self._format_user_message(user_input)
+
+        # Add metadata to Opik trace
+        if context:
+            # This might need adjustment depending on exact Opik SDK version capabilities
+            # but generically we want to log context.
+            pass
+
+        # Byte-identical calls (same agent, model, prompts and config) are
+        # answered from the cache
+        key = None
+        if self.cache is not None and self.cache_ttl_seconds > 0:
+            key = cache_key(
+                self.__class__.__name__,
+                self.model_name,
+                system_prompt,
+                self.generation_config,
+                formatted_message,
+            )
+            cached = self.cache.get(key, self.__class__.__name__)
+            if cached is not None:
+                logger.info(f"Agent {self.__class__.__name__} answered from cache")
+                cached["metadata"].update(
+                    latency=time.time() - start_time, cache_hit=True
+                )
+                cached = {"status": "success", **cached}
+                return system_prompt, formatted_message, key, cached
+
+        logger.info(
+            f"Running agent {self.__class__.__name__} with model {self.model_name}"
+        )
+        return system_prompt, formatted_message, key, None
+
+    def _complete(
+        self, response: Any, start_time: float, key: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Turn a Gemini response into the agent result (and cache it).
+        """
+        # Check if response was blocked or is empty
+        if not response.parts:
+            if response.prompt_feedback:
+                logger.warning(f"Prompt feedback: {response.prompt_feedback}")
+            raise ValueError("Empty response from Gemini (possibly blocked)")
+
+        response_text = response.text
+
+        # Extract reasoning/output
+        result = self._extract_reasoning(response_text)
+
+        # Calculate metrics
+        latency = time.time() - start_time
+
+        # Extract usage metadata if available
+        token_usage = {}
+        if response.usage_metadata:
+            token_usage = {
+                "input_tokens": response.usage_metadata.prompt_token_count,
+                "output_tokens": response.usage_metadata.candidates_token_count,
+                "total_tokens": response.usage_metadata.total_token_count,
+            }
+
+        logger.info(f"Agent finished in {latency:.2f}s. Tokens: {token_usage}")
+
+        output = {
+            "data": result,
+            "raw_response": response_text,
+            "metadata": {
+                "latency": latency,
+                "token_usage": token_usage,
+                "model": self.model_name,
+                "agent": self.__class__.__name__,
+                "cache_hit": False,
+            },
+        }
+        if key is not None:
+            self.cache.put(key, self.__class__.__name__, output, self.cache_ttl_seconds)
+        return {"status": "success", **output}
+
+    def _failed(self, error: Exception, start_time: float) -> Dict[str, Any]:
+        logger.error(f"Error running agent: {str(error)}", exc_info=True)
+        return {
+            "status": "error",
+            "error": str(error),
+            "metadata": {
+                "latency": time.time() - start_time,
+                "agent": self.__class__.__name__,
+                "cache_hit": False,
+            },
+        }
+
     @track
     def run(
         self,
@@ -115,86 +242,90 @@ class BaseAgent:
         start_time = time.time()
 
         try:
-            system_prompt = self._build_system_prompt()
-            formatted_message = self._format_user_message(user_input)
+            system_prompt, formatted_message, key, cached = self._prepare(
+                user_input, context, start_time
+            )
+            if cached is not None:
+                return cached
 
-            # Add metadata to Opik trace
-            if context:
-                # This might need adjustment depending on exact Opik SDK version capabilities
-                # but generically we want to log context.
-                pass
+            model = get_model(self.model_name, system_prompt)
+            response = model.generate_content(
+                formatted_message,
+                safety_settings=SAFETY_SETTINGS,
+                generation_config=self._generation_config,
+            )
+            return self._complete(response, start_time, key)
+
+        except Exception as e:
+            return self._failed(e, start_time)
+
+    @track
+    async def arun(
+        self,
+        user_input: Union[Dict[str, Any], str],
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Async variant of run: awaits Gemini (generate_content_async) so the event
+        loop keeps serving other requests while the model is generating.
+        """
+        start_time = time.time()
 
-            logger.info(
-                f"Running agent {self.__class__.__name__} with model {self.model_name}"
+        try:
+            system_prompt, formatted_message, key, cached = self._prepare(
+                user_input, context, start_time
             )
+            if cached is not None:
+                return cached
 
-            # Instantiate model with system instruction
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                system_instruction=system_prompt,
+            model = get_model(self.model_name, system_prompt)
+            response = await model.generate_content_async(
+                formatted_message,
+                safety_settings=SAFETY_SETTINGS,
+                generation_config=self._generation_config,
             )
+            return self._complete(response, start_time, key)
 
-            # Configure safety settings to avoid blocking standard fitness advice
-            safety_settings = {
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-            }
+        except Exception as e:
+            return self._failed(e, start_time)
 
-            response = model.generate_content(
+    @track
+    async def astream(
+        self,
+        user_input: Union[Dict[str, Any], str],
+        context: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of arun: yields the response text as Gemini generates it
+        (a cached response is yielded in one piece). The complete response is
+        cached like arun's. Errors are logged and raised, since part of the text
+        may already have been consumed.
+        """
+        start_time = time.time()
+
+        try:
+            system_prompt, formatted_message, key, cached = self._prepare(
+                user_input, context, start_time
+            )
+            if cached is not None:
+                yield cached["raw_response"]
+                return
+
+            model = get_model(self.model_name, system_prompt)
+            response = await model.generate_content_async(
                 formatted_message,
-                safety_settings=safety_settings,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=8192,
-                    temperature=0.7,
-                ),
+                safety_settings=SAFETY_SETTINGS,
+                generation_config=self._generation_config,
+                stream=True,
             )
+            async for chunk in response:
+                # The last chunk may only carry the finish reason
+                if chunk.parts:
+                    yield chunk.text
 
-            # Check if response was blocked or is empty
-            if not response.parts:
-                if response.prompt_feedback:
-                    logger.warning(f"Prompt feedback: {response.prompt_feedback}")
-                raise ValueError("Empty response from Gemini (possibly blocked)")
-
-            response_text = response.text
-
-            # Extract reasoning/output
-            result = self._extract_reasoning(response_text)
-
-            # Calculate metrics
-            latency = time.time() - start_time
-
-            # Extract usage metadata if available
-            token_usage = {}
-            if response.usage_metadata:
-                token_usage = {
-                    "input_tokens": response.usage_metadata.prompt_token_count,
-                    "output_tokens": response.usage_metadata.candidates_token_count,
-                    "total_tokens": response.usage_metadata.total_token_count,
-                }
-
-            logger.info(f"Agent finished in {latency:.2f}s. Tokens: {token_usage}")
-
-            return {
-                "status": "success",
-                "data": result,
-                "raw_response": response_text,
-                "metadata": {
-                    "latency": latency,
-                    "token_usage": token_usage,
-                    "model": self.model_name,
-                    "agent": self.__class__.__name__,
-                },
-            }
+            # The response now holds the merged chunks and the usage metadata
+            self._complete(response, start_time, key)
 
         except Exception as e:
-            logger.error(f"Error running agent: {str(e)}", exc_info=True)
-            return {
-                "status": "error",
-                "error": str(e),
-                "metadata": {
-                    "latency": time.time() - start_time,
-                    "agent": self.__class__.__name__,
-                },
-            }
+            self._failed(e, start_time)
+            raise
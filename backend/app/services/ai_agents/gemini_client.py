@@ -0,0 +1,65 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import google.generativeai as genai
+from google.generativeai.types import HarmBlockThreshold, HarmCategory
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Configure safety settings to avoid blocking standard fitness advice
+SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+}
+
+_lock = threading.Lock()
+_configured: Optional[bool] = None
+_models: Dict[Tuple[str, Optional[str]], genai.GenerativeModel] = {}
+
+
+def configure_genai() -> bool:
+    """
+    Configure the genai client once per process from GEMINI_API_KEY.
+    Calling genai.configure again drops the cached Gemini client (and its
+    connections), so everything goes through here. Returns whether a key was set.
+    """
+    global _configured
+    with _lock:
+        if _configured is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                logger.warning(
+                    "GEMINI_API_KEY not found in environment variables. Agent calls will fail."
+                )
+            else:
+                genai.configure(api_key=api_key)
+            _configured = bool(api_key)
+        return _configured
+
+
+def get_model(
+    model_name: str, system_instruction: Optional[str] = None
+) -> genai.GenerativeModel:
+    """
+    Shared GenerativeModel for a model and system instruction.
+    Models hold no per-request state and use the process-wide Gemini client, so one
+    instance serves every thread.
+    """
+    key = (model_name, system_instruction)
+    model = _models.get(key)
+    if model is None:
+        configure_genai()
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(
+                    model_name=model_name, system_instruction=system_instruction
+                )
+                _models[key] = model
+    return model
@@ -9,11 +9,24 @@ class InsightsAgent(BaseAgent):
     Agent responsible for analyzing long-term data to find patterns and actionable insights.
     """
 
+    # Receives daily summaries and activity lists
+    prompt_format = "tabular"
+    # Inputs only change when new days are synced; reuse insights for the day's refreshes
+    cache_ttl_seconds = 6 * 3600
+
     def _build_system_prompt(self) -> str:
         return """
 You are a sophisticated data analyst and sports scientist for FitSense AI.
 Your goal is to mine a user's historical fitness and health data for meaningful patterns, correlations, and trends that can improve their performance and well-being.
 
+The data may be a feature bundle rather than raw days: 7/28-day means and deltas per metric, training load (including the acute:chronic workload ratio `acwr`), streaks, recent hard sessions and weekly means in `weekly_trend`.
+
+It may also contain `findings` that were computed and tested for significance before reaching you:
+- `load_correlations`: activity load (minutes of a type) against RHR, HRV or stress `lag_days` later; `effect` is the mean difference after training days versus rest days.
+- `day_of_week_effects`: weekdays whose mean differs from the other days.
+- `anomalies`: days far from the trailing 28-day median.
+When `findings` are present, base correlation and anomaly insights on them only and phrase them for the user. Do not report correlations that are not listed there.
+
 ### INSIGHT GENERATION GUIDELINES
 
 1. **Pattern Recognition**:
@@ -60,23 +73,39 @@ Do not include markdown formatting outside the JSON.
         Generate insights from historical data.
 
         Args:
-            historical_data: List of daily summaries or activities.
+            historical_data: List of daily summaries or activities, or feature
+                bundles and precomputed findings.
             timeframe: String description of the period (e.g., "last_30_days").
 
         Returns:
             Dictionary containing list of insights and summary.
         """
-        user_input = {
+        # If data is too large, we might need to truncate or summarize it before sending to LLM.
+        # For this implementation, we assume the caller handles data volume or it fits in context.
+        user_input = self._insights_input(historical_data, timeframe)
+        return self._parse_insights(self.run(user_input))
+
+    async def agenerate_insights(
+        self, historical_data: List[Dict[str, Any]], timeframe: str = "last_30_days"
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_insights (awaits Gemini without a thread).
+        """
+        user_input = self._insights_input(historical_data, timeframe)
+        return self._parse_insights(await self.arun(user_input))
+
+    @staticmethod
+    def _insights_input(
+        historical_data: List[Dict[str, Any]], timeframe: str
+    ) -> Dict[str, Any]:
+        return {
             "task": "Generate insights from historical data.",
             "timeframe": timeframe,
             "data_summary": historical_data,
         }
 
-        # If data is too large, we might need to truncate or summarize it before sending to LLM.
-        # For this implementation, we assume the caller handles data volume or it fits in context.
-
-        result = self.run(user_input)
-
+    @staticmethod
+    def _parse_insights(result: Dict[str, Any]) -> Dict[str, Any]:
         if result["status"] == "success":
             data = result["data"]
             if isinstance(data, str):
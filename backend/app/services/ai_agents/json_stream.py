@@ -0,0 +1,92 @@
+import json
+import logging
+import re
+from typing import Any, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class JSONArrayStreamParser:
+    """
+    Incremental parser for one array inside a JSON document that arrives in
+    chunks (e.g. "daily_plans" in a streamed PlanningAgent response).
+    feed() returns the object/array elements completed by each chunk, so they can
+    be used before the rest of the document has been generated. Anything around
+    the array (other keys, markdown code fences) is ignored.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._key_pattern = re.compile(rf'"{re.escape(key)}"\s*:\s*\[')
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._start: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Add the next chunk of text; returns the elements it completed.
+        """
+        if self.done:
+            return []
+        self._buffer += chunk
+        if not self._in_array:
+            match = self._key_pattern.search(self._buffer)
+            if match is None:
+                # Keep only a tail long enough to hold a key split across chunks
+                self._buffer = self._buffer[-(len(self.key) + 64) :]
+                return []
+            self._in_array = True
+            self._buffer = self._buffer[match.end() :]
+            self._pos = 0
+
+        elements = []
+        buffer = self._buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._start = index
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the array itself
+                    self.done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    element = self._decode(buffer[self._start : index + 1])
+                    if element is not None:
+                        elements.append(element)
+                    self._start = None
+
+        # Drop everything before the element in progress
+        if self._start is None or self.done:
+            self._buffer, self._pos = "", 0
+        else:
+            self._buffer = buffer[self._start :]
+            self._pos = len(buffer) - self._start
+            self._start = 0
+        return elements
+
+    def _decode(self, text: str) -> Optional[Any]:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed {self.key} element: {e}")
+            return None
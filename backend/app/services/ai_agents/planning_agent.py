@@ -1,7 +1,8 @@
 import json
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from .base_agent import BaseAgent
+from .json_stream import JSONArrayStreamParser
 
 
 class PlanningAgent(BaseAgent):
@@ -9,6 +10,11 @@ class PlanningAgent(BaseAgent):
     Agent responsible for generating weekly workout plans based on user goals and recovery status.
     """
 
+    # Receives daily summaries and activity lists
+    prompt_format = "tabular"
+    # Inputs only change when new days are synced; reuse plans for the day's refreshes
+    cache_ttl_seconds = 6 * 3600
+
     def _build_system_prompt(self) -> str:
         return """
 You are an expert fitness coach and planner for the FitSense AI system.
@@ -30,6 +36,7 @@ Your goal is to generate a comprehensive 7-day workout plan tailored to a user's
 - **Context Awareness**:
 - If `recovery_status` is "Poor", reduce intensity/volume for the first few days.
 - If `recent_workouts` show high volume, ensure adequate recovery is planned.
+- When `recent_training_features` is given instead, use its `training_load` (an `acwr` above 1.3 means a load spike), `fitness_fatigue` (TRIMP-based acute/chronic load, fitness, fatigue and form), `streaks` and `recent_hard_sessions` to judge recent volume.
 - **IMPORTANT**: Do NOT use Sleep Score or Body Battery metrics to determine the plan intensity or volume. Rely on subjective feedback, Stress, and Resting Heart Rate trends instead.
 
 ### OUTPUT FORMAT
@@ -69,6 +76,7 @@ You must output a VALID JSON object with the following structure:
         user_profile: Dict[str, Any],
         recent_workouts: List[Dict[str, Any]],
         recovery_status: Dict[str, Any],
+        features: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         Generate a 7-day workout plan.
@@ -77,19 +85,82 @@ You must output a VALID JSON object with the following structure:
             user_profile: Dict containing user goals, level, equipment, etc.
             recent_workouts: List of recent workout dictionaries.
             recovery_status: The output from the AnalysisAgent (recovery assessment).
+            features: Optional feature bundle summarizing recent history; when given it
+                is sent instead of the raw recent_workouts list.
 
         Returns:
             Dictionary containing the weekly plan.
         """
+        user_input = self._plan_input(
+            user_profile, recent_workouts, recovery_status, features
+        )
+        return self._parse_plan(self.run(user_input))
+
+    async def agenerate_weekly_plan(
+        self,
+        user_profile: Dict[str, Any],
+        recent_workouts: List[Dict[str, Any]],
+        recovery_status: Dict[str, Any],
+        features: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_weekly_plan (awaits Gemini without a thread).
+        """
+        user_input = self._plan_input(
+            user_profile, recent_workouts, recovery_status, features
+        )
+        return self._parse_plan(await self.arun(user_input))
+
+    async def astream_weekly_plan(
+        self,
+        user_profile: Dict[str, Any],
+        recent_workouts: List[Dict[str, Any]],
+        recovery_status: Dict[str, Any],
+        features: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming variant of agenerate_weekly_plan.
+        Yields ("day", entry) for each entry of daily_plans as soon as Gemini has
+        finished writing it, then ("weekly_plan", plan) with the complete plan as
+        agenerate_weekly_plan returns it.
+        """
+        user_input = self._plan_input(
+            user_profile, recent_workouts, recovery_status, features
+        )
+        parser = JSONArrayStreamParser("daily_plans")
+        chunks = []
+        try:
+            async for chunk in self.astream(user_input):
+                chunks.append(chunk)
+                for day in parser.feed(chunk):
+                    yield "day", day
+        except Exception as e:
+            yield "weekly_plan", self._parse_plan({"status": "error", "error": str(e)})
+            return
+
+        data = self._extract_reasoning("".join(chunks))
+        yield "weekly_plan", self._parse_plan({"status": "success", "data": data})
+
+    @staticmethod
+    def _plan_input(
+        user_profile: Dict[str, Any],
+        recent_workouts: List[Dict[str, Any]],
+        recovery_status: Dict[str, Any],
+        features: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
         user_input = {
             "task": "Generate a weekly workout plan.",
             "user_profile": user_profile,
-            "recent_workouts_summary": recent_workouts,
             "current_recovery_status": recovery_status,
         }
+        if features is not None:
+            user_input["recent_training_features"] = features
+        else:
+            user_input["recent_workouts_summary"] = recent_workouts
+        return user_input
 
-        result = self.run(user_input)
-
+    @staticmethod
+    def _parse_plan(result: Dict[str, Any]) -> Dict[str, Any]:
         if result["status"] == "success":
             data = result["data"]
             if isinstance(data, str):
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ..serialization import dumps
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("FITSENSE_AGENT_CACHE_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+CACHE_MAX_ENTRIES = int(os.getenv("FITSENSE_AGENT_CACHE_MAX_ENTRIES", "512"))
+# Default time to live; agents can set their own (BaseAgent.cache_ttl_seconds)
+CACHE_TTL_SECONDS = float(os.getenv("FITSENSE_AGENT_CACHE_TTL_SECONDS", "3600"))
+# Optional SQLite file for the on-disk tier (shared across workers and restarts)
+CACHE_DB_PATH = os.getenv("FITSENSE_AGENT_CACHE_DB_PATH")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_responses (
+    key TEXT PRIMARY KEY,
+    agent TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS agent_responses_expiry ON agent_responses (expires_at);
+"""
+
+
+def cache_key(*parts: Any) -> str:
+    """
+    Content hash of everything that determines a response (agent, model, system
+    prompt, generation config, formatted message).
+    """
+    return hashlib.sha256(dumps(list(parts)).encode("utf-8")).hexdigest()
+
+
+class AgentResponseCache:
+    """
+    Content-addressed cache of successful agent responses.
+    An in-memory LRU tier sits in front of an optional SQLite tier; entries found
+    on disk are promoted to memory. Every entry carries its own expiry, so agents
+    can use different TTLs. Hits and misses are counted per agent.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        db_path: Optional[str] = CACHE_DB_PATH,
+    ):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        self.db_path = db_path
+        self._conn = None
+        if db_path:
+            if db_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            with self._lock:
+                self._conn.executescript(_SCHEMA)
+                self._conn.commit()
+
+    def _count(self, agent: str, event: str):
+        stats = self._stats.setdefault(
+            agent, {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+        )
+        stats[event] += 1
+
+    def get(self, key: str, agent: str) -> Optional[Dict[str, Any]]:
+        """
+        The cached response for key, or None if absent or expired.
+        Entries are held serialized, so every hit returns a fresh copy that the
+        caller may modify.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._count(agent, "memory_hits")
+                    return json.loads(entry[1])
+                del self._entries[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT expires_at, data FROM agent_responses WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self._count(agent, "disk_hits")
+                    return json.loads(row[1])
+
+            self._count(agent, "misses")
+            return None
+
+    def put(self, key: str, agent: str, response: Dict[str, Any], ttl_seconds: float):
+        """
+        Cache a response (a JSON-serializable dict) for ttl_seconds.
+        """
+        if ttl_seconds <= 0:
+            return
+        expires_at = time.time() + ttl_seconds
+        data = dumps(response)
+        with self._lock:
+            self._remember(key, expires_at, data)
+            self._count(agent, "stores")
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO agent_responses (key, agent, expires_at, data) VALUES (?, ?, ?, ?)",
+                    (key, agent, expires_at, data),
+                )
+                self._conn.execute(
+                    "DELETE FROM agent_responses WHERE expires_at <= ?", (time.time(),)
+                )
+                self._conn.commit()
+
+    def _remember(self, key: str, expires_at: float, data: str):
+        self._entries[key] = (expires_at, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM agent_responses")
+                self._conn.commit()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Entry count and per-agent hit/miss counters.
+        """
+        with self._lock:
+            agents = {}
+            for agent, stats in self._stats.items():
+                lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+                hits = lookups - stats["misses"]
+                agents[agent] = {
+                    **stats,
+                    "hit_rate": round(hits / lookups, 3) if lookups else None,
+                }
+            return {
+                "memory_entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_tier": self._conn is not None,
+                "agents": agents,
+            }
+
+
+_default_cache: Optional[AgentResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[AgentResponseCache]:
+    """
+    The process-wide cache shared by all agents, or None if disabled
+    (FITSENSE_AGENT_CACHE_ENABLED=false).
+    """
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AgentResponseCache()
+        return _default_cache
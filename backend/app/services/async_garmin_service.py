@@ -0,0 +1,587 @@
+import asyncio
+import logging
+import os
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import httpx
+from garth.auth_tokens import OAuth2Token
+from garth.http import USER_AGENT, Client
+
+try:
+    from app.models.garmin_data import GarminActivity, GarminData
+    from app.services.garmin_client_registry import GarminSession
+    from app.services.garmin_service import (
+        ACTIVITY_PAGE_SIZE,
+        DEFAULT_USER_ID,
+        GarminService,
+    )
+except ImportError:
+    # Fallback for local testing if path setup is different
+    import sys
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+    from app.models.garmin_data import GarminActivity, GarminData
+    from app.services.garmin_client_registry import GarminSession
+    from app.services.garmin_service import (
+        ACTIVITY_PAGE_SIZE,
+        DEFAULT_USER_ID,
+        GarminService,
+    )
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keep-alive pool shared by every request made through one AsyncGarminService
+HTTP_MAX_CONNECTIONS = int(os.getenv("GARMIN_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("GARMIN_HTTP_TIMEOUT_SECONDS", "10"))
+
+
+class AsyncGarminService:
+    """
+    Async variant of GarminService with the same public methods.
+    Wraps a GarminService for the per-user client registry, mocked data, parsing
+    and the local store, but performs Connect API calls over one pooled keep-alive
+    httpx.AsyncClient carrying each user's garth OAuth2 token, so Garmin I/O never
+    blocks the event loop.
+    """
+
+    def __init__(self, garmin_service: GarminService):
+        self.service = garmin_service
+        self._http: Optional[httpx.AsyncClient] = None
+        # Bounds the per-day fan-out just like the sync service's thread pool
+        self._semaphore = asyncio.Semaphore(garmin_service.fetch_concurrency)
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self.service.is_authenticated
+
+    def is_authenticated_for(self, user_id: str) -> bool:
+        return self.service.is_authenticated_for(user_id)
+
+    def has_active_session(self, user_id: str) -> bool:
+        return self.service.has_active_session(user_id)
+
+    @property
+    def store(self):
+        return self.service.store
+
+    def _get_http(self) -> httpx.AsyncClient:
+        """
+        Lazily create the pooled HTTP client for the Connect API.
+        """
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=f"https://connectapi.{Client.domain}",
+                headers=USER_AGENT,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                ),
+                timeout=HTTP_TIMEOUT_SECONDS,
+            )
+        return self._http
+
+    async def aclose(self):
+        """
+        Close the pooled HTTP client. Called on application shutdown.
+        """
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _authorization_header(self, user_id: str, session: GarminSession) -> str:
+        """
+        Return the user's OAuth2 bearer header, refreshing the token through garth if expired.
+        The refreshed token is saved to the session cache.
+        """
+        client = session.client
+        async with session.refresh_lock:
+            token = client.oauth2_token
+            if not isinstance(token, OAuth2Token) or token.expired:
+                logger.info("Refreshing Garmin OAuth2 token")
+                await asyncio.to_thread(self.service.refresh_session, user_id, session)
+        return str(client.oauth2_token)
+
+    async def _connectapi(self, user_id: str, session: GarminSession, path: str) -> Any:
+        """
+        Async equivalent of garth's Client.connectapi for the given user session.
+        Paced and retried by the shared request scheduler.
+        """
+        return await self.service.scheduler.acall(
+            user_id, self._request, user_id, session, path
+        )
+
+    async def _request(self, user_id: str, session: GarminSession, path: str) -> Any:
+        async with self._semaphore:
+            authorization = await self._authorization_header(user_id, session)
+            response = await self._get_http().get(
+                path, headers={"Authorization": authorization}
+            )
+        response.raise_for_status()
+        if response.status_code == 204:
+            return None
+        return response.json()
+
+    async def login(
+        self,
+        email: str,
+        password: str,
+        display_name: Optional[str] = None,
+        user_id: Optional[str] = None,
+        current_token: Optional[str] = None,
+    ) -> str:
+        """
+        Authenticate with Garmin Connect. The SSO handshake (or cached session
+        resume) runs in a worker thread. Returns the user token (see
+        GarminService.login).
+        """
+        return await asyncio.to_thread(
+            self.service.login, email, password, display_name, user_id, current_token
+        )
+
+    def get_oauth_url(self) -> Dict[str, str]:
+        return self.service.get_oauth_url()
+
+    def exchange_token(self, oauth_token: str, oauth_verifier: str) -> Dict[str, str]:
+        return self.service.exchange_token(oauth_token, oauth_verifier)
+
+    async def _get_session(self, user_id: str) -> Optional[GarminSession]:
+        # A registry miss may restore the session from disk, keep that off the loop
+        return await asyncio.to_thread(self.service.clients.get, user_id)
+
+    async def get_daily_summary(
+        self,
+        access_token: str,
+        access_secret: str,
+        target_date: date,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> GarminData:
+        """
+        Fetch sleep, wellness, activity for a day.
+        If the user is authenticated via garth, fetches real data. Otherwise mocks it.
+        """
+        session = await self._get_session(user_id)
+        if session is None and self.service.is_synthetic(user_id):
+            return self.service.synthetic_daily_summary(user_id, target_date)
+        if session is None:
+            return self.service.mocked_daily_summary(target_date)
+
+        return await self._get_real_daily_summary(session, target_date, user_id)
+
+    async def _get_real_daily_summary(
+        self, session: GarminSession, target_date: date, user_id: str
+    ) -> GarminData:
+        logger.info(f"Fetching REAL daily summary for {target_date} (async)")
+        try:
+            user_summary_path, sleep_path = self.service.daily_summary_paths(
+                session.display_name, target_date
+            )
+            user_summary, sleep_data = await asyncio.gather(
+                self._connectapi(user_id, session, user_summary_path),
+                self._connectapi(user_id, session, sleep_path),
+            )
+            return self.service.build_daily_summary(
+                target_date, user_summary, sleep_data
+            )
+        except Exception as e:
+            logger.error(f"Error fetching real data for {target_date}: {e}")
+            raise
+
+    async def _get_real_user_summary(
+        self, session: GarminSession, target_date: date, user_id: str
+    ) -> GarminData:
+        user_summary_path, _ = self.service.daily_summary_paths(
+            session.display_name, target_date
+        )
+        user_summary = await self._connectapi(user_id, session, user_summary_path)
+        return self.service.build_per_day_fields(target_date, user_summary)
+
+    async def get_daily_summaries(
+        self,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> List[GarminData]:
+        """
+        Fetch daily summaries for every day between start_date and end_date (inclusive),
+        returned in date order. Multi-day ranges of real data use the range endpoints,
+        see GarminService.get_daily_summaries. Days that fail are logged and skipped.
+        """
+        days = [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ]
+
+        session = await self._get_session(user_id)
+        if session is not None and len(days) > 1:
+            return await self._get_real_daily_summaries(session, days, user_id)
+        if session is None and self.service.is_synthetic(user_id):
+            return self.service.synthetic.daily_summaries(user_id, start_date, end_date)
+
+        async def fetch(target_date: date) -> Optional[GarminData]:
+            try:
+                return await self.get_daily_summary(
+                    access_token, access_secret, target_date, user_id
+                )
+            except Exception as e:
+                logger.warning(f"Failed to fetch summary for {target_date}: {e}")
+                return None
+
+        # gather preserves input order, so results stay sorted by date
+        results = await asyncio.gather(*(fetch(day) for day in days))
+        return [summary for summary in results if summary is not None]
+
+    async def _get_real_daily_summaries(
+        self, session: GarminSession, days: List[date], user_id: str
+    ) -> List[GarminData]:
+        """
+        Range endpoint queries first, per-day calls only for days they did not cover
+        and for the PER_DAY_FIELDS no range endpoint provides.
+        """
+        logger.info(
+            f"Fetching REAL daily summaries from {days[0]} to {days[-1]} (async)"
+        )
+
+        async def fetch_range(source: str, path: str) -> Tuple[str, Any]:
+            try:
+                return source, await self._connectapi(user_id, session, path)
+            except Exception as e:
+                logger.warning(f"Range query for {source} failed: {e}")
+                return source, None
+
+        responses = await asyncio.gather(
+            *(
+                fetch_range(source, path)
+                for source, path in self.service.range_requests(
+                    session.display_name, days[0], days[-1]
+                )
+            )
+        )
+        summaries, incomplete, partial = self.service.range_summaries(days, responses)
+
+        async def fetch_day(target_date: date) -> Optional[GarminData]:
+            try:
+                if target_date in incomplete:
+                    return await self._get_real_daily_summary(
+                        session, target_date, user_id
+                    )
+                return await self._get_real_user_summary(session, target_date, user_id)
+            except Exception as e:
+                logger.warning(f"Failed to fetch summary for {target_date}: {e}")
+                return None
+
+        if incomplete:
+            logger.info(f"Fetching {len(incomplete)} incomplete days one by one")
+        per_day_days = incomplete + partial
+        per_day = await asyncio.gather(*(fetch_day(day) for day in per_day_days))
+        for target_date, summary in zip(per_day_days, per_day):
+            if summary is None:
+                del summaries[target_date]
+            else:
+                summaries[target_date] = self.service.merge_summaries(
+                    summary, summaries[target_date]
+                )
+
+        return [summaries[day] for day in days if day in summaries]
+
+    async def iter_activities(
+        self,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        page_size: int = ACTIVITY_PAGE_SIZE,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> AsyncIterator[GarminActivity]:
+        """
+        Lazily yield workouts in date range, one Connect API page at a time.
+        """
+        session = await self._get_session(user_id)
+        if session is None:
+            if self.service.is_synthetic(user_id):
+                activities = self.service.synthetic.iter_activities(
+                    user_id, start_date, end_date
+                )
+            else:
+                activities = self.service.iter_mocked_activities(start_date, end_date)
+            for activity in activities:
+                yield activity
+            return
+
+        logger.info(f"Fetching REAL activities from {start_date} to {end_date} (async)")
+        start = 0
+        try:
+            while True:
+                page = await self._connectapi(
+                    user_id,
+                    session,
+                    self.service.activities_path(
+                        start_date, end_date, start, page_size
+                    ),
+                )
+                if not page:
+                    return
+
+                for act in page:
+                    yield self.service.parse_activity(act)
+
+                if len(page) < page_size:
+                    return
+                start += page_size
+
+        except Exception as e:
+            logger.error(f"Error fetching real activities: {e}")
+            raise
+
+    async def get_activities(
+        self,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> List[GarminActivity]:
+        """
+        Fetch workouts in date range.
+        """
+        return [
+            activity
+            async for activity in self.iter_activities(
+                access_token, access_secret, start_date, end_date, user_id=user_id
+            )
+        ]
+
+    async def get_raw_data(
+        self, item: Union[GarminData, GarminActivity]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the full Garmin payload behind a summary or activity, loading it lazily.
+        """
+        if item.raw_data is not None:
+            return item.raw_data
+        return await asyncio.to_thread(self.service.get_raw_data, item)
+
+    def get_body_composition(
+        self, access_token: str, access_secret: str, start_date: date, end_date: date
+    ) -> List[Dict[str, Any]]:
+        return self.service.get_body_composition(
+            access_token, access_secret, start_date, end_date
+        )
+
+    async def fetch_history(
+        self,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> Tuple[List[GarminData], List[GarminActivity]]:
+        """
+        Fetch daily summaries and activities for a date range concurrently.
+        """
+        return await asyncio.gather(
+            self.get_daily_summaries(
+                access_token, access_secret, start_date, end_date, user_id
+            ),
+            self.get_activities(
+                access_token, access_secret, start_date, end_date, user_id
+            ),
+        )
+
+    async def get_history(
+        self,
+        user_id: str,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+    ) -> Tuple[List[GarminData], List[GarminActivity]]:
+        """
+        Return daily summaries and activities for a date range.
+        Mirrors GarminService.get_history: with a local store only new days are
+        fetched from Garmin and everything else is read locally.
+        """
+        if self.store is None or not await asyncio.to_thread(
+            self.is_authenticated_for, user_id
+        ):
+            return await self.fetch_history(
+                access_token, access_secret, start_date, end_date, user_id
+            )
+
+        await self.sync_range(
+            user_id, access_token, access_secret, start_date, end_date
+        )
+        # SQLite reads are blocking, keep them off the event loop
+        return await asyncio.gather(
+            asyncio.to_thread(
+                self.store.get_daily_summaries, user_id, start_date, end_date
+            ),
+            asyncio.to_thread(self.store.get_activities, user_id, start_date, end_date),
+        )
+
+    async def sync_range(
+        self,
+        user_id: str,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+    ) -> Dict[str, int]:
+        """
+        Bring the local store up to date for a date range.
+        See GarminService.sync_range for the watermark semantics.
+        """
+        counts = {"fetched_days": 0, "fetched_activities": 0}
+        state = await asyncio.to_thread(self.store.get_sync_state, user_id)
+        first_date, watermark = state or (start_date, start_date)
+
+        if start_date < first_date:
+            missing = await self._store_range(
+                user_id,
+                access_token,
+                access_secret,
+                start_date,
+                first_date - timedelta(days=1),
+                counts,
+            )
+            first_date = max(missing) + timedelta(days=1) if missing else start_date
+
+        if end_date >= watermark:
+            missing = await self._store_range(
+                user_id, access_token, access_secret, watermark, end_date, counts
+            )
+            watermark = min(missing) if missing else end_date
+
+        await asyncio.to_thread(
+            self.store.update_sync_state, user_id, first_date, watermark
+        )
+        logger.info(
+            f"Synced store for user {user_id}: {counts['fetched_days']} days and "
+            f"{counts['fetched_activities']} activities fetched from Garmin"
+        )
+        return counts
+
+    async def _store_range(
+        self,
+        user_id: str,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        counts: Dict[str, int],
+    ) -> List[date]:
+        """
+        Fetch a date range from Garmin into the store. Returns the days that failed.
+        Activity pages are written as they arrive while the daily summaries are
+        fetched, through the same store routines as GarminService.
+        """
+        summaries, activities_count = await asyncio.gather(
+            self.get_daily_summaries(
+                access_token, access_secret, start_date, end_date, user_id
+            ),
+            self._store_activity_pages(
+                user_id, access_token, access_secret, start_date, end_date
+            ),
+        )
+        counts["fetched_days"] += await asyncio.to_thread(
+            self.service.store_daily_summaries, user_id, summaries
+        )
+        counts["fetched_activities"] += activities_count
+        return self.service.missing_days(start_date, end_date, summaries)
+
+    async def _store_activity_pages(
+        self,
+        user_id: str,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        page_size: int = ACTIVITY_PAGE_SIZE,
+    ) -> int:
+        """
+        Stream activities into the store one page at a time, so only a single page
+        is ever held in memory. Returns the number of activities written.
+        """
+        written = 0
+        page: List[GarminActivity] = []
+        async for activity in self.iter_activities(
+            access_token,
+            access_secret,
+            start_date,
+            end_date,
+            page_size=page_size,
+            user_id=user_id,
+        ):
+            page.append(activity)
+            if len(page) == page_size:
+                written += await asyncio.to_thread(
+                    self.service.store_activities, user_id, page
+                )
+                page = []
+        if page:
+            written += await asyncio.to_thread(
+                self.service.store_activities, user_id, page
+            )
+        return written
+
+    async def sync_user_data(
+        self,
+        user_id: str,
+        access_token: str = "mock_token",
+        access_secret: str = "mock_secret",
+        days_back: int = 30,
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        current_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Complete sync operation.
+        With a local store, only days after the user's watermark are fetched from Garmin.
+        A login refused by GarminService.may_login raises PermissionError.
+        """
+        user_token = None
+        if email and password:
+            try:
+                user_token = await self.login(
+                    email, password, user_id=user_id, current_token=current_token
+                )
+            except PermissionError:
+                raise
+            except Exception as e:
+                logger.error(f"Login failed during sync: {e}")
+                return {
+                    "user_id": user_id,
+                    "status": "error",
+                    "error": f"Login failed: {str(e)}",
+                }
+
+        logger.info(f"Syncing data for user {user_id} for last {days_back} days")
+
+        end_date = date.today()
+        start_date = end_date - timedelta(days=days_back)
+
+        daily_summaries, activities = await self.get_history(
+            user_id, access_token, access_secret, start_date, end_date
+        )
+
+        result = {
+            "user_id": user_id,
+            "period": f"{start_date} to {end_date}",
+            "synced_days": len(daily_summaries),
+            "activities_count": len(activities),
+            "status": "success",
+            "sample_data": {
+                "latest_summary": (
+                    daily_summaries[-1].to_record() if daily_summaries else None
+                ),
+                "latest_activity": (activities[-1].to_record() if activities else None),
+            },
+        }
+        if user_token is not None:
+            # Needed to act for this user on later requests
+            result["user_token"] = user_token
+        return result
@@ -1,75 +1,212 @@
+import asyncio
 import logging
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+from app.models.history_frame import HistoryFrame
 from app.services.ai_agents.adaptation_agent import AdaptationAgent
 from app.services.ai_agents.analysis_agent import AnalysisAgent
 from app.services.ai_agents.insights_agent import InsightsAgent
 from app.services.ai_agents.planning_agent import PlanningAgent
-from app.services.garmin_service import GarminService
+from app.services.async_garmin_service import AsyncGarminService
+from app.services.feature_extraction import build_feature_bundle
+from app.services.garmin_service import DEFAULT_USER_ID, GarminService
+from app.services.insights_analytics import find_significant_patterns
+from app.services.prefetch_scheduler import DailyPrefetcher
+from app.services.recovery_scoring import (
+    BASELINE_DAYS,
+    RECOVERY_NARRATION,
+    RecoveryAssessment,
+    RecoveryScorer,
+)
+from app.services.rolling_stats import RollingStats
+from app.services.training_load import TrainingLoadModel
+from app.services.workflow import Stage, run_stages
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Raw days still shown to the AnalysisAgent next to the feature bundle
+RECENT_DAYS_IN_CONTEXT = 3
+
+# History used to seed the training load model when none has been persisted
+# (about two fitness time constants)
+TRAINING_LOAD_HISTORY_DAYS = 84
+
 
 class CoachOrchestrator:
     """
     Orchestrator service that coordinates specialized AI agents and Garmin data
     to provide holistic coaching, planning, and insights.
+    The workflows are async (a-prefixed): they await Garmin through
+    AsyncGarminService and the agents through their async methods, so the event
+    loop stays free, and run their steps as a graph of stages (see
+    workflow.run_stages) so independent steps overlap. Scripts can drive them
+    with asyncio.run.
     """
 
-    def __init__(self, garmin_service: GarminService):
+    def __init__(
+        self,
+        garmin_service: GarminService,
+        async_garmin_service: Optional[AsyncGarminService] = None,
+        prefetcher: Optional[DailyPrefetcher] = None,
+    ):
         """
         Initialize with a GarminService instance and instantiate all agents.
+        With a prefetcher, daily guidance reads today's data from its cache when fresh.
         """
         self.garmin_service = garmin_service
+        self.async_garmin_service = async_garmin_service or AsyncGarminService(
+            garmin_service
+        )
         self.analysis_agent = AnalysisAgent()
         self.planning_agent = PlanningAgent()
         self.adaptation_agent = AdaptationAgent()
         self.insights_agent = InsightsAgent()
+        self.prefetcher = prefetcher
+        self.recovery_scorer = RecoveryScorer()
 
-    def _fetch_recent_history(
-        self, days: int
-    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    async def _afetch_recent_history(
+        self, days: int, user_id: str = DEFAULT_USER_ID
+    ) -> HistoryFrame:
         """
         Helper to fetch recent daily summaries and activities.
-        Returns: (daily_summaries, activities) as lists of dicts.
+        Reads from the local store when available, syncing only new days from Garmin.
+        Returns: a columnar HistoryFrame; summary_dicts()/activity_dicts() give the
+        list-of-dicts form the agents consume.
         """
         end_date = date.today()
         start_date = end_date - timedelta(days=days)
 
-        # Fetch activities
-        # Using dummy tokens as the service handles auth internally if logged in
-        activities_objs = self.garmin_service.get_activities(
-            "internal", "internal", start_date, end_date
+        summary_objs, activities_objs = await self.async_garmin_service.get_history(
+            user_id, "internal", "internal", start_date, end_date
+        )
+        return HistoryFrame.from_models(summary_objs, activities_objs)
+
+    async def _afetch_guidance_history(self, user_id: str) -> HistoryFrame:
+        """
+        History for daily guidance: today plus the recovery baseline window.
+        Returns an empty frame if Garmin is unavailable.
+        """
+        try:
+            return await self._afetch_recent_history(
+                days=BASELINE_DAYS, user_id=user_id
+            )
+        except Exception as e:
+            logger.error(f"Failed to fetch today's data: {e}")
+            return HistoryFrame.from_models([])
+
+    async def _aassess_recovery(
+        self,
+        history: HistoryFrame,
+        analysis_context: Dict[str, Any],
+        baselines: Optional[RollingStats],
+        as_of: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """
+        Recovery analysis in the AnalysisAgent schema.
+        Scored locally when the metrics are clear-cut; the AnalysisAgent is only
+        called when they are ambiguous (or too sparse to score), or to narrate the
+        local scores when FITSENSE_RECOVERY_NARRATION is enabled.
+        Takes the user's rolling statistics (None to compute the baselines from the
+        history) so the workflow can look them up alongside the Garmin fetch.
+        """
+        assessment = self.recovery_scorer.assess(history, as_of, baselines=baselines)
+        if not self._needs_analysis_agent(assessment):
+            return assessment.result
+
+        analysis = await self.analysis_agent.aanalyze_recovery_status(
+            self._with_local_assessment(analysis_context, assessment)
         )
-        activities = [
-            act.model_dump() if hasattr(act, "model_dump") else act.__dict__
-            for act in activities_objs
+        return self._merge_analysis(analysis, assessment)
+
+    @staticmethod
+    def _needs_analysis_agent(assessment: RecoveryAssessment) -> bool:
+        if not assessment.ambiguous and not RECOVERY_NARRATION:
+            logger.info("Recovery scored locally")
+            return False
+        logger.info("Calling AnalysisAgent...")
+        return True
+
+    @staticmethod
+    def _with_local_assessment(
+        analysis_context: Dict[str, Any], assessment: RecoveryAssessment
+    ) -> Dict[str, Any]:
+        if assessment.result is None:
+            return analysis_context
+        return {**analysis_context, "local_assessment": assessment.result}
+
+    @staticmethod
+    def _merge_analysis(
+        analysis: Dict[str, Any], assessment: RecoveryAssessment
+    ) -> Dict[str, Any]:
+        if AnalysisAgent.is_fallback(analysis) and assessment.result is not None:
+            # A failed agent call must not replace a valid local assessment
+            logger.warning("AnalysisAgent unavailable, keeping the local scores")
+            return {
+                **assessment.result,
+                "trends_identified": [
+                    *assessment.result["trends_identified"],
+                    *(f"Flag: {reason}" for reason in assessment.reasons),
+                ],
+            }
+        if not assessment.ambiguous:
+            # Narration only: keep the deterministic scores
+            for key in ("recovery_status", "recovery_score", "key_metrics_summary"):
+                analysis[key] = assessment.result[key]
+        return analysis
+
+    @staticmethod
+    def _load_snapshot(
+        model: Optional[TrainingLoadModel],
+        history: HistoryFrame,
+        as_of: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        if model is None:
+            model = TrainingLoadModel.from_history(history)
+        return model.snapshot(as_of)
+
+    def _store_stages(self, user_id: str) -> List[Stage]:
+        """
+        Stages reading the user's rolling statistics ("baselines") and training
+        load model ("load_model") from the local store. Neither needs the Garmin
+        fetch, so they run while it is in flight.
+        """
+        return [
+            Stage(
+                "baselines",
+                lambda: asyncio.to_thread(
+                    self.garmin_service.get_rolling_stats, user_id
+                ),
+            ),
+            Stage(
+                "load_model",
+                lambda: asyncio.to_thread(
+                    self.garmin_service.get_training_load, user_id
+                ),
+            ),
         ]
 
-        # Fetch daily summaries
-        daily_summaries = []
-        current = start_date
-        while current <= end_date:
-            try:
-                summary_obj = self.garmin_service.get_daily_summary(
-                    "internal", "internal", current
-                )
-                summary_dict = (
-                    summary_obj.model_dump()
-                    if hasattr(summary_obj, "model_dump")
-                    else summary_obj.__dict__
-                )
-                daily_summaries.append(summary_dict)
-            except Exception as e:
-                logger.warning(f"Could not fetch summary for {current}: {e}")
-            current += timedelta(days=1)
-
-        return daily_summaries, activities
-
-    def generate_weekly_plan(self, user_profile: Dict[str, Any]) -> Dict[str, Any]:
+    async def aget_training_load(
+        self, user_id: str = DEFAULT_USER_ID
+    ) -> Dict[str, Any]:
+        """
+        Current training load for a user.
+        Read from the incrementally maintained model when real activities have been
+        synced, otherwise built from the recent activities.
+        """
+        model = await asyncio.to_thread(self.garmin_service.get_training_load, user_id)
+        if model is None:
+            history = await self._afetch_recent_history(
+                days=TRAINING_LOAD_HISTORY_DAYS, user_id=user_id
+            )
+            model = TrainingLoadModel.from_history(history)
+        return model.snapshot()
+
+    async def agenerate_weekly_plan(
+        self, user_profile: Dict[str, Any], user_id: str = DEFAULT_USER_ID
+    ) -> Dict[str, Any]:
         """
         Generate a comprehensive weekly workout plan.
 
@@ -78,107 +215,174 @@ class CoachOrchestrator:
         """
         logger.info("Starting weekly plan generation workflow...")
 
-        # 1. Gather Context
-        recent_summaries, recent_activities = self._fetch_recent_history(days=14)
+        async def plan_week(recovery, features):
+            logger.info("Calling PlanningAgent...")
+            return await self.planning_agent.agenerate_weekly_plan(
+                user_profile=user_profile,
+                recent_workouts=[],
+                recovery_status=recovery,
+                features=features,
+            )
+
+        # The plan needs the recovery analysis, so only the store lookups overlap
+        # with the Garmin fetch here
+        results = await run_stages(
+            [
+                *self._plan_input_stages(user_id),
+                Stage("plan", plan_week, after=("recovery", "features")),
+            ],
+            workflow="weekly_plan",
+        )
 
-        # Prepare data for analysis in a consistent format
-        analysis_context = {
-            "daily_summaries": recent_summaries,
-            "activities": recent_activities,
+        return {
+            "status": "success",
+            "recovery_analysis": results["recovery"],
+            "weekly_plan": results["plan"],
         }
 
-        # 2. Analyze Recovery Status
-        logger.info("Calling AnalysisAgent...")
-        recovery_analysis = self.analysis_agent.analyze_recovery_status(
-            analysis_context
+    async def astream_weekly_plan(
+        self, user_profile: Dict[str, Any], user_id: str = DEFAULT_USER_ID
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming variant of agenerate_weekly_plan.
+        Yields ("recovery_analysis", analysis) first, then ("day", entry) for each
+        day of the plan as Gemini finishes it, and finally ("weekly_plan", plan).
+        """
+        logger.info("Starting streamed weekly plan workflow...")
+
+        results = await run_stages(
+            self._plan_input_stages(user_id), workflow="weekly_plan_inputs"
         )
+        yield "recovery_analysis", results["recovery"]
 
-        # 3. Generate Plan
-        logger.info("Calling PlanningAgent...")
-        weekly_plan = self.planning_agent.generate_weekly_plan(
+        logger.info("Streaming PlanningAgent...")
+        async for event in self.planning_agent.astream_weekly_plan(
             user_profile=user_profile,
-            recent_workouts=recent_activities,
-            recovery_status=recovery_analysis,
-        )
+            recent_workouts=[],
+            recovery_status=results["recovery"],
+            features=results["features"],
+        ):
+            yield event
 
-        return {
-            "status": "success",
-            "recovery_analysis": recovery_analysis,
-            "weekly_plan": weekly_plan,
-        }
+    def _plan_input_stages(self, user_id: str) -> List[Stage]:
+        """
+        Stages producing the PlanningAgent's inputs: the 14-day history, its
+        feature bundle ("features") and the recovery analysis ("recovery").
+        """
+
+        async def fetch_history():
+            return await self._afetch_recent_history(days=14, user_id=user_id)
+
+        async def build_features(history, load_model):
+            features = build_feature_bundle(history)
+            features["fitness_fatigue"] = self._load_snapshot(load_model, history)
+            return features
 
-    def get_daily_guidance(
-        self, scheduled_workout: Optional[Dict[str, Any]] = None
+        async def assess(history, features, baselines):
+            analysis_context = {
+                "daily_summaries": history.last(RECENT_DAYS_IN_CONTEXT).summary_dicts(),
+                "features": features,
+            }
+            return await self._aassess_recovery(history, analysis_context, baselines)
+
+        return [
+            Stage("history", fetch_history),
+            *self._store_stages(user_id),
+            Stage("features", build_features, after=("history", "load_model")),
+            Stage("recovery", assess, after=("history", "features", "baselines")),
+        ]
+
+    async def aget_daily_guidance(
+        self,
+        scheduled_workout: Optional[Dict[str, Any]] = None,
+        user_id: str = DEFAULT_USER_ID,
     ) -> Dict[str, Any]:
         """
         Get guidance for today. If a workout is scheduled, adapt it based on recovery.
+        Uses the prefetcher's cache when fresh, otherwise fetches the history.
         """
         logger.info("Generating daily guidance...")
-
         today = date.today()
 
-        # 1. Get today's recovery metrics
-        try:
-            todays_data_obj = self.garmin_service.get_daily_summary(
-                "internal", "internal", today
-            )
-            todays_data = (
-                todays_data_obj.model_dump()
-                if hasattr(todays_data_obj, "model_dump")
-                else todays_data_obj.__dict__
-            )
-        except Exception as e:
-            logger.error(f"Failed to fetch today's data: {e}")
-            todays_data = {}
+        async def fetch_history():
+            prefetched = self.prefetcher.get(user_id) if self.prefetcher else None
+            if prefetched is not None:
+                logger.info("Using prefetched Garmin data")
+                return prefetched.history
+            history = await self._afetch_guidance_history(user_id)
+            if self.prefetcher:
+                # Keep this user's data warm for the next request
+                self.prefetcher.register(user_id)
+            return history
 
-        # 2. Analyze Current Status
-        # Pass today's data in the same format the agent expects for weekly plans
-        analysis_context = {
-            "daily_summaries": [todays_data] if todays_data else [],
-            "activities": [],
-        }
-        analysis_result = self.analysis_agent.analyze_recovery_status(analysis_context)
+        async def build_features(history):
+            return build_feature_bundle(history, as_of=today)
 
-        response = {
-            "date": str(today),
-            "recovery_status": analysis_result,
-            "guidance_type": "general",
-        }
+        async def assess(history, features, baselines):
+            analysis_context = {
+                "daily_summaries": history.slice(today, today).summary_dicts(),
+                "features": features,
+            }
+            return await self._aassess_recovery(
+                history, analysis_context, baselines, as_of=today
+            )
 
-        # 3. Adapt Workout (if scheduled)
-        if scheduled_workout:
+        async def adapt(history, features, load_model):
             logger.info("Adapting scheduled workout...")
-
-            # Fetch very recent load (last 7 days) for adaptation context
-            _, recent_activities = self._fetch_recent_history(days=7)
-
-            adaptation_result = self.adaptation_agent.adapt_workout(
+            todays_rows = history.slice(today, today).summary_dicts()
+            return await self.adaptation_agent.aadapt_workout(
                 scheduled_workout=scheduled_workout,
-                today_recovery=todays_data,
+                today_recovery=todays_rows[0] if todays_rows else {},
                 recent_training_load={
-                    "recent_activities_count": len(recent_activities)
+                    **self._load_snapshot(load_model, history, as_of=today),
+                    "sessions_7d": features["training_load"]["sessions_7d"],
                 },
             )
 
+        stages = [
+            Stage("history", fetch_history),
+            *self._store_stages(user_id),
+            Stage("features", build_features, after=("history",)),
+            Stage("recovery", assess, after=("history", "features", "baselines")),
+        ]
+        if scheduled_workout:
+            # Adaptation works from today's raw metrics and the training load, not
+            # the recovery analysis, so both agents run side by side
+            stages.append(
+                Stage("adaptation", adapt, after=("history", "features", "load_model"))
+            )
+        results = await run_stages(stages, workflow="daily_guidance")
+
+        response = {
+            "date": str(today),
+            "recovery_status": results["recovery"],
+            "guidance_type": "general",
+        }
+        if scheduled_workout:
             response["guidance_type"] = "workout_adaptation"
-            response["adaptation"] = adaptation_result
+            response["adaptation"] = results["adaptation"]
 
         return response
 
-    def get_insights(self, days_back: int = 30) -> Dict[str, Any]:
+    async def aget_insights(
+        self, days_back: int = 30, user_id: str = DEFAULT_USER_ID
+    ) -> Dict[str, Any]:
         """
         Generate long-term insights based on historical data.
         """
         logger.info(f"Generating insights for last {days_back} days...")
 
-        # 1. Fetch History
-        summaries, activities = self._fetch_recent_history(days=days_back)
+        history = await self._afetch_recent_history(days=days_back, user_id=user_id)
 
-        # 2. Generate Insights
-        insights_context = {"daily_summaries": summaries, "activities": activities}
-        insights_result = self.insights_agent.generate_insights(
-            historical_data=[insights_context],
+        return await self.insights_agent.agenerate_insights(
+            historical_data=[self._insights_context(history)],
             timeframe=f"Last {days_back} days",
         )
 
-        return insights_result
+    @staticmethod
+    def _insights_context(history: HistoryFrame) -> Dict[str, Any]:
+        # Patterns are found locally; the agent only phrases the significant ones
+        return {
+            "findings": find_significant_patterns(history),
+            "weekly_trend": build_feature_bundle(history)["weekly_trend"],
+        }
@@ -3,7 +3,7 @@ import logging
 import os
 from typing import Any, Dict, Optional, Union
 
-import google.generativeai as genai
+from app.services.ai_agents.gemini_client import configure_genai, get_model
 from opik.evaluation.metrics import BaseMetric
 from opik.evaluation.metrics.score_result import ScoreResult
 
@@ -21,19 +21,16 @@ class BaseGeminiMetric(BaseMetric):
         super().__init__(name=name)
         self.model_name = os.getenv("GEMINI_MODEL", model)
 
-        # Ensure GenAI is configured
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
+        # Ensure GenAI is configured (once per process, shared with the agents)
+        if not configure_genai():
             logger.warning("GEMINI_API_KEY not found. Evaluation metrics may fail.")
-        else:
-            genai.configure(api_key=api_key)
 
     def _call_gemini(self, prompt: str) -> str:
         """
         Helper to call Gemini with the evaluation prompt.
         """
         try:
-            model = genai.GenerativeModel(self.model_name)
+            model = get_model(self.model_name)
             response = model.generate_content(prompt)
             return response.text
         except Exception as e:
@@ -0,0 +1,197 @@
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.models.history_frame import HistoryFrame
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump whenever keys or semantics of the bundle change, so prompts and caches can tell
+FEATURE_VERSION = "1"
+
+FEATURE_METRICS = (
+    "resting_heart_rate",
+    "hrv",
+    "stress_score",
+    "steps",
+    "total_sleep_minutes",
+)
+# Number of recent hard sessions listed in the bundle
+HARD_SESSION_COUNT = 5
+# Weekly means included for trend spotting, independent of the window length
+MAX_TREND_WEEKS = 12
+
+# A session is "hard" above these training effects, or above this share of peak HR
+HARD_AEROBIC_EFFECT = 3.0
+HARD_ANAEROBIC_EFFECT = 2.0
+HARD_HR_FRACTION = 0.8
+
+
+def _mean(history: HistoryFrame, name: str) -> Optional[float]:
+    values = history.values[name][history.masks[name]]
+    return round(float(values.mean()), 1) if len(values) else None
+
+
+def _delta(value: Optional[float], baseline: Optional[float]) -> Optional[float]:
+    if value is None or baseline is None:
+        return None
+    return round(value - baseline, 1)
+
+
+def build_feature_bundle(
+    history: HistoryFrame, as_of: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    Compact, versioned summary of a user's history for the agents.
+    Its size depends only on the number of metrics, hard sessions and trend weeks,
+    not on how many days of history went in.
+    """
+    if as_of is None:
+        as_of = history.dates[-1].astype(object) if len(history) else date.today()
+
+    last_7 = history.last(7, as_of)
+    last_28 = history.last(28, as_of)
+
+    today = last_7.slice(as_of, as_of)
+    metrics = {}
+    for name in FEATURE_METRICS:
+        latest = (
+            float(today.values[name][0])
+            if len(today) and today.masks[name][0]
+            else None
+        )
+        mean_7d, mean_28d = _mean(last_7, name), _mean(last_28, name)
+        metrics[name] = {
+            "latest": latest,
+            "mean_7d": mean_7d,
+            "mean_28d": mean_28d,
+            "latest_vs_28d": _delta(latest, mean_28d),
+            "7d_vs_28d": _delta(mean_7d, mean_28d),
+        }
+
+    return {
+        "feature_version": FEATURE_VERSION,
+        "as_of": as_of.isoformat(),
+        "days_covered": len(history),
+        "activities_covered": history.num_activities,
+        "metrics": metrics,
+        "training_load": _training_load(last_7, last_28),
+        "streaks": _streaks(history, as_of),
+        "recent_hard_sessions": _hard_sessions(history, HARD_SESSION_COUNT),
+        "weekly_trend": _weekly_trend(history, as_of),
+    }
+
+
+def _training_load(last_7: HistoryFrame, last_28: HistoryFrame) -> Dict[str, Any]:
+    """
+    Session counts, minutes and the acute:chronic workload ratio (7-day load
+    against the 28-day weekly average), using duration as the load unit.
+    """
+    acute = float(
+        np.where(
+            last_7.activity_masks["duration_minutes"],
+            last_7.activity_values["duration_minutes"],
+            0.0,
+        ).sum()
+    )
+    chronic_total = float(
+        np.where(
+            last_28.activity_masks["duration_minutes"],
+            last_28.activity_values["duration_minutes"],
+            0.0,
+        ).sum()
+    )
+    chronic_weekly = chronic_total / 4
+    types, counts = np.unique(last_7.activity_type, return_counts=True)
+    return {
+        "sessions_7d": last_7.num_activities,
+        "sessions_28d": last_28.num_activities,
+        "minutes_7d": round(acute),
+        "weekly_minutes_28d": round(chronic_weekly),
+        "acwr": round(acute / chronic_weekly, 2) if chronic_weekly else None,
+        "sessions_by_type_7d": {
+            str(kind): int(count) for kind, count in zip(types, counts)
+        },
+    }
+
+
+def _streaks(history: HistoryFrame, as_of: date) -> Dict[str, int]:
+    """
+    Consecutive training days up to as_of, and days since the last activity.
+    """
+    activity_days = np.unique(history.activity_start.astype("datetime64[D]"))
+    offsets = (np.datetime64(as_of, "D") - activity_days).astype(int)
+    offsets = np.sort(offsets[offsets >= 0])
+    if not len(offsets):
+        return {"training_days": 0, "days_since_last_activity": len(history)}
+
+    # Offsets 0, 1, 2, ... with no gap form the current training streak
+    contiguous = offsets == np.arange(len(offsets))
+    streak = int(np.argmin(contiguous)) if not contiguous.all() else len(offsets)
+    return {
+        "training_days": streak if offsets[0] == 0 else 0,
+        "days_since_last_activity": int(offsets[0]),
+    }
+
+
+def _hard_sessions(history: HistoryFrame, count: int) -> List[Dict[str, Any]]:
+    """
+    The most recent sessions with a high training effect or heart rate.
+    """
+    if not history.num_activities:
+        return []
+
+    values, masks = history.activity_values, history.activity_masks
+    hard = masks["aerobic_training_effect"] & (
+        values["aerobic_training_effect"] >= HARD_AEROBIC_EFFECT
+    )
+    hard |= masks["anaerobic_training_effect"] & (
+        values["anaerobic_training_effect"] >= HARD_ANAEROBIC_EFFECT
+    )
+    if masks["max_hr"].any():
+        peak_hr = values["max_hr"][masks["max_hr"]].max()
+        hard |= masks["avg_hr"] & (values["avg_hr"] >= HARD_HR_FRACTION * peak_hr)
+
+    sessions = []
+    for index in np.flatnonzero(hard)[-count:]:
+        sessions.append(
+            {
+                "date": str(history.activity_start[index].astype("datetime64[D]")),
+                "activity_type": str(history.activity_type[index]),
+                "duration_minutes": round(float(values["duration_minutes"][index])),
+                "avg_hr": (
+                    int(values["avg_hr"][index]) if masks["avg_hr"][index] else None
+                ),
+                "aerobic_training_effect": (
+                    float(values["aerobic_training_effect"][index])
+                    if masks["aerobic_training_effect"][index]
+                    else None
+                ),
+            }
+        )
+    return sessions
+
+
+def _weekly_trend(history: HistoryFrame, as_of: date) -> List[Dict[str, Any]]:
+    """
+    Per-week means of each metric for up to MAX_TREND_WEEKS weeks ending at as_of,
+    oldest first.
+    """
+    weeks = []
+    for week in range(min(MAX_TREND_WEEKS, (len(history) + 6) // 7)):
+        week_end = as_of - timedelta(days=7 * week)
+        window = history.last(7, week_end)
+        if not len(window):
+            continue
+        weeks.append(
+            {
+                "week_ending": week_end.isoformat(),
+                **{name: _mean(window, name) for name in FEATURE_METRICS},
+                "sessions": window.num_activities,
+            }
+        )
+    return weeks[::-1]
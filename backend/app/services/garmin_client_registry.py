@@ -0,0 +1,132 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+from garth.http import Client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CLIENTS = int(os.getenv("GARMIN_MAX_CLIENTS", "256"))
+DEFAULT_CLIENT_IDLE_SECONDS = float(os.getenv("GARMIN_CLIENT_IDLE_SECONDS", "3600"))
+
+# Set by GarminClientRegistry.untouched() for background work such as prefetching.
+# A context variable, so it follows the work into child tasks and asyncio.to_thread.
+_untouched = contextvars.ContextVar("garmin_registry_untouched", default=False)
+
+
+@dataclass
+class GarminSession:
+    """
+    An authenticated garth client for a single user.
+    """
+
+    client: Client
+    display_name: Optional[str] = None
+    # SHA-256 of the user token issued at login (see GarminService.authorize)
+    token_hash: Optional[str] = None
+    last_used: float = field(default_factory=time.monotonic)
+    # Serializes OAuth2 refreshes done by the async service for this user
+    refresh_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class GarminClientRegistry:
+    """
+    Registry of isolated garth clients keyed by user id.
+    Bounded by max_size with least-recently-used eviction, and sessions idle for
+    longer than idle_seconds expire. On a miss, the optional loader is asked to
+    restore the session (e.g. from the on-disk session cache).
+    Lookups made inside untouched() do neither, so background polling does not
+    keep idle sessions alive.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_CLIENTS,
+        idle_seconds: float = DEFAULT_CLIENT_IDLE_SECONDS,
+        loader: Optional[Callable[[str], Optional[GarminSession]]] = None,
+    ):
+        self.max_size = max(1, max_size)
+        self.idle_seconds = idle_seconds
+        self.loader = loader
+        self._sessions: "OrderedDict[str, GarminSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[GarminSession]:
+        """
+        Return the session for user_id and mark it as recently used, or None.
+        """
+        now = time.monotonic()
+        untouched = _untouched.get()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(user_id)
+            if session is not None:
+                if not untouched:
+                    session.last_used = now
+                    self._sessions.move_to_end(user_id)
+                return session
+
+        if self.loader is None or untouched:
+            return None
+
+        session = self.loader(user_id)
+        if session is not None:
+            self.put(user_id, session)
+        return session
+
+    def put(self, user_id: str, session: GarminSession):
+        """
+        Register (or replace) the session for user_id, evicting the LRU entry if full.
+        """
+        session.last_used = time.monotonic()
+        with self._lock:
+            self._sessions[user_id] = session
+            self._sessions.move_to_end(user_id)
+            while len(self._sessions) > self.max_size:
+                evicted_id, _ = self._sessions.popitem(last=False)
+                logger.info(f"Evicted Garmin client for user {evicted_id} (LRU)")
+
+    @staticmethod
+    @contextmanager
+    def untouched() -> Iterator[None]:
+        """
+        Within this block (including tasks and threads started from it), get()
+        neither marks sessions as used nor restores missing ones.
+        """
+        token = _untouched.set(True)
+        try:
+            yield
+        finally:
+            _untouched.reset(token)
+
+    def remove(self, user_id: str):
+        with self._lock:
+            self._sessions.pop(user_id, None)
+
+    def __contains__(self, user_id: str) -> bool:
+        with self._lock:
+            self._expire(time.monotonic())
+            return user_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._sessions)
+
+    def _expire(self, now: float):
+        # Entries are kept in recency order, so idle ones are at the front
+        while self._sessions:
+            user_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_seconds:
+                return
+            self._sessions.popitem(last=False)
+            logger.info(f"Expired idle Garmin client for user {user_id}")
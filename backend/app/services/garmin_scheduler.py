@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+import requests
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Global pacing across all accounts (requests per second / burst size)
+GLOBAL_RATE = float(os.getenv("GARMIN_GLOBAL_RATE", "10"))
+GLOBAL_BURST = float(os.getenv("GARMIN_GLOBAL_BURST", "20"))
+# Pacing per Garmin account
+ACCOUNT_RATE = float(os.getenv("GARMIN_ACCOUNT_RATE", "3"))
+ACCOUNT_BURST = float(os.getenv("GARMIN_ACCOUNT_BURST", "10"))
+
+MAX_RETRIES = int(os.getenv("GARMIN_MAX_RETRIES", "4"))
+BACKOFF_BASE_SECONDS = float(os.getenv("GARMIN_BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("GARMIN_BACKOFF_MAX_SECONDS", "30"))
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class GarminThrottledError(Exception):
+    """
+    Garmin asked (via Retry-After) for a longer pause than BACKOFF_MAX_SECONDS.
+    Raised instead of holding the caller for that long.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            f"Garmin is throttling requests, retry after {retry_after:.0f}s"
+        )
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers reserve a token and get back how long they
+    must wait before using it, so the same bucket serves sync and async callers.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take one token. Returns the delay in seconds until it is actually available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # Tokens may go negative: later callers queue up behind earlier ones
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class SchedulerMetrics:
+    """
+    Counters for Garmin calls made through the scheduler, including queue wait time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled = 0
+        self.waits = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.calls += 1
+            if seconds > 0:
+                self.waits += 1
+                self.total_wait_seconds += seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_retry(self, status: Optional[int]):
+        with self._lock:
+            self.retries += 1
+            if status == 429:
+                self.throttled += 1
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "throttled": self.throttled,
+                "queued_calls": self.waits,
+                "avg_queue_wait_seconds": (
+                    self.total_wait_seconds / self.calls if self.calls else 0.0
+                ),
+                "max_queue_wait_seconds": self.max_wait_seconds,
+            }
+
+
+class GarminRequestScheduler:
+    """
+    Shared scheduler wrapping every Garmin Connect call.
+
+    - Paces calls with a global token bucket and one token bucket per account.
+    - Retries transient failures (429, 5xx, timeouts, connection errors) with
+      jittered exponential backoff, honoring Retry-After when Garmin sends it
+      (up to BACKOFF_MAX_SECONDS; longer requests fail fast with
+      GarminThrottledError).
+    - Adapts the global rate: it is halved on every 429 and creeps back up
+      towards the configured rate on success (AIMD), so throughput settles at
+      what Garmin tolerates instead of cascading into more throttling.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = GLOBAL_RATE,
+        global_burst: float = GLOBAL_BURST,
+        account_rate: float = ACCOUNT_RATE,
+        account_burst: float = ACCOUNT_BURST,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.max_global_rate = global_rate
+        self.min_global_rate = max(global_rate / 16, 0.1)
+        self.account_rate = account_rate
+        self.account_burst = account_burst
+        self.max_retries = max_retries
+        self.metrics = SchedulerMetrics()
+
+        self._global_bucket = TokenBucket(global_rate, global_burst)
+        self._account_buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _account_bucket(self, account: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._account_buckets.get(account)
+            if bucket is None:
+                bucket = TokenBucket(self.account_rate, self.account_burst)
+                self._account_buckets[account] = bucket
+            return bucket
+
+    def _reserve(self, account: str) -> float:
+        wait = max(
+            self._global_bucket.reserve(), self._account_bucket(account).reserve()
+        )
+        self.metrics.record_wait(wait)
+        return wait
+
+    def call(self, account: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking Garmin call under the scheduler's pacing and retry policy.
+        """
+        attempt = 0
+        while True:
+            wait = self._reserve(account)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._handle_error(e, attempt)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._on_success()
+            return result
+
+    async def acall(
+        self, account: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs
+    ) -> Any:
+        """
+        Async variant of call for coroutine functions.
+        """
+        attempt = 0
+        while True:
+            wait = self._reserve(account)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._handle_error(e, attempt)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._on_success()
+            return result
+
+    def _handle_error(self, error: Exception, attempt: int) -> float:
+        """
+        Decide whether to retry. Returns the backoff delay, or re-raises the error.
+        """
+        retryable, status, retry_after = _classify_error(error)
+        if not retryable or attempt >= self.max_retries:
+            self.metrics.record_failure()
+            raise error
+
+        if status == 429:
+            self._on_throttled()
+        if retry_after is not None and retry_after > BACKOFF_MAX_SECONDS:
+            # Sleeping would hold a request thread or coroutine for that long
+            self.metrics.record_failure()
+            raise GarminThrottledError(retry_after) from error
+        self.metrics.record_retry(status)
+
+        # Full jitter: spread retries so throttled callers don't come back in lockstep
+        backoff = random.uniform(
+            0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+        )
+        delay = max(backoff, retry_after or 0.0)
+        logger.warning(
+            f"Garmin call failed ({status or type(error).__name__}), "
+            f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+        )
+        return delay
+
+    def _on_throttled(self):
+        bucket = self._global_bucket
+        with bucket._lock:
+            bucket.rate = max(self.min_global_rate, bucket.rate / 2)
+        logger.warning(f"Garmin throttling, global rate lowered to {bucket.rate:.2f}/s")
+
+    def _on_success(self):
+        bucket = self._global_bucket
+        if bucket.rate < self.max_global_rate:
+            with bucket._lock:
+                bucket.rate = min(
+                    self.max_global_rate, bucket.rate + self.max_global_rate / 100
+                )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current metrics plus the effective global rate.
+        """
+        return {
+            **self.metrics.snapshot(),
+            "global_rate": self._global_bucket.rate,
+            "tracked_accounts": len(self._account_buckets),
+        }
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _classify_error(error: Exception) -> Tuple[bool, Optional[int], Optional[float]]:
+    """
+    Return (retryable, status code, Retry-After seconds) for a failed Garmin call.
+    Handles garth (requests) and httpx errors.
+    """
+    response = None
+    if isinstance(error, httpx.HTTPStatusError):
+        response = error.response
+    elif isinstance(error, requests.HTTPError):
+        response = error.response
+    elif isinstance(getattr(error, "error", None), requests.HTTPError):
+        # garth wraps requests errors in GarthHTTPError(error=...)
+        response = error.error.response
+
+    if response is not None:
+        status = response.status_code
+        retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+        return status in RETRYABLE_STATUS, status, retry_after
+
+    if isinstance(
+        error,
+        (
+            requests.ConnectionError,
+            requests.Timeout,
+            httpx.TimeoutException,
+            httpx.NetworkError,
+        ),
+    ):
+        return True, None, None
+
+    return False, None, None
@@ -1,31 +1,108 @@
+import hashlib
+import hmac
 import json
 import logging
+import secrets
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
-import garth
+from garth.http import Client
 from pydantic import ValidationError
 
 # Assuming running from backend/ directory as root, or app installed as package
 try:
     from app.models.garmin_data import GarminActivity, GarminData
+    from app.services.garmin_client_registry import GarminClientRegistry, GarminSession
+    from app.services.garmin_scheduler import GarminRequestScheduler
+    from app.services.garmin_session_cache import GarminSessionCache
+    from app.services.garmin_store import GarminStore
+    from app.services.rolling_stats import RollingStats
+    from app.services.synthetic_data import SyntheticPopulation
+    from app.services.training_load import TrainingLoadModel
 except ImportError:
     # Fallback for local testing if path setup is different
-    import os
     import sys
 
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
     from app.models.garmin_data import GarminActivity, GarminData
+    from app.services.garmin_client_registry import GarminClientRegistry, GarminSession
+    from app.services.garmin_scheduler import GarminRequestScheduler
+    from app.services.garmin_session_cache import GarminSessionCache
+    from app.services.garmin_store import GarminStore
+    from app.services.rolling_stats import RollingStats
+    from app.services.synthetic_data import SyntheticPopulation
+    from app.services.training_load import TrainingLoadModel
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Maximum number of Garmin requests in flight at once per service instance
+DEFAULT_FETCH_CONCURRENCY = int(os.getenv("GARMIN_FETCH_CONCURRENCY", "8"))
+
+# Page size used when walking Garmin's activity search cursor
+ACTIVITY_PAGE_SIZE = int(os.getenv("GARMIN_ACTIVITY_PAGE_SIZE", "100"))
+
+# User id used when a caller does not specify one (e.g. the account configured in .env)
+DEFAULT_USER_ID = "default"
+
+# Garmin's range (stats) endpoints return at most this many days per request
+RANGE_PAGE_DAYS = 28
+
+# Range endpoint fields, as (GarminData field, response key, divisor) per source
+_RANGE_FIELDS = {
+    "sleep": [
+        ("sleep_score", "sleepScore", 1),
+        ("total_sleep_minutes", "totalSleepTimeInSeconds", 60),
+        ("deep_sleep_minutes", "deepTime", 60),
+        ("light_sleep_minutes", "lightTime", 60),
+        ("rem_sleep_minutes", "remTime", 60),
+        ("awake_minutes", "awakeTime", 60),
+    ],
+    "hrv": [("hrv", "lastNightAvg", 1)],
+    "resting_heart_rate": [("resting_heart_rate", "value", 1)],
+    "stress": [("stress_score", "overallStressLevel", 1)],
+    "steps": [("steps", "totalSteps", 1)],
+    # Intensity minutes (moderate + vigorous) stand in for active minutes
+    "intensity_minutes": [
+        ("active_minutes", "moderateValue", 1),
+        ("active_minutes", "vigorousValue", 1),
+    ],
+}
+
+# Core fields; a day is fetched with per-day calls when a range source for any of
+# them failed or returned no entry for it. Days reported with null values are
+# kept as they are, since the per-day endpoints have no more data for them.
+RANGE_CORE_FIELDS = (
+    "sleep_score",
+    "total_sleep_minutes",
+    "resting_heart_rate",
+    "stress_score",
+    "steps",
+)
+
+# Fields no range endpoint provides. Days covered by every core source still fetch
+# the per-day user summary for these, but skip the per-day sleep call.
+PER_DAY_FIELDS = ("calories_burned",)
+
+# Range sources providing the core fields
+_RANGE_CORE_SOURCES = tuple(
+    source
+    for source, fields in _RANGE_FIELDS.items()
+    if any(field in RANGE_CORE_FIELDS for field, _, _ in fields)
+)
+
 
 class GarminService:
     """
     Service to handle interactions with Garmin API using 'garth' library.
     Capable of using both mocked data (for testing) and real data (if credentials provided).
+    Each user gets an isolated garth client from the client registry, so fetches for
+    different users can run in parallel; users without a session get mocked data.
     """
 
     def __init__(
@@ -33,48 +110,220 @@ class GarminService:
         email: Optional[str] = None,
         password: Optional[str] = None,
         display_name: Optional[str] = None,
+        fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+        store: Optional[GarminStore] = None,
+        session_cache: Optional[GarminSessionCache] = None,
+        clients: Optional[GarminClientRegistry] = None,
+        scheduler: Optional[GarminRequestScheduler] = None,
+        synthetic: Optional[SyntheticPopulation] = None,
     ):
-        self.client = None
-        self.is_authenticated = False
-        self.display_name = display_name
+        # Optional local store; when set, real Garmin data is synced incrementally
+        self.store = store
+
+        # Optional token cache; when set, logins resume saved sessions instead of SSO
+        self.session_cache = session_cache
+
+        # Per-user garth clients; evicted sessions are restored from the session cache
+        self.clients = clients if clients is not None else GarminClientRegistry()
+        if self.clients.loader is None:
+            self.clients.loader = self._restore_session
+
+        # Paces and retries every Connect API call, shared with the async service
+        self.scheduler = scheduler or GarminRequestScheduler()
+
+        # Optional generated population; its users are served instead of the mock data
+        self.synthetic = synthetic
+
+        # Per-user rolling baselines, updated as new days are stored
+        self._rolling_stats: Dict[str, RollingStats] = {}
+        self._rolling_stats_lock = threading.Lock()
+
+        # Per-user fitness-fatigue models, updated as new activities are stored
+        self._training_load: Dict[str, TrainingLoadModel] = {}
+        self._training_load_lock = threading.Lock()
+
+        # Shared pool bounding the fan-out of per-day Garmin requests
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.fetch_concurrency, thread_name_prefix="garmin-fetch"
+        )
 
         if email and password:
             self.login(email, password, display_name)
 
-    def login(self, email: str, password: str, display_name: Optional[str] = None):
+    @property
+    def is_authenticated(self) -> bool:
+        """
+        Whether the default user has a Garmin session.
+        """
+        return self.is_authenticated_for(DEFAULT_USER_ID)
+
+    def is_authenticated_for(self, user_id: str) -> bool:
+        return self.clients.get(user_id) is not None
+
+    def has_active_session(self, user_id: str) -> bool:
+        """
+        Whether the user has a live session in memory. Unlike is_authenticated_for,
+        this neither marks the session as used nor restores it from the cache.
+        """
+        return user_id in self.clients
+
+    @staticmethod
+    def _new_client() -> Client:
+        """
+        Create a garth client for one user. garth's own urllib3 retries are disabled
+        so the request scheduler is the single place where Garmin calls are retried.
+        """
+        client = Client()
+        client.configure(retries=0, status_forcelist=())
+        return client
+
+    def _restore_session(self, user_id: str) -> Optional[GarminSession]:
+        """
+        Registry loader: rebuild an evicted user's client from the session cache.
+        Users without a cached session (mock and synthetic users) return before a
+        garth client is built.
+        """
+        if self.session_cache is None or not self.session_cache.contains(user_id):
+            return None
+
+        client = self._new_client()
+        cached = self.session_cache.resume(user_id, client)
+        if cached is None:
+            return None
+        return GarminSession(
+            client=client,
+            display_name=cached.get("display_name"),
+            token_hash=cached.get("token_hash"),
+        )
+
+    @staticmethod
+    def _hash_user_token(user_token: str) -> str:
+        return hashlib.sha256(user_token.encode()).hexdigest()
+
+    def authorize(self, user_id: str, user_token: Optional[str]) -> bool:
+        """
+        Whether a caller may act for user_id.
+        The default user (the account configured for this server) and users without
+        a Garmin session (mock or synthetic data) are open. Any other user's Garmin
+        session is only available with the user token returned by their login.
+        """
+        if user_id == DEFAULT_USER_ID:
+            return True
+        session = self.clients.get(user_id)
+        if session is None:
+            return True
+        if not user_token or session.token_hash is None:
+            return False
+        return hmac.compare_digest(
+            session.token_hash, self._hash_user_token(user_token)
+        )
+
+    def may_login(
+        self,
+        user_id: str,
+        email: str,
+        password: str,
+        user_token: Optional[str] = None,
+    ) -> bool:
+        """
+        Whether a login may bind user_id to the Garmin account of these credentials.
+        Open wherever authorize is (including users without a session); an existing
+        user's session can otherwise only be renewed with the credentials it was
+        cached with, so one account cannot take over another user's id.
+        """
+        if self.authorize(user_id, user_token):
+            return True
+        return self.session_cache is not None and self.session_cache.matches(
+            user_id, email, password
+        )
+
+    def refresh_session(self, user_id: str, session: GarminSession):
+        """
+        Refresh the user's OAuth2 token and write it back to the session cache, so a
+        session resumed after a restart or registry eviction starts from the new token.
+        """
+        session.client.refresh_oauth2()
+        if self.session_cache is not None:
+            self.session_cache.update_tokens(user_id, session.client)
+
+    def login(
+        self,
+        email: str,
+        password: str,
+        display_name: Optional[str] = None,
+        user_id: Optional[str] = None,
+        current_token: Optional[str] = None,
+    ) -> str:
         """
         Authenticate with Garmin Connect using email and password.
         Uses garth library which handles the unofficial API authentication.
+        The session is stored in a dedicated garth client for user_id (the default
+        user if omitted). With a session cache, a saved session for this user is
+        resumed and refreshed instead, and the full SSO login only runs when that fails.
+        Returns a new user token, which callers must present to act for a
+        non-default user (see authorize); earlier tokens stop working.
+        Raises PermissionError when user_id already has a session for other
+        credentials and current_token is not that user's token (see may_login).
         """
+        user_id = user_id or DEFAULT_USER_ID
+        if not self.may_login(user_id, email, password, current_token):
+            raise PermissionError(
+                f"User {user_id} is linked to another Garmin account; "
+                "their current user token is required to replace it"
+            )
+        user_token = secrets.token_urlsafe(32)
+        token_hash = self._hash_user_token(user_token)
         try:
-            # garth.login handles session creation and saves it globally in garth.client
-            garth.login(email, password)
-            self.client = garth.client
+            client = self._new_client()
+            cached = None
+            if self.session_cache:
+                cached = self.session_cache.resume(user_id, client, email, password)
+
+            if cached is None:
+                client.login(email, password)
 
             if display_name:
-                self.display_name = display_name
-                logger.info(f"Using provided display name: {self.display_name}")
+                logger.info(f"Using provided display name: {display_name}")
+            elif cached and cached.get("display_name"):
+                display_name = cached["display_name"]
             else:
-                self.display_name = self.client.username
+                display_name = client.username
                 # If username is an email, try to fetch the actual display name
-                if "@" in self.display_name:
+                if "@" in display_name:
                     try:
-                        profile = self.client.connectapi(
-                            "/userprofile-service/socialProfile"
+                        profile = self.scheduler.call(
+                            user_id,
+                            client.connectapi,
+                            "/userprofile-service/socialProfile",
                         )
                         if profile and "displayName" in profile:
-                            self.display_name = profile["displayName"]
-                            logger.info(
-                                f"Resolved Garmin display name: {self.display_name}"
-                            )
+                            display_name = profile["displayName"]
+                            logger.info(f"Resolved Garmin display name: {display_name}")
                     except Exception as e:
                         logger.warning(f"Could not resolve Garmin display name: {e}")
                         logger.warning(
                             "Please provide GARMIN_DISPLAY_NAME in .env file"
                         )
 
-            self.is_authenticated = True
-            logger.info(f"Successfully logged in as {email}")
+            if self.session_cache and cached is None:
+                self.session_cache.save(
+                    user_id, client, email, password, display_name, token_hash
+                )
+            elif self.session_cache:
+                self.session_cache.set_token_hash(user_id, token_hash)
+
+            self.clients.put(
+                user_id,
+                GarminSession(
+                    client=client, display_name=display_name, token_hash=token_hash
+                ),
+            )
+            logger.info(
+                f"Successfully logged in as {email} for user {user_id}"
+                + (" (resumed cached session)" if cached is not None else "")
+            )
+            return user_token
         except Exception as e:
             logger.error(f"Failed to login to Garmin: {e}")
             raise
@@ -105,64 +354,568 @@ class GarminService:
         }
 
     def get_daily_summary(
-        self, access_token: str, access_secret: str, target_date: date
+        self,
+        access_token: str,
+        access_secret: str,
+        target_date: date,
+        user_id: str = DEFAULT_USER_ID,
     ) -> GarminData:
         """
         Fetch sleep, wellness, activity for a day.
-        If authenticated via garth, fetches real data. Otherwise mocks it.
+        If the user is authenticated via garth, fetches real data. Otherwise mocks it.
         """
-        if self.is_authenticated:
-            return self._get_real_daily_summary(target_date)
+        session = self.clients.get(user_id)
+        if session is not None:
+            return self._get_real_daily_summary(session, target_date, user_id)
+        if self.is_synthetic(user_id):
+            return self.synthetic_daily_summary(user_id, target_date)
 
-        return self._get_mocked_daily_summary(target_date)
+        return self.mocked_daily_summary(target_date)
+
+    def get_daily_summaries(
+        self,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> List[GarminData]:
+        """
+        Fetch daily summaries for every day between start_date and end_date (inclusive),
+        returned in date order. Real data for multi-day ranges comes from Garmin's
+        range endpoints (a handful of requests per 28 days) instead of two calls per
+        day. Days that fail are logged and skipped.
+        """
+        days = [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ]
+
+        session = self.clients.get(user_id)
+        if session is not None and len(days) > 1:
+            return self._get_real_daily_summaries(session, days, user_id)
+        if session is None and self.is_synthetic(user_id):
+            return self.synthetic.daily_summaries(user_id, start_date, end_date)
+
+        def fetch(target_date: date) -> Optional[GarminData]:
+            try:
+                return self.get_daily_summary(
+                    access_token, access_secret, target_date, user_id
+                )
+            except Exception as e:
+                logger.warning(f"Failed to fetch summary for {target_date}: {e}")
+                return None
+
+        return [summary for summary in map(fetch, days) if summary is not None]
+
+    def _get_real_daily_summaries(
+        self, session: GarminSession, days: List[date], user_id: str
+    ) -> List[GarminData]:
+        """
+        Build summaries for a range of days from the range endpoints, then fall back
+        to per-day calls (fetched concurrently): both of them for days a core range
+        source did not cover, the user summary alone for the PER_DAY_FIELDS of the rest.
+        """
+        logger.info(f"Fetching REAL daily summaries from {days[0]} to {days[-1]}")
+
+        def fetch_range(request: Tuple[str, str]) -> Tuple[str, Any]:
+            source, path = request
+            try:
+                return source, self.scheduler.call(
+                    user_id, session.client.connectapi, path
+                )
+            except Exception as e:
+                logger.warning(f"Range query for {source} failed: {e}")
+                return source, None
+
+        responses = self._executor.map(
+            fetch_range,
+            self.range_requests(session.display_name, days[0], days[-1]),
+        )
+        summaries, incomplete, partial = self.range_summaries(days, responses)
+
+        def fetch_day(target_date: date) -> Optional[GarminData]:
+            try:
+                if target_date in incomplete:
+                    return self._get_real_daily_summary(session, target_date, user_id)
+                return self._get_real_user_summary(session, target_date, user_id)
+            except Exception as e:
+                logger.warning(f"Failed to fetch summary for {target_date}: {e}")
+                return None
+
+        if incomplete:
+            logger.info(f"Fetching {len(incomplete)} incomplete days one by one")
+        per_day_days = incomplete + partial
+        for target_date, summary in zip(
+            per_day_days, self._executor.map(fetch_day, per_day_days)
+        ):
+            if summary is None:
+                del summaries[target_date]
+            else:
+                summaries[target_date] = self.merge_summaries(
+                    summary, summaries[target_date]
+                )
+
+        return [summaries[day] for day in days if day in summaries]
+
+    def fetch_history(
+        self,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> Tuple[List[GarminData], List[GarminActivity]]:
+        """
+        Fetch daily summaries and activities for a date range.
+        The activity search runs alongside the per-day summary requests.
+        """
+        activities_future = self._executor.submit(
+            self.get_activities,
+            access_token,
+            access_secret,
+            start_date,
+            end_date,
+            user_id,
+        )
+        daily_summaries = self.get_daily_summaries(
+            access_token, access_secret, start_date, end_date, user_id
+        )
+        return daily_summaries, activities_future.result()
+
+    def get_history(
+        self,
+        user_id: str,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+    ) -> Tuple[List[GarminData], Iterable[GarminActivity]]:
+        """
+        Return daily summaries and activities for a date range.
+        With a local store, only days past the user's watermark are fetched from
+        Garmin and everything else is read locally. Mocked data is never stored.
+        Activities may be a lazy iterator and should be consumed only once.
+        """
+        if self.store is None or not self.is_authenticated_for(user_id):
+            return self.fetch_history(
+                access_token, access_secret, start_date, end_date, user_id
+            )
+
+        self.sync_range(user_id, access_token, access_secret, start_date, end_date)
+        return (
+            self.store.get_daily_summaries(user_id, start_date, end_date),
+            self.store.iter_activities(user_id, start_date, end_date),
+        )
+
+    def sync_range(
+        self,
+        user_id: str,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+    ) -> Dict[str, int]:
+        """
+        Bring the local store up to date for a date range.
+        The store keeps a contiguous synced range (first_date to watermark) per user.
+        Days before first_date are backfilled, and days from the watermark onwards are
+        (re)fetched since the watermark day may have been synced while still in progress.
+        Days that fail to fetch are left outside the synced range so they are retried.
+        """
+        counts = {"fetched_days": 0, "fetched_activities": 0}
+        first_date, watermark = self.store.get_sync_state(user_id) or (
+            start_date,
+            start_date,
+        )
+
+        if start_date < first_date:
+            missing = self._store_range(
+                user_id,
+                access_token,
+                access_secret,
+                start_date,
+                first_date - timedelta(days=1),
+                counts,
+            )
+            first_date = max(missing) + timedelta(days=1) if missing else start_date
+
+        if end_date >= watermark:
+            missing = self._store_range(
+                user_id, access_token, access_secret, watermark, end_date, counts
+            )
+            watermark = min(missing) if missing else end_date
+
+        self.store.update_sync_state(user_id, first_date, watermark)
+        logger.info(
+            f"Synced store for user {user_id}: {counts['fetched_days']} days and "
+            f"{counts['fetched_activities']} activities fetched from Garmin"
+        )
+        return counts
+
+    def _store_range(
+        self,
+        user_id: str,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        counts: Dict[str, int],
+    ) -> List[date]:
+        """
+        Fetch a date range from Garmin into the store. Returns the days that failed.
+        Activity pages are streamed into the store while the daily summaries are fetched.
+        """
+        activities_future = self._executor.submit(
+            self.store_activities,
+            user_id,
+            self.iter_activities(
+                access_token, access_secret, start_date, end_date, user_id=user_id
+            ),
+        )
+        summaries = self.get_daily_summaries(
+            access_token, access_secret, start_date, end_date, user_id
+        )
+        counts["fetched_days"] += self.store_daily_summaries(user_id, summaries)
+        counts["fetched_activities"] += activities_future.result()
+        return self.missing_days(start_date, end_date, summaries)
 
-    def _get_real_daily_summary(self, target_date: date) -> GarminData:
+    def store_daily_summaries(self, user_id: str, summaries: List[GarminData]) -> int:
+        """
+        Write fetched daily summaries to the store and fold them into the user's
+        rolling baselines. Returns the number of days written.
+        Shared by the sync and async services.
+        """
+        self.store.upsert_daily_summaries(user_id, summaries)
+        self.ingest_rolling_stats(user_id, summaries)
+        return len(summaries)
+
+    def store_activities(
+        self, user_id: str, activities: Iterable[GarminActivity]
+    ) -> int:
+        """
+        Write fetched activities to the store, folding each into the user's training
+        load on the way. The iterable is consumed in batches, so a lazy stream of
+        pages is never held in memory. Returns the number of activities written.
+        Shared by the sync and async services.
+        """
+        return self.store.upsert_activities(
+            user_id, self._tap_training_load(user_id, activities)
+        )
+
+    @staticmethod
+    def missing_days(
+        start_date: date, end_date: date, summaries: List[GarminData]
+    ) -> List[date]:
+        """
+        Days of a range without a fetched summary.
+        """
+        fetched_dates = {summary.date for summary in summaries}
+        return [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+            if start_date + timedelta(days=offset) not in fetched_dates
+        ]
+
+    def get_rolling_stats(self, user_id: str) -> Optional[RollingStats]:
+        """
+        Rolling baselines for a user, loaded from the store on first use.
+        None until real data has been synced for the user.
+        """
+        stats = self._rolling_stats.get(user_id)
+        if stats is None and self.store is not None:
+            state = self.store.get_rolling_stats(user_id)
+            stats = RollingStats.from_dict(state) if state else None
+            if stats is not None:
+                self._rolling_stats[user_id] = stats
+        return stats
+
+    def ingest_rolling_stats(self, user_id: str, summaries: List[GarminData]):
+        """
+        Fold newly fetched days into the user's rolling baselines and persist them.
+        """
+        with self._rolling_stats_lock:
+            stats = self.get_rolling_stats(user_id) or RollingStats()
+            stats.ingest(summaries)
+            self._rolling_stats[user_id] = stats
+            if self.store is not None:
+                self.store.save_rolling_stats(user_id, stats.to_dict())
+
+    def get_training_load(self, user_id: str) -> Optional[TrainingLoadModel]:
+        """
+        Fitness-fatigue model for a user, loaded from the store on first use.
+        None until real activities have been synced for the user.
+        """
+        model = self._training_load.get(user_id)
+        if model is None and self.store is not None:
+            state = self.store.get_training_load(user_id)
+            model = TrainingLoadModel.from_dict(state) if state else None
+            if model is not None:
+                self._training_load[user_id] = model
+        return model
+
+    def _tap_training_load(
+        self, user_id: str, activities: Iterable[GarminActivity]
+    ) -> Iterator[GarminActivity]:
+        """
+        Pass activities through unchanged while folding them into the training load
+        a page at a time, so streamed activity pages never have to be held in memory.
+        Activities already in the store were folded in by an earlier sync, so only
+        new ones (or remembered ones being replaced) change the model, whatever
+        order and range a re-sync fetches them in.
+        The state is persisted once the stream is exhausted.
+        """
+        with self._training_load_lock:
+            model = self.get_training_load(user_id)
+            # A new model has not seen the stored activities
+            dedupe_against_store = model is not None and self.store is not None
+            model = model or TrainingLoadModel()
+            self._training_load[user_id] = model
+            stats = self.get_rolling_stats(user_id)
+            baseline = stats.baseline("resting_heart_rate", 28) if stats else {}
+            if baseline.get("mean"):
+                model.resting_hr = baseline["mean"]
+
+        iterator = iter(activities)
+        while True:
+            page = list(islice(iterator, ACTIVITY_PAGE_SIZE))
+            if not page:
+                break
+            stored = (
+                self.store.stored_activity_keys(user_id, page)
+                if dedupe_against_store
+                else set()
+            )
+            with self._training_load_lock:
+                model.ingest(page, stored)
+            yield from page
+
+        if self.store is not None:
+            with self._training_load_lock:
+                self.store.save_training_load(user_id, model.to_dict())
+
+    def _get_real_daily_summary(
+        self, session: GarminSession, target_date: date, user_id: str
+    ) -> GarminData:
         logger.info(f"Fetching REAL daily summary for {target_date}")
         try:
-            date_str = target_date.isoformat()
+            user_summary_path, sleep_path = self.daily_summary_paths(
+                session.display_name, target_date
+            )
 
             # Fetch User Summary (Steps, HR, Calories)
-            user_summary = self.client.connectapi(
-                f"/usersummary-service/usersummary/daily/{self.display_name}?calendarDate={date_str}"
+            user_summary = self.scheduler.call(
+                user_id, session.client.connectapi, user_summary_path
             )
 
             # Fetch Sleep Data
-            sleep_data = self.client.connectapi(
-                f"/wellness-service/wellness/dailySleepData/{self.display_name}?date={date_str}"
+            sleep_data = self.scheduler.call(
+                user_id, session.client.connectapi, sleep_path
             )
 
-            summary = user_summary or {}
-            sleep_dto = sleep_data.get("dailySleepDTO", {})
-
-            return GarminData(
-                date=target_date,
-                # Sleep
-                sleep_score=sleep_dto.get("sleepScores", {})
-                .get("overall", {})
-                .get("value"),
-                total_sleep_minutes=int((sleep_dto.get("sleepTimeSeconds") or 0) / 60),
-                deep_sleep_minutes=int((sleep_dto.get("deepSleepSeconds") or 0) / 60),
-                light_sleep_minutes=int((sleep_dto.get("lightSleepSeconds") or 0) / 60),
-                rem_sleep_minutes=int((sleep_dto.get("remSleepSeconds") or 0) / 60),
-                awake_minutes=int((sleep_dto.get("awakeSleepSeconds") or 0) / 60),
-                # Wellness
-                resting_heart_rate=summary.get("restingHeartRate"),
-                stress_score=summary.get("averageStressLevel"),
-                body_battery=None,  # Often found in a different endpoint, skipped for now to avoid complexity
-                # Activity
-                steps=summary.get("totalSteps"),
-                active_minutes=int((summary.get("activeSeconds") or 0) / 60),
-                calories_burned=summary.get("totalKilocalories"),
-                # Body Comp (Basic)
-                # These might be in a different summary, keeping mocked values or defaults if missing
-                raw_data={"user_summary": summary, "sleep_data": sleep_data},
-            )
+            return self.build_daily_summary(target_date, user_summary, sleep_data)
 
         except Exception as e:
             logger.error(f"Error fetching real data for {target_date}: {e}")
             raise
 
-    def _get_mocked_daily_summary(self, target_date: date) -> GarminData:
+    def _get_real_user_summary(
+        self, session: GarminSession, target_date: date, user_id: str
+    ) -> GarminData:
+        """
+        The PER_DAY_FIELDS of a day, from its user summary alone.
+        """
+        user_summary_path, _ = self.daily_summary_paths(
+            session.display_name, target_date
+        )
+        user_summary = self.scheduler.call(
+            user_id, session.client.connectapi, user_summary_path
+        )
+        return self.build_per_day_fields(target_date, user_summary)
+
+    @staticmethod
+    def daily_summary_paths(display_name: str, target_date: date) -> Tuple[str, str]:
+        """
+        Connect API paths for the user summary and sleep data of a day.
+        """
+        date_str = target_date.isoformat()
+        return (
+            f"/usersummary-service/usersummary/daily/{display_name}?calendarDate={date_str}",
+            f"/wellness-service/wellness/dailySleepData/{display_name}?date={date_str}",
+        )
+
+    @staticmethod
+    def range_requests(
+        display_name: str, start_date: date, end_date: date
+    ) -> List[Tuple[str, str]]:
+        """
+        (source, Connect API path) pairs covering a date range with the range endpoints,
+        split into pages of RANGE_PAGE_DAYS.
+        """
+        requests = []
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            start = chunk_start
+            end = min(end_date, start + timedelta(days=RANGE_PAGE_DAYS - 1))
+            requests += [
+                ("sleep", f"/sleep-service/stats/sleep/daily/{start}/{end}"),
+                ("hrv", f"/hrv-service/hrv/daily/{start}/{end}"),
+                (
+                    "resting_heart_rate",
+                    f"/userstats-service/wellness/daily/{display_name}?fromDate={start}&untilDate={end}&metricId=60",
+                ),
+                ("stress", f"/usersummary-service/stats/stress/daily/{start}/{end}"),
+                ("steps", f"/usersummary-service/stats/steps/daily/{start}/{end}"),
+                (
+                    "intensity_minutes",
+                    f"/usersummary-service/stats/im/daily/{start}/{end}",
+                ),
+            ]
+            chunk_start = end + timedelta(days=1)
+        return requests
+
+    @staticmethod
+    def _range_entries(response: Any) -> Iterator[Tuple[date, Dict[str, Any]]]:
+        """
+        Yield (day, entry) pairs from any of the range endpoint response shapes.
+        Entries with nested "values" are flattened.
+        """
+        if isinstance(response, dict):
+            if "individualStats" in response:
+                entries = response["individualStats"]
+            elif "hrvSummaries" in response:
+                entries = response["hrvSummaries"]
+            else:
+                metrics = (response.get("allMetrics") or {}).get("metricsMap") or {}
+                entries = [entry for values in metrics.values() for entry in values]
+        else:
+            entries = response or []
+
+        for entry in entries:
+            if isinstance(entry, dict) and entry.get("calendarDate"):
+                yield (
+                    date.fromisoformat(entry["calendarDate"][:10]),
+                    {**entry, **(entry.get("values") or {})},
+                )
+
+    @classmethod
+    def range_summaries(
+        cls, days: List[date], responses: Iterable[Tuple[str, Any]]
+    ) -> Tuple[Dict[date, GarminData], List[date], List[date]]:
+        """
+        Combine range endpoint responses into one GarminData row per day.
+        Returns the rows by day, the days without an entry from one of the core
+        sources (failed responses are None and report no days), and the other days
+        still missing one of the PER_DAY_FIELDS.
+        """
+        fields_by_day: Dict[date, Dict[str, Any]] = {}
+        reported: Dict[str, Set[date]] = {source: set() for source in _RANGE_FIELDS}
+        for source, response in responses:
+            for day, entry in cls._range_entries(response):
+                reported[source].add(day)
+                fields = fields_by_day.setdefault(day, {"raw_data": {}})
+                fields["raw_data"][source] = entry
+                for field, key, divisor in _RANGE_FIELDS[source]:
+                    if entry.get(key) is not None:
+                        fields[field] = fields.get(field, 0) + int(entry[key] / divisor)
+
+        summaries = {
+            day: GarminData(date=day, **fields_by_day.get(day, {})) for day in days
+        }
+        incomplete = [
+            day
+            for day in days
+            if any(day not in reported[source] for source in _RANGE_CORE_SOURCES)
+        ]
+        partial = [
+            day
+            for day in days
+            if day not in incomplete
+            and any(getattr(summaries[day], field) is None for field in PER_DAY_FIELDS)
+        ]
+        return summaries, incomplete, partial
+
+    @staticmethod
+    def merge_summaries(primary: GarminData, fallback: GarminData) -> GarminData:
+        """
+        Fill the gaps of a per-day summary with values from the range endpoints.
+        """
+        merged = fallback.to_record()
+        merged.update(
+            {
+                key: value
+                for key, value in primary.to_record().items()
+                if value is not None
+            }
+        )
+        merged["raw_data"] = {**(fallback.raw_data or {}), **(primary.raw_data or {})}
+        return GarminData(**merged)
+
+    @classmethod
+    def build_per_day_fields(
+        cls, target_date: date, user_summary: Optional[Dict[str, Any]]
+    ) -> GarminData:
+        """
+        A GarminData row with only the PER_DAY_FIELDS set, for merging into a
+        range summary.
+        """
+        summary = cls.build_daily_summary(target_date, user_summary, None)
+        return GarminData(
+            date=target_date,
+            raw_data={"user_summary": user_summary or {}},
+            **{field: getattr(summary, field) for field in PER_DAY_FIELDS},
+        )
+
+    @staticmethod
+    def build_daily_summary(
+        target_date: date,
+        user_summary: Optional[Dict[str, Any]],
+        sleep_data: Optional[Dict[str, Any]],
+    ) -> GarminData:
+        """
+        Build a GarminData row from the raw user summary and sleep responses.
+        """
+        summary = user_summary or {}
+        sleep_data = sleep_data or {}
+        sleep_dto = sleep_data.get("dailySleepDTO", {})
+
+        return GarminData(
+            date=target_date,
+            # Sleep
+            sleep_score=sleep_dto.get("sleepScores", {})
+            .get("overall", {})
+            .get("value"),
+            total_sleep_minutes=int((sleep_dto.get("sleepTimeSeconds") or 0) / 60),
+            deep_sleep_minutes=int((sleep_dto.get("deepSleepSeconds") or 0) / 60),
+            light_sleep_minutes=int((sleep_dto.get("lightSleepSeconds") or 0) / 60),
+            rem_sleep_minutes=int((sleep_dto.get("remSleepSeconds") or 0) / 60),
+            awake_minutes=int((sleep_dto.get("awakeSleepSeconds") or 0) / 60),
+            # Wellness
+            resting_heart_rate=summary.get("restingHeartRate"),
+            stress_score=summary.get("averageStressLevel"),
+            body_battery=None,  # Often found in a different endpoint, skipped for now to avoid complexity
+            # Activity
+            steps=summary.get("totalSteps"),
+            active_minutes=int((summary.get("activeSeconds") or 0) / 60),
+            calories_burned=summary.get("totalKilocalories"),
+            # Body Comp (Basic)
+            # These might be in a different summary, keeping mocked values or defaults if missing
+            raw_data={"user_summary": summary, "sleep_data": sleep_data},
+        )
+
+    def is_synthetic(self, user_id: str) -> bool:
+        """
+        Whether a user is served from the synthetic population.
+        """
+        return self.synthetic is not None and self.synthetic.has_user(user_id)
+
+    def synthetic_daily_summary(self, user_id: str, target_date: date) -> GarminData:
+        summaries = self.synthetic.daily_summaries(user_id, target_date, target_date)
+        if not summaries:
+            raise LookupError(f"No synthetic data for {user_id} on {target_date}")
+        return summaries[0]
+
+    def mocked_daily_summary(self, target_date: date) -> GarminData:
         logger.info(f"Fetching MOCKED daily summary for {target_date}")
 
         # DEMO SCENARIO: Force "Red Zone" recovery for TODAY
@@ -211,105 +964,163 @@ class GarminService:
         )
 
     def get_activities(
-        self, access_token: str, access_secret: str, start_date: date, end_date: date
+        self,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        user_id: str = DEFAULT_USER_ID,
     ) -> List[GarminActivity]:
         """
         Fetch workouts in date range.
         """
-        if self.is_authenticated:
-            return self._get_real_activities(start_date, end_date)
+        return list(
+            self.iter_activities(
+                access_token, access_secret, start_date, end_date, user_id=user_id
+            )
+        )
+
+    def iter_activities(
+        self,
+        access_token: str,
+        access_secret: str,
+        start_date: date,
+        end_date: date,
+        page_size: int = ACTIVITY_PAGE_SIZE,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> Iterator[GarminActivity]:
+        """
+        Lazily yield workouts in date range.
+        Real activities are fetched page by page, so memory stays flat for long windows.
+        """
+        session = self.clients.get(user_id)
+        if session is not None:
+            return self._iter_real_activities(
+                session, start_date, end_date, page_size, user_id
+            )
+        if self.is_synthetic(user_id):
+            return self.synthetic.iter_activities(user_id, start_date, end_date)
 
-        return self._get_mocked_activities(start_date, end_date)
+        return self.iter_mocked_activities(start_date, end_date)
 
-    def _get_real_activities(
-        self, start_date: date, end_date: date
-    ) -> List[GarminActivity]:
+    def _iter_real_activities(
+        self,
+        session: GarminSession,
+        start_date: date,
+        end_date: date,
+        page_size: int,
+        user_id: str,
+    ) -> Iterator[GarminActivity]:
         logger.info(f"Fetching REAL activities from {start_date} to {end_date}")
-        activities = []
+        start = 0
         try:
-            # Fetch activities list
-            # Note: limit is hardcoded for safety
-            fetched_activities = self.client.connectapi(
-                f"/activitylist-service/activities/search/activities?startDate={start_date}&endDate={end_date}&limit=50"
-            )
-
-            for act in fetched_activities:
-                act_type = act.get("activityType", {}).get("typeKey", "unknown")
-                start_time_str = act.get("startTimeLocal")
-                start_time = (
-                    datetime.fromisoformat(start_time_str)
-                    if start_time_str
-                    else datetime.now()
+            # Walk Garmin's start/limit cursor until a short page signals the end
+            while True:
+                page = self.scheduler.call(
+                    user_id,
+                    session.client.connectapi,
+                    self.activities_path(start_date, end_date, start, page_size),
                 )
+                if not page:
+                    return
 
-                # Create GarminActivity object
-                # Safely handling types that might be None
-                duration_min = float(act.get("duration", 0) or 0) / 60.0
-                distance_km = float(act.get("distance", 0) or 0) / 1000.0
-
-                activities.append(
-                    GarminActivity(
-                        activity_type=act_type,
-                        start_time=start_time,
-                        duration_minutes=duration_min,
-                        distance_km=distance_km,
-                        avg_hr=act.get("averageHR"),
-                        max_hr=act.get("maxHR"),
-                        elevation_gain=act.get("elevationGain"),
-                        avg_pace=float(
-                            act.get("averageSpeed", 0) or 0
-                        ),  # Note: Garmin provides speed in m/s, might need conversion for pace
-                        raw_data=act,
-                    )
-                )
+                for act in page:
+                    yield self.parse_activity(act)
 
-            return activities
+                if len(page) < page_size:
+                    return
+                start += page_size
 
         except Exception as e:
             logger.error(f"Error fetching real activities: {e}")
             raise
 
-    def _get_mocked_activities(
+    @staticmethod
+    def activities_path(
+        start_date: date, end_date: date, start: int, limit: int
+    ) -> str:
+        """
+        Connect API path for one page of the activity search.
+        """
+        return f"/activitylist-service/activities/search/activities?startDate={start_date}&endDate={end_date}&start={start}&limit={limit}"
+
+    @staticmethod
+    def parse_activity(act: Dict[str, Any]) -> GarminActivity:
+        """
+        Build a GarminActivity from an activity search result.
+        """
+        act_type = act.get("activityType", {}).get("typeKey", "unknown")
+        start_time_str = act.get("startTimeLocal")
+        start_time = (
+            datetime.fromisoformat(start_time_str) if start_time_str else datetime.now()
+        )
+
+        # Safely handling types that might be None
+        duration_min = float(act.get("duration", 0) or 0) / 60.0
+        distance_km = float(act.get("distance", 0) or 0) / 1000.0
+
+        return GarminActivity(
+            activity_type=act_type,
+            start_time=start_time,
+            duration_minutes=duration_min,
+            distance_km=distance_km,
+            avg_hr=act.get("averageHR"),
+            max_hr=act.get("maxHR"),
+            elevation_gain=act.get("elevationGain"),
+            avg_pace=float(
+                act.get("averageSpeed", 0) or 0
+            ),  # Note: Garmin provides speed in m/s, might need conversion for pace
+            raw_data=act,
+        )
+
+    def iter_mocked_activities(
         self, start_date: date, end_date: date
-    ) -> List[GarminActivity]:
+    ) -> Iterator[GarminActivity]:
         logger.info(f"Fetching MOCKED activities from {start_date} to {end_date}")
-        activities = []
         current_date = start_date
         while current_date <= end_date:
             if current_date.day % 2 == 0:
-                activities.append(
-                    GarminActivity(
-                        activity_type="running",
-                        start_time=datetime.combine(current_date, datetime.min.time())
-                        + timedelta(hours=7),
-                        duration_minutes=45.0,
-                        distance_km=5.0,
-                        avg_pace=9.0,
-                        avg_hr=145,
-                        max_hr=170,
-                        elevation_gain=50.0,
-                        vo2_max=52.0,
-                        aerobic_training_effect=3.0,
-                        anaerobic_training_effect=1.0,
-                        raw_data={"mock": "activity", "id": f"run_{current_date}"},
-                    )
+                yield GarminActivity(
+                    activity_type="running",
+                    start_time=datetime.combine(current_date, datetime.min.time())
+                    + timedelta(hours=7),
+                    duration_minutes=45.0,
+                    distance_km=5.0,
+                    avg_pace=9.0,
+                    avg_hr=145,
+                    max_hr=170,
+                    elevation_gain=50.0,
+                    vo2_max=52.0,
+                    aerobic_training_effect=3.0,
+                    anaerobic_training_effect=1.0,
+                    raw_data={"mock": "activity", "id": f"run_{current_date}"},
                 )
             elif current_date.day % 2 != 0:
-                activities.append(
-                    GarminActivity(
-                        activity_type="strength",
-                        start_time=datetime.combine(current_date, datetime.min.time())
-                        + timedelta(hours=18),
-                        duration_minutes=60.0,
-                        exercise_count=8,
-                        set_count=24,
-                        avg_hr=120,
-                        max_hr=150,
-                        raw_data={"mock": "activity", "id": f"strength_{current_date}"},
-                    )
+                yield GarminActivity(
+                    activity_type="strength",
+                    start_time=datetime.combine(current_date, datetime.min.time())
+                    + timedelta(hours=18),
+                    duration_minutes=60.0,
+                    exercise_count=8,
+                    set_count=24,
+                    avg_hr=120,
+                    max_hr=150,
+                    raw_data={"mock": "activity", "id": f"strength_{current_date}"},
                 )
             current_date += timedelta(days=1)
-        return activities
+
+    def get_raw_data(
+        self, item: Union[GarminData, GarminActivity]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the full Garmin payload behind a summary or activity.
+        Items read from the store only carry raw_data_id; the payload is loaded on demand.
+        """
+        if item.raw_data is not None:
+            return item.raw_data
+        if item.raw_data_id is None or self.store is None:
+            return None
+        return self.store.get_raw_payload(item.raw_data_id)
 
     def get_body_composition(
         self, access_token: str, access_secret: str, start_date: date, end_date: date
@@ -325,13 +1136,21 @@ class GarminService:
         days_back: int = 30,
         email: Optional[str] = None,
         password: Optional[str] = None,
+        current_token: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Complete sync operation.
+        With a local store, only days after the user's watermark are fetched from Garmin.
+        A login refused by may_login raises PermissionError.
         """
+        user_token = None
         if email and password:
             try:
-                self.login(email, password)
+                user_token = self.login(
+                    email, password, user_id=user_id, current_token=current_token
+                )
+            except PermissionError:
+                raise
             except Exception as e:
                 logger.error(f"Login failed during sync: {e}")
                 return {
@@ -346,31 +1165,34 @@ class GarminService:
         start_date = end_date - timedelta(days=days_back)
 
         # Pass dummy tokens if authenticated via garth
-        # The methods inside will use self.client if authenticated
-        activities = self.get_activities(
-            access_token, access_secret, start_date, end_date
+        # The methods inside will use the user's garth client if authenticated
+        daily_summaries, activities = self.get_history(
+            user_id, access_token, access_secret, start_date, end_date
         )
-        daily_summaries = []
 
-        current = start_date
-        while current <= end_date:
-            try:
-                summary = self.get_daily_summary(access_token, access_secret, current)
-                daily_summaries.append(summary)
-            except Exception as e:
-                logger.warning(f"Failed to fetch summary for {current}: {e}")
-            current += timedelta(days=1)
+        # Count activities without materializing them all
+        activities_count = 0
+        latest_activity = None
+        for activity in activities:
+            activities_count += 1
+            latest_activity = activity
 
-        return {
+        result = {
             "user_id": user_id,
             "period": f"{start_date} to {end_date}",
             "synced_days": len(daily_summaries),
-            "activities_count": len(activities),
+            "activities_count": activities_count,
             "status": "success",
             "sample_data": {
-                "latest_summary": daily_summaries[-1].model_dump()
-                if daily_summaries
-                else None,
-                "latest_activity": activities[-1].model_dump() if activities else None,
+                "latest_summary": (
+                    daily_summaries[-1].to_record() if daily_summaries else None
+                ),
+                "latest_activity": (
+                    latest_activity.to_record() if latest_activity else None
+                ),
             },
         }
+        if user_token is not None:
+            # Needed to act for this user on later requests
+            result["user_token"] = user_token
+        return result
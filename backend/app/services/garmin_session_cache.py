@@ -0,0 +1,181 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import tempfile
+from typing import Any, Dict, Optional
+
+from garth.auth_tokens import OAuth2Token
+from garth.http import Client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_DIR = os.getenv(
+    "GARMIN_SESSION_DIR",
+    os.path.join(os.path.expanduser("~"), ".fitsense", "garmin_sessions"),
+)
+
+# PBKDF2 work factor for the credentials check guarding cached sessions
+_PASSWORD_HASH_ITERATIONS = 100_000
+
+
+class GarminSessionCache:
+    """
+    Per-user cache of garth OAuth1/OAuth2 tokens on local disk.
+    Lets repeat logins resume (and refresh) an existing Garmin session instead of
+    running the full SSO handshake. Each entry also stores a salted hash of the
+    email and password it was created with, so a cached session is never handed
+    out for the wrong credentials.
+    """
+
+    def __init__(self, session_dir: Optional[str] = None):
+        self.session_dir = session_dir or DEFAULT_SESSION_DIR
+        os.makedirs(self.session_dir, mode=0o700, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # Hash the key so user identifiers never end up in file names
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.session_dir, f"{digest}.json")
+
+    @staticmethod
+    def _hash_credentials(email: str, password: str, salt: bytes) -> str:
+        secret = f"{email.strip().lower()}\0{password}".encode()
+        return hashlib.pbkdf2_hmac(
+            "sha256", secret, salt, _PASSWORD_HASH_ITERATIONS
+        ).hex()
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable Garmin session cache entry: {e}")
+            return None
+
+    def contains(self, key: str) -> bool:
+        """
+        Whether a session is cached for key (without loading it).
+        """
+        return os.path.exists(self._path(key))
+
+    def _credentials_match(
+        self, entry: Dict[str, Any], email: str, password: str
+    ) -> bool:
+        expected = self._hash_credentials(email, password, bytes.fromhex(entry["salt"]))
+        return hmac.compare_digest(expected, entry.get("credentials_hash", ""))
+
+    def matches(self, key: str, email: str, password: str) -> bool:
+        """
+        Whether key has a cached session created with these credentials.
+        """
+        entry = self._read(key)
+        return entry is not None and self._credentials_match(entry, email, password)
+
+    def resume(
+        self,
+        key: str,
+        client: Client,
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Load the cached session for key into client, refreshing the OAuth2 token if needed.
+        When credentials are given they must match the ones the session was created with;
+        without them the session is restored unconditionally (trusted internal callers).
+        Returns the cached metadata (e.g. display_name), or None if a full login is required.
+        """
+        entry = self._read(key)
+        if entry is None:
+            return None
+
+        if password is not None and not self._credentials_match(
+            entry, email or "", password
+        ):
+            logger.info("Cached Garmin session does not match credentials")
+            return None
+
+        try:
+            client.loads(entry["tokens"])
+            token = client.oauth2_token
+            if not isinstance(token, OAuth2Token) or token.expired:
+                logger.info("Refreshing cached Garmin OAuth2 token")
+                client.refresh_oauth2()
+                self._write(key, client, entry)
+        except Exception as e:
+            logger.warning(f"Could not resume cached Garmin session: {e}")
+            self.invalidate(key)
+            return None
+
+        logger.info("Resumed cached Garmin session")
+        return {
+            "display_name": entry.get("display_name"),
+            "token_hash": entry.get("token_hash"),
+        }
+
+    def save(
+        self,
+        key: str,
+        client: Client,
+        email: str,
+        password: str,
+        display_name: Optional[str] = None,
+        token_hash: Optional[str] = None,
+    ):
+        """
+        Store the client's current tokens for key, with the hash of the user token
+        issued for the session.
+        """
+        salt = secrets.token_bytes(16)
+        entry = {
+            "salt": salt.hex(),
+            "credentials_hash": self._hash_credentials(email, password, salt),
+            "display_name": display_name,
+            "token_hash": token_hash,
+        }
+        self._write(key, client, entry)
+
+    def set_token_hash(self, key: str, token_hash: str):
+        """
+        Replace the user token hash of an existing entry (a new token was issued).
+        """
+        entry = self._read(key)
+        if entry is not None:
+            self._write_entry(key, {**entry, "token_hash": token_hash})
+
+    def update_tokens(self, key: str, client: Client):
+        """
+        Replace the tokens of an existing entry (e.g. after an OAuth2 refresh),
+        keeping its credentials check. Does nothing if key has no cached session.
+        """
+        entry = self._read(key)
+        if entry is not None:
+            self._write(key, client, entry)
+
+    def _write(self, key: str, client: Client, entry: Dict[str, Any]):
+        self._write_entry(key, {**entry, "tokens": client.dumps()})
+
+    def _write_entry(self, key: str, entry: Dict[str, Any]):
+        # Write to a private temp file and rename, so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.session_dir)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def invalidate(self, key: str):
+        """
+        Drop the cached session for key, if any.
+        """
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
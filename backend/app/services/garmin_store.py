@@ -0,0 +1,388 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from pydantic import TypeAdapter
+
+try:
+    from app.models.garmin_data import GarminActivity, GarminData
+except ImportError:
+    # Fallback for local testing if path setup is different
+    import sys
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+    from app.models.garmin_data import GarminActivity, GarminData
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.getenv(
+    "FITSENSE_DB_PATH",
+    os.path.join(os.path.expanduser("~"), ".fitsense", "fitsense.db"),
+)
+
+# Rows written or read per batch when streaming activities in and out of the store
+BATCH_SIZE = 500
+
+# Stored rows are validated a batch at a time: one JSON array per call is about
+# 1.5x cheaper than model_validate_json per row
+_SUMMARY_LIST = TypeAdapter(List[GarminData])
+_ACTIVITY_LIST = TypeAdapter(List[GarminActivity])
+
+
+def _validate_rows(adapter: TypeAdapter, payloads: Iterable[str]) -> list:
+    return adapter.validate_json("[" + ",".join(payloads) + "]")
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_summaries (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, date)
+);
+CREATE TABLE IF NOT EXISTS activities (
+    user_id TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    activity_type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, start_time, activity_type)
+);
+CREATE TABLE IF NOT EXISTS raw_payloads (
+    id TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS daily_summaries_raw_data_id
+    ON daily_summaries (json_extract(data, '$.raw_data_id'));
+CREATE INDEX IF NOT EXISTS activities_raw_data_id
+    ON activities (json_extract(data, '$.raw_data_id'));
+CREATE TABLE IF NOT EXISTS sync_state (
+    user_id TEXT PRIMARY KEY,
+    first_date TEXT NOT NULL,
+    watermark TEXT NOT NULL,
+    last_synced_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rolling_stats (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS training_load (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+class GarminStore:
+    """
+    Local SQLite time-series store for Garmin daily summaries and activities.
+    Rows are keyed by user and date so past days only have to be fetched from
+    Garmin once. A per-user sync state records the contiguous date range that
+    has already been synced (first_date to watermark), and a rolling_stats row
+    holds the user's incrementally maintained metric baselines (training_load does
+    the same for the fitness-fatigue model).
+    Raw Garmin payloads are stored out of line, zlib-compressed and keyed by a
+    content hash (raw_data_id), are only read back on request, and are deleted
+    when the last row referencing them is replaced.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        # One shared connection guarded by a lock; the service fans requests out
+        # over a thread pool so the connection must be usable from any thread.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._lock:
+            if self.db_path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+        logger.info(f"Garmin store ready at {self.db_path}")
+
+    def upsert_daily_summaries(
+        self, user_id: str, summaries: Iterable[GarminData]
+    ) -> int:
+        """
+        Insert or replace daily summaries for a user. Returns the number of rows written.
+        Raw payloads of replaced rows are deleted once nothing references them.
+        """
+        rows, payloads = [], []
+        for summary in summaries:
+            self._stash_raw_data(summary, payloads)
+            rows.append((user_id, summary.date.isoformat(), summary.model_dump_json()))
+        with self._lock:
+            superseded = self._payload_ids(
+                "daily_summaries", "date", user_id, [row[1] for row in rows]
+            )
+            self._write_raw_payloads(payloads)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO daily_summaries (user_id, date, data) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._delete_orphaned_payloads(superseded)
+            self._conn.commit()
+        return len(rows)
+
+    def upsert_activities(
+        self, user_id: str, activities: Iterable[GarminActivity]
+    ) -> int:
+        """
+        Insert or replace activities for a user. Returns the number of rows written.
+        The iterable is consumed in batches, so it can be a lazy generator of any length.
+        Raw payloads of replaced rows are deleted once nothing references them.
+        """
+        written = 0
+        iterator = iter(activities)
+        while True:
+            rows, payloads = [], []
+            for activity in islice(iterator, BATCH_SIZE):
+                self._stash_raw_data(activity, payloads)
+                rows.append(
+                    (
+                        user_id,
+                        activity.start_time.isoformat(),
+                        activity.activity_type,
+                        activity.model_dump_json(),
+                    )
+                )
+            if not rows:
+                return written
+
+            with self._lock:
+                superseded = self._payload_ids(
+                    "activities", "start_time", user_id, [row[1] for row in rows]
+                )
+                self._write_raw_payloads(payloads)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO activities (user_id, start_time, activity_type, data) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._delete_orphaned_payloads(superseded)
+                self._conn.commit()
+            written += len(rows)
+
+    def stored_activity_keys(
+        self, user_id: str, activities: List[GarminActivity]
+    ) -> Set[str]:
+        """
+        "start_time|activity_type" keys of the given activities that are already
+        stored (see TrainingLoadModel.activity_key).
+        """
+        start_times = sorted(
+            {activity.start_time.isoformat() for activity in activities}
+        )
+        if not start_times:
+            return set()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT start_time, activity_type FROM activities WHERE user_id = ? "
+                f"AND start_time IN ({','.join('?' * len(start_times))})",
+                (user_id, *start_times),
+            ).fetchall()
+        return {f"{start_time}|{activity_type}" for start_time, activity_type in rows}
+
+    @staticmethod
+    def _stash_raw_data(
+        item: Union[GarminData, GarminActivity], payloads: List[Tuple[str, bytes]]
+    ):
+        """
+        Queue an item's raw payload for out-of-line storage and set its raw_data_id.
+        """
+        if item.raw_data is None:
+            return
+        data = json.dumps(item.raw_data, sort_keys=True, default=str).encode()
+        item.raw_data_id = hashlib.sha256(data).hexdigest()
+        payloads.append((item.raw_data_id, zlib.compress(data)))
+
+    def _write_raw_payloads(self, payloads: List[Tuple[str, bytes]]):
+        # Content-addressed, so identical payloads are stored once. Caller holds the lock.
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO raw_payloads (id, data) VALUES (?, ?)", payloads
+        )
+
+    def _payload_ids(
+        self, table: str, column: str, user_id: str, values: List[str]
+    ) -> Set[str]:
+        """
+        raw_data_ids of the user's rows in `table` whose `column` is one of `values`.
+        Caller holds the lock.
+        """
+        if not values:
+            return set()
+        rows = self._conn.execute(
+            f"SELECT json_extract(data, '$.raw_data_id') FROM {table} "
+            f"WHERE user_id = ? AND {column} IN ({','.join('?' * len(values))})",
+            (user_id, *values),
+        ).fetchall()
+        return {row[0] for row in rows if row[0] is not None}
+
+    def _delete_orphaned_payloads(self, payload_ids: Set[str]):
+        # Superseded payloads nothing points to any more. Caller holds the lock.
+        self._conn.executemany(
+            "DELETE FROM raw_payloads WHERE id = ? "
+            "AND NOT EXISTS (SELECT 1 FROM daily_summaries "
+            "WHERE json_extract(data, '$.raw_data_id') = raw_payloads.id) "
+            "AND NOT EXISTS (SELECT 1 FROM activities "
+            "WHERE json_extract(data, '$.raw_data_id') = raw_payloads.id)",
+            [(payload_id,) for payload_id in payload_ids],
+        )
+
+    def import_rows(
+        self,
+        daily_rows: List[Tuple[str, str, str]],
+        activity_rows: List[Tuple[str, str, str, str]],
+    ) -> int:
+        """
+        Bulk insert already serialized rows in one transaction, skipping the models.
+        daily_rows are (user_id, date, json); activity_rows are
+        (user_id, start_time, activity_type, json). Returns the number of rows written.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO daily_summaries (user_id, date, data) VALUES (?, ?, ?)",
+                daily_rows,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO activities (user_id, start_time, activity_type, data) VALUES (?, ?, ?, ?)",
+                activity_rows,
+            )
+            self._conn.commit()
+        return len(daily_rows) + len(activity_rows)
+
+    def get_raw_payload(self, raw_data_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load and decompress a raw Garmin payload by id, or None if it is not stored.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM raw_payloads WHERE id = ?", (raw_data_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def get_daily_summaries(
+        self, user_id: str, start_date: date, end_date: date
+    ) -> List[GarminData]:
+        """
+        Read stored daily summaries between start_date and end_date (inclusive), in date order.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM daily_summaries WHERE user_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (user_id, start_date.isoformat(), end_date.isoformat()),
+            ).fetchall()
+        return _validate_rows(_SUMMARY_LIST, (row[0] for row in rows))
+
+    def get_activities(
+        self, user_id: str, start_date: date, end_date: date
+    ) -> List[GarminActivity]:
+        """
+        Read stored activities that started between start_date and end_date (inclusive).
+        """
+        return list(self.iter_activities(user_id, start_date, end_date))
+
+    def iter_activities(
+        self, user_id: str, start_date: date, end_date: date
+    ) -> Iterator[GarminActivity]:
+        """
+        Lazily yield stored activities in start time order.
+        Rows are read in keyset-paginated batches so the lock is never held between yields.
+        """
+        cursor = (start_date.isoformat(), "")
+        until = (end_date + timedelta(days=1)).isoformat()
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT start_time, activity_type, data FROM activities "
+                    "WHERE user_id = ? AND (start_time, activity_type) > (?, ?) AND start_time < ? "
+                    "ORDER BY start_time, activity_type LIMIT ?",
+                    (user_id, cursor[0], cursor[1], until, BATCH_SIZE),
+                ).fetchall()
+
+            yield from _validate_rows(_ACTIVITY_LIST, (row[2] for row in rows))
+
+            if len(rows) < BATCH_SIZE:
+                return
+            cursor = (rows[-1][0], rows[-1][1])
+
+    def get_sync_state(self, user_id: str) -> Optional[Tuple[date, date]]:
+        """
+        Return (first_date, watermark) of the synced range for a user, or None if never synced.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT first_date, watermark FROM sync_state WHERE user_id = ?",
+                (user_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return date.fromisoformat(row[0]), date.fromisoformat(row[1])
+
+    def update_sync_state(self, user_id: str, first_date: date, watermark: date):
+        """
+        Record the contiguous range of days that is now present in the store.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (user_id, first_date, watermark, last_synced_at) VALUES (?, ?, ?, ?)",
+                (
+                    user_id,
+                    first_date.isoformat(),
+                    watermark.isoformat(),
+                    datetime.now().isoformat(),
+                ),
+            )
+            self._conn.commit()
+
+    def get_rolling_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the persisted rolling statistics state for a user, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM rolling_stats WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def save_rolling_stats(self, user_id: str, state: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rolling_stats (user_id, data) VALUES (?, ?)",
+                (user_id, json.dumps(state)),
+            )
+            self._conn.commit()
+
+    def get_training_load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the persisted training load state for a user, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM training_load WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def save_training_load(self, user_id: str, state: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO training_load (user_id, data) VALUES (?, ?)",
+                (user_id, json.dumps(state)),
+            )
+            self._conn.commit()
@@ -0,0 +1,262 @@
+import logging
+import warnings
+from statistics import NormalDist
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.models.history_frame import HistoryFrame
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump whenever keys or semantics of the findings change
+ANALYSIS_VERSION = "1"
+
+# Metrics whose response to training load is analysed (the InsightsAgent ignores sleep)
+RESPONSE_METRICS = ("resting_heart_rate", "hrv", "stress_score")
+# Metrics checked for weekday effects and anomalies
+PATTERN_METRICS = ("resting_heart_rate", "hrv", "stress_score", "steps")
+
+# Day offsets between a training day and the metric it may affect
+MAX_LAG_DAYS = 3
+# Family-wise significance level; each test family is Bonferroni-corrected
+SIGNIFICANCE_LEVEL = 0.05
+# Smallest samples worth testing
+MIN_PAIRED_DAYS = 14
+MIN_LOAD_DAYS = 4
+MIN_WEEKDAY_DAYS = 4
+# Trailing days used as the robust baseline for anomaly flags
+ANOMALY_BASELINE_DAYS = 28
+MIN_ANOMALY_BASELINE_DAYS = 7
+ANOMALY_Z = 3.5
+
+# Caps that keep the findings a fixed size whatever the window length
+MAX_CORRELATIONS = 8
+MAX_WEEKDAY_EFFECTS = 5
+MAX_ANOMALIES = 10
+
+WEEKDAYS = (
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+)
+
+
+def _critical_z(tests: int) -> float:
+    return NormalDist().inv_cdf(1 - SIGNIFICANCE_LEVEL / (2 * max(tests, 1)))
+
+
+def _calendar(history: HistoryFrame):
+    """
+    Dense daily grid from the first to the last summary day.
+    Returns (days, metrics[M, D] with NaN for missing days, load[T, D], types).
+    Load is activity minutes per type, counting days that have no summary.
+    """
+    first = history.dates[0]
+    days = np.arange(first, history.dates[-1] + np.timedelta64(1, "D"))
+    offsets = (history.dates - first).astype(int)
+
+    metrics = np.full((len(PATTERN_METRICS), len(days)), np.nan)
+    for row, name in enumerate(PATTERN_METRICS):
+        present = history.masks[name]
+        metrics[row, offsets[present]] = history.values[name][present]
+
+    types, type_index = np.unique(history.activity_type, return_inverse=True)
+    activity_offsets = (history.activity_start.astype("datetime64[D]") - first).astype(
+        int
+    )
+    inside = (activity_offsets >= 0) & (activity_offsets < len(days))
+    minutes = np.where(
+        history.activity_masks["duration_minutes"],
+        history.activity_values["duration_minutes"],
+        0.0,
+    )
+    load = np.zeros((len(types), len(days)))
+    np.add.at(load, (type_index[inside], activity_offsets[inside]), minutes[inside])
+    return days, metrics, load, types
+
+
+def _load_correlations(
+    metrics: np.ndarray, load: np.ndarray, types: np.ndarray
+) -> List[Dict[str, Any]]:
+    """
+    Pearson correlation between each activity type's daily load and each response
+    metric 1..MAX_LAG_DAYS days later. Keeps the strongest significant lag per pair.
+    """
+    responses = metrics[[PATTERN_METRICS.index(name) for name in RESPONSE_METRICS]]
+    trained = load > 0
+    eligible = trained.sum(axis=1) >= MIN_LOAD_DAYS
+    critical = _critical_z(int(eligible.sum()) * len(RESPONSE_METRICS) * MAX_LAG_DAYS)
+
+    best: Dict[tuple, Dict[str, Any]] = {}
+    for lag in range(1, MAX_LAG_DAYS + 1):
+        x = load[:, :-lag]  # [T, N]
+        y = responses[:, lag:]  # [M, N]
+        valid = ~np.isnan(y)
+        y0 = np.where(valid, y, 0.0)
+        v = valid.astype(float)
+
+        # Pairwise sums over the days where the metric is present, for every (type, metric)
+        n = v.sum(axis=1)[None, :]
+        sx, sxx = x @ v.T, (x * x) @ v.T
+        sy, syy = y0.sum(axis=1)[None, :], (y0 * y0).sum(axis=1)[None, :]
+        sxy = x @ y0.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = sxy / n - (sx / n) * (sy / n)
+            var_x = sxx / n - (sx / n) ** 2
+            var_y = syy / n - (sy / n) ** 2
+            r = cov / np.sqrt(var_x * var_y)
+            z = np.arctanh(np.clip(r, -0.999999, 0.999999)) * np.sqrt(n - 3)
+
+            # Effect size: mean metric after training days vs after rest days
+            after = trained[:, :-lag].astype(float)
+            after_count = after @ v.T
+            rest_count = (1 - after) @ v.T
+            effect = (after @ y0.T) / after_count - ((1 - after) @ y0.T) / rest_count
+
+        significant = (
+            eligible[:, None]
+            & (n >= MIN_PAIRED_DAYS)
+            & (after_count > 0)
+            & (rest_count > 0)
+            & (np.abs(z) >= critical)
+        )
+        for t, m in zip(*np.nonzero(significant)):
+            key = (t, m)
+            if key in best and abs(best[key]["z"]) >= abs(z[t, m]):
+                continue
+            best[key] = {
+                "activity_type": str(types[t]),
+                "metric": RESPONSE_METRICS[m],
+                "lag_days": lag,
+                "correlation": round(float(r[t, m]), 2),
+                "effect": round(float(effect[t, m]), 1),
+                "training_days": int(trained[t].sum()),
+                "paired_days": int(n[0, m]),
+                "z": round(float(z[t, m]), 2),
+            }
+
+    findings = sorted(best.values(), key=lambda finding: -abs(finding["z"]))
+    return findings[:MAX_CORRELATIONS]
+
+
+def _weekday_effects(days: np.ndarray, metrics: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Weekdays whose mean differs from the other days (Welch z-test per weekday).
+    """
+    # 1970-01-01 was a Thursday
+    weekday = (days.astype(int) + 3) % 7
+    one_hot = (weekday[None, :] == np.arange(7)[:, None]).astype(float)  # [7, D]
+    valid = ~np.isnan(metrics)
+    y0 = np.where(valid, metrics, 0.0)
+    v = valid.astype(float)
+
+    n_day = one_hot @ v.T  # [7, M]
+    n_all = v.sum(axis=1)[None, :]
+    n_rest = n_all - n_day
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sum_day, sq_day = one_hot @ y0.T, one_hot @ (y0 * y0).T
+        sum_all, sq_all = y0.sum(axis=1)[None, :], (y0 * y0).sum(axis=1)[None, :]
+        mean_day = sum_day / n_day
+        mean_rest = (sum_all - sum_day) / n_rest
+        var_day = np.maximum(sq_day / n_day - mean_day**2, 0.0)
+        var_rest = np.maximum((sq_all - sq_day) / n_rest - mean_rest**2, 0.0)
+        z = (mean_day - mean_rest) / np.sqrt(var_day / n_day + var_rest / n_rest)
+
+    critical = _critical_z(7 * len(PATTERN_METRICS))
+    significant = (
+        (n_day >= MIN_WEEKDAY_DAYS)
+        & (n_rest >= MIN_WEEKDAY_DAYS)
+        & np.isfinite(z)
+        & (np.abs(z) >= critical)
+    )
+    # One strong weekday also shifts the "other days" mean of every other weekday;
+    # report the strongest per metric and only others of comparable size
+    strongest = np.where(significant, np.abs(mean_day - mean_rest), 0.0).max(axis=0)
+    significant &= np.abs(mean_day - mean_rest) >= strongest[None, :] / 2
+
+    findings = [
+        {
+            "metric": PATTERN_METRICS[m],
+            "weekday": WEEKDAYS[d],
+            "mean": round(float(mean_day[d, m]), 1),
+            "other_days_mean": round(float(mean_rest[d, m]), 1),
+            "difference": round(float(mean_day[d, m] - mean_rest[d, m]), 1),
+            "days": int(n_day[d, m]),
+            "z": round(float(z[d, m]), 2),
+        }
+        for d, m in zip(*np.nonzero(significant))
+    ]
+    findings.sort(key=lambda finding: -abs(finding["z"]))
+    return findings[:MAX_WEEKDAY_EFFECTS]
+
+
+def _anomalies(days: np.ndarray, metrics: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Days far from the trailing median, measured in robust (MAD-based) z-scores.
+    Newest first.
+    """
+    window = ANOMALY_BASELINE_DAYS
+    padded = np.concatenate(
+        (np.full((metrics.shape[0], window), np.nan), metrics), axis=1
+    )
+    # [M, D, window] of the days strictly before each day
+    trailing = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)[
+        :, : metrics.shape[1]
+    ]
+    counts = (~np.isnan(trailing)).sum(axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # Windows with no data yet give all-NaN slices; they are masked out below
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(trailing, axis=2)
+        mad = np.nanmedian(np.abs(trailing - median[..., None]), axis=2)
+        robust_z = (metrics - median) / (1.4826 * mad)
+
+    flagged = (
+        (counts >= MIN_ANOMALY_BASELINE_DAYS)
+        & np.isfinite(robust_z)
+        & (np.abs(robust_z) >= ANOMALY_Z)
+    )
+    metric_index, day_index = np.nonzero(flagged)
+    order = np.argsort(-day_index, kind="stable")[:MAX_ANOMALIES]
+    return [
+        {
+            "date": str(days[day_index[i]]),
+            "metric": PATTERN_METRICS[metric_index[i]],
+            "value": round(float(metrics[metric_index[i], day_index[i]]), 1),
+            "baseline_median": round(float(median[metric_index[i], day_index[i]]), 1),
+            "robust_z": round(float(robust_z[metric_index[i], day_index[i]]), 1),
+        }
+        for i in order
+    ]
+
+
+def find_significant_patterns(history: HistoryFrame) -> Dict[str, Any]:
+    """
+    Statistically significant patterns in a user's history, computed locally:
+    lagged correlations between activity load (minutes by type) and next-day
+    RHR/HRV/stress, day-of-week effects, and anomalous days.
+    The output size is capped, so phrasing it costs the same for 7 or 365 days.
+    """
+    findings: Dict[str, Any] = {
+        "analysis_version": ANALYSIS_VERSION,
+        "days_analyzed": len(history),
+        "activities_analyzed": history.num_activities,
+        "load_correlations": [],
+        "day_of_week_effects": [],
+        "anomalies": [],
+    }
+    if not len(history):
+        return findings
+
+    days, metrics, load, types = _calendar(history)
+    findings["load_correlations"] = _load_correlations(metrics, load, types)
+    findings["day_of_week_effects"] = _weekday_effects(days, metrics)
+    findings["anomalies"] = _anomalies(days, metrics)
+    return findings
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Set
+from zoneinfo import ZoneInfo
+
+try:
+    from app.models.history_frame import HistoryFrame
+    from app.services.async_garmin_service import AsyncGarminService
+    from app.services.garmin_client_registry import GarminClientRegistry
+    from app.services.recovery_scoring import BASELINE_DAYS
+except ImportError:
+    # Fallback for local testing if path setup is different
+    import sys
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+    from app.models.history_frame import HistoryFrame
+    from app.services.async_garmin_service import AsyncGarminService
+    from app.services.garmin_client_registry import GarminClientRegistry
+    from app.services.recovery_scoring import BASELINE_DAYS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.getenv("GARMIN_PREFETCH_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+PREFETCH_INTERVAL_SECONDS = float(os.getenv("GARMIN_PREFETCH_INTERVAL_SECONDS", "1800"))
+# Sleep data lands after the user wakes up, so poll more often in the morning
+PREFETCH_MORNING_INTERVAL_SECONDS = float(
+    os.getenv("GARMIN_PREFETCH_MORNING_INTERVAL_SECONDS", "300")
+)
+PREFETCH_MORNING_HOURS = os.getenv("GARMIN_PREFETCH_MORNING_HOURS", "5-11")
+# IANA timezone the morning hours are read in (e.g. "Europe/Berlin"); the server's
+# local time when unset. One zone for all users, not each user's own timezone.
+PREFETCH_TIMEZONE = os.getenv("GARMIN_PREFETCH_TIMEZONE")
+# Cached entries older than this are ignored and the request fetches live data
+PREFETCH_TTL_SECONDS = float(os.getenv("GARMIN_PREFETCH_TTL_SECONDS", "3600"))
+# Days of history kept warm: the recovery baseline window used by daily guidance
+PREFETCH_HISTORY_DAYS = BASELINE_DAYS
+
+
+@dataclass
+class PrefetchedDay:
+    """
+    Recent history for one user, ending today.
+    """
+
+    day: date
+    history: HistoryFrame
+    fetched_at: float = field(default_factory=time.monotonic)
+
+
+class DailyPrefetcher:
+    """
+    In-process background scheduler that keeps today's Garmin data warm.
+    Registered users are polled on a fixed cadence (faster during the morning hours)
+    and the results land in a shared in-memory cache, so the daily guidance workflow
+    can skip Garmin entirely when the cache is fresh.
+    """
+
+    def __init__(
+        self,
+        async_garmin_service: AsyncGarminService,
+        interval_seconds: float = PREFETCH_INTERVAL_SECONDS,
+        morning_interval_seconds: float = PREFETCH_MORNING_INTERVAL_SECONDS,
+        morning_hours: str = PREFETCH_MORNING_HOURS,
+        ttl_seconds: float = PREFETCH_TTL_SECONDS,
+        timezone: Optional[str] = PREFETCH_TIMEZONE,
+    ):
+        self.async_garmin_service = async_garmin_service
+        self.interval_seconds = interval_seconds
+        self.morning_interval_seconds = morning_interval_seconds
+        morning_start, morning_end = (int(hour) for hour in morning_hours.split("-"))
+        self.morning_hours = range(morning_start, morning_end)
+        self.ttl_seconds = ttl_seconds
+        self.timezone = ZoneInfo(timezone) if timezone else None
+
+        self._users: Set[str] = set()
+        self._cache: Dict[str, PrefetchedDay] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, user_id: str):
+        """
+        Add a user to the polling set. Takes effect on the next tick.
+        """
+        self._users.add(user_id)
+
+    def unregister(self, user_id: str):
+        self._users.discard(user_id)
+        self._cache.pop(user_id, None)
+
+    def get(self, user_id: str) -> Optional[PrefetchedDay]:
+        """
+        Return today's prefetched data for a user if it is fresh, otherwise None.
+        """
+        entry = self._cache.get(user_id)
+        if entry is None or entry.day != date.today():
+            return None
+        if time.monotonic() - entry.fetched_at > self.ttl_seconds:
+            return None
+        return entry
+
+    def current_interval(self, now: Optional[datetime] = None) -> float:
+        """
+        Polling interval for the current hour, read in the configured timezone
+        (server-local time by default).
+        """
+        now = now or datetime.now(self.timezone)
+        if now.hour in self.morning_hours:
+            return self.morning_interval_seconds
+        return self.interval_seconds
+
+    async def refresh(self, user_id: str) -> PrefetchedDay:
+        """
+        Fetch today's data and the recent history for one user into the cache.
+        Polling does not count as use of the user's Garmin session, so users who
+        stop making requests still idle-expire.
+        """
+        today = date.today()
+        with GarminClientRegistry.untouched():
+            summaries, activities = await self.async_garmin_service.get_history(
+                user_id,
+                "internal",
+                "internal",
+                today - timedelta(days=PREFETCH_HISTORY_DAYS),
+                today,
+            )
+        entry = PrefetchedDay(
+            day=today, history=HistoryFrame.from_models(summaries, activities)
+        )
+        self._cache[user_id] = entry
+        return entry
+
+    async def refresh_all(self):
+        """
+        Refresh every registered user. Failures are logged and leave the old entry in place.
+        Users without a live Garmin session (never logged in or expired) are dropped.
+        The check does not count as use and does not restore cached sessions.
+        """
+        user_ids = []
+        for user_id in list(self._users):
+            if self.async_garmin_service.has_active_session(user_id):
+                user_ids.append(user_id)
+            else:
+                self.unregister(user_id)
+
+        results = await asyncio.gather(
+            *(self.refresh(user_id) for user_id in user_ids), return_exceptions=True
+        )
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Prefetch failed for user {user_id}: {result}")
+
+    def start(self):
+        """
+        Start the polling loop on the running event loop.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Garmin prefetch scheduler started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            if self._users:
+                await self.refresh_all()
+            await asyncio.sleep(self.current_interval())
@@ -0,0 +1,129 @@
+import csv
+import io
+import logging
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from app.services.serialization import dumps
+except ImportError:
+    # Fallback for local testing if path setup is different
+    import os
+    import sys
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+    from app.services.serialization import dumps
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Lists of at least this many dicts, and dicts of at least this many dicts sharing
+# the same keys, are rendered as tables
+MIN_TABLE_ROWS = 2
+# Decimals kept for floats (trailing zeros are dropped)
+FLOAT_DECIMALS = 2
+TABLE_DELIMITER = "|"
+
+# Appended to the system prompt of agents that receive tabular input
+TABULAR_PROMPT_NOTE = """
+INPUT ENCODING:
+Lists of records (e.g. `daily_summaries`, `activities`) and objects of same-shaped records
+(e.g. per-metric statistics) are not inlined in the JSON. Their place holds a "<table NAME>"
+marker and the records follow the JSON as a table: a `## NAME` line, a header row with the
+field names, then one row per record. For objects the first column, `key`, holds the key of
+each record. Cells are separated by "|"; an empty cell means the value is missing. Numbers
+are in the unit named by the field (minutes, km, kg, bpm)."""
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        text = f"{value:.{FLOAT_DECIMALS}f}".rstrip("0").rstrip(".")
+        return "0" if text == "-0" else text
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="minutes" if not value.second else "seconds")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (dict, list, tuple)):
+        return dumps(value)
+    return str(value)
+
+
+def _table_rows(value: Any) -> Optional[List[Dict[str, Any]]]:
+    """
+    The records of a list of dicts, or of a dict of same-shaped dicts (the outer
+    key becomes a leading "key" column). None for anything else.
+    """
+    if len(value) < MIN_TABLE_ROWS:
+        return None
+    if isinstance(value, list):
+        if all(isinstance(row, dict) for row in value):
+            return value
+        return None
+    rows = list(value.values())
+    if all(isinstance(row, dict) for row in rows) and all(
+        row.keys() == rows[0].keys() for row in rows
+    ):
+        return [{"key": key, **row} for key, row in value.items()]
+    return None
+
+
+def _extract_tables(
+    value: Any, path: str, tables: List[Tuple[str, List[Dict[str, Any]]]]
+) -> Any:
+    """
+    Copy of value with every table replaced by its marker, collecting the tables.
+    """
+    rows = _table_rows(value) if isinstance(value, (list, dict)) else None
+    if rows is not None:
+        tables.append((path, rows))
+        return f"<table {path}>"
+    if isinstance(value, dict):
+        return {
+            key: _extract_tables(item, f"{path}.{key}" if path else str(key), tables)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [
+            _extract_tables(item, f"{path}[{index}]", tables)
+            for index, item in enumerate(value)
+        ]
+    return value
+
+
+def _render_table(name: str, rows: List[Dict[str, Any]]) -> str:
+    # Union of the keys in first-seen order, without columns that are always missing
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    columns = [c for c in columns if any(row.get(c) is not None for row in rows)]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=TABLE_DELIMITER, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows([_cell(row.get(column)) for column in columns] for row in rows)
+    return f"## {name}\n{buffer.getvalue().rstrip()}"
+
+
+def encode_tabular(user_input: Any) -> str:
+    """
+    Compact JSON with every list of records moved out into a header-plus-rows table,
+    so field names are written once per table instead of once per row.
+    Inputs without such lists encode exactly like dumps().
+    """
+    tables: List[Tuple[str, List[Dict[str, Any]]]] = []
+    remainder = _extract_tables(user_input, "", tables)
+    if not tables:
+        return dumps(user_input)
+    return "\n\n".join(
+        [dumps(remainder)] + [_render_table(name, rows) for name, rows in tables]
+    )
+
+
+# Prompt encodings an agent can select through BaseAgent.prompt_format
+PROMPT_FORMATS: Dict[str, Callable[[Any], str]] = {
+    "json": dumps,
+    "tabular": encode_tabular,
+}
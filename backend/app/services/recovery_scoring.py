@@ -0,0 +1,240 @@
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.models.history_frame import HistoryFrame
+from app.services.rolling_stats import RollingStats
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Calendar window (ending at the scored day) used for the RHR and HRV baselines
+BASELINE_DAYS = 28
+# Fewest prior days with data needed before a baseline is trusted
+MIN_BASELINE_DAYS = 3
+
+# When enabled, the AnalysisAgent still writes the prose around the local scores
+RECOVERY_NARRATION = os.getenv("FITSENSE_RECOVERY_NARRATION", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Thresholds mirror the decision rules in AnalysisAgent's system prompt
+RHR_ELEVATED_BPM = 3.0
+RHR_DECREASING_BPM = -2.0
+STRESS_HIGH = 50
+STRESS_LOW = 30
+HRV_LOW_Z = -1.0
+HRV_UNBALANCED_Z = -0.5
+
+
+@dataclass
+class RecoveryAssessment:
+    """
+    Result of local recovery scoring.
+    `result` follows the AnalysisAgent output schema (None if the data was too thin
+    to score). `ambiguous` is set when the metrics disagree and the LLM should decide.
+    """
+
+    result: Optional[Dict[str, Any]]
+    ambiguous: bool
+    reasons: List[str] = field(default_factory=list)
+
+
+class RecoveryScorer:
+    """
+    Deterministic recovery scoring from a HistoryFrame.
+    Computes the RHR delta against a trailing baseline, an HRV z-score and a stress
+    band for one day, applies the same decision rules the AnalysisAgent prompt
+    describes, and returns the agent's recovery_status/recovery_score/
+    key_metrics_summary schema without an LLM round trip.
+    """
+
+    def __init__(self, baseline_days: int = BASELINE_DAYS):
+        self.baseline_days = baseline_days
+
+    def assess(
+        self,
+        history: HistoryFrame,
+        as_of: Optional[date] = None,
+        baselines: Optional[RollingStats] = None,
+    ) -> RecoveryAssessment:
+        """
+        Score recovery for as_of (default: the last day in the history).
+        With rolling baselines that already include as_of, the RHR/HRV baselines are
+        read from them instead of being recomputed from the history.
+        """
+        if not len(history):
+            return RecoveryAssessment(None, True, ["No daily summaries"])
+
+        as_of = as_of or history.dates[-1].astype(object)
+        window = history.last(self.baseline_days, as_of)
+        if not len(window) or window.dates[-1] != np.datetime64(as_of, "D"):
+            return RecoveryAssessment(None, True, [f"No summary for {as_of}"])
+
+        stress = self._latest(window, "stress_score")
+        rhr = self._latest(window, "resting_heart_rate")
+        rhr_baseline, rhr_days = self._baseline(
+            window, "resting_heart_rate", baselines, as_of
+        )
+        hrv = self._latest(window, "hrv")
+        hrv_baseline, hrv_days = self._baseline(window, "hrv", baselines, as_of)
+
+        if stress is None or rhr is None or rhr_days < MIN_BASELINE_DAYS:
+            return RecoveryAssessment(
+                None, True, ["Not enough stress/RHR data for a local baseline"]
+            )
+
+        rhr_delta = rhr - rhr_baseline[0]
+        hrv_z = None
+        if hrv is not None and hrv_days >= MIN_BASELINE_DAYS:
+            hrv_z = (hrv - hrv_baseline[0]) / max(hrv_baseline[1], 1.0)
+
+        if stress > STRESS_HIGH:
+            stress_level = "High"
+        elif stress < STRESS_LOW:
+            stress_level = "Low"
+        else:
+            stress_level = "Moderate"
+        rhr_trend = (
+            "Elevated"
+            if rhr_delta > RHR_ELEVATED_BPM
+            else "Decreasing" if rhr_delta < RHR_DECREASING_BPM else "Stable"
+        )
+        hrv_status = (
+            None
+            if hrv_z is None
+            else (
+                "Low"
+                if hrv_z < HRV_LOW_Z
+                else "Unbalanced" if hrv_z < HRV_UNBALANCED_Z else "Balanced"
+            )
+        )
+
+        score = 100.0
+        score -= np.clip((stress - 25) * 0.8, 0, 40)
+        score -= np.clip(rhr_delta * 5, 0, 30)
+        if hrv_z is not None:
+            score -= np.clip(-hrv_z * 10, 0, 30)
+        score = int(round(np.clip(score, 0, 100)))
+
+        red_flags = [
+            flag
+            for flag, raised in (
+                ("High stress", stress > STRESS_HIGH),
+                ("Elevated RHR", rhr_trend == "Elevated"),
+                ("Low HRV", hrv_status == "Low"),
+            )
+            if raised
+        ]
+
+        if stress > STRESS_HIGH and rhr_trend == "Elevated":
+            status, score = "poor", min(score, 39)
+        elif hrv_z is not None and hrv_z >= 0 and not red_flags:
+            status, score = "excellent", max(score, 80)
+        elif score >= 65:
+            status = "good"
+        else:
+            status = "moderate"
+
+        # One red flag without the others is exactly the mixed picture the LLM is for
+        ambiguous = status != "poor" and bool(red_flags)
+
+        trends = [
+            f"RHR {rhr:.0f} bpm is {rhr_delta:+.1f} bpm vs the {rhr_days}-day baseline "
+            f"({rhr_baseline[0]:.1f})",
+            f"Stress {stress:.0f} ({stress_level.lower()})",
+        ]
+        if hrv_z is not None:
+            trends.append(
+                f"HRV {hrv:.0f} ms is {hrv_z:+.1f} SD from the {hrv_days}-day baseline "
+                f"({hrv_baseline[0]:.0f} ms)"
+            )
+        rising = self._rising_days(window, "resting_heart_rate")
+        if rising >= 2:
+            trends.append(f"RHR has risen for {rising} consecutive days")
+
+        result = {
+            "recovery_status": status,
+            "recovery_score": score,
+            "key_metrics_summary": {
+                "stress_level": stress_level,
+                "rhr_trend": rhr_trend,
+                "hrv_status": hrv_status or "Unknown",
+            },
+            "trends_identified": trends,
+            "recommendation": dict(_RECOMMENDATIONS[status]),
+            "reasoning": (
+                f"Local scoring: stress {stress:.0f}, RHR {rhr_delta:+.1f} bpm vs baseline"
+                + (f", HRV z-score {hrv_z:+.1f}" if hrv_z is not None else "")
+                + (f". Flags: {', '.join(red_flags)}." if red_flags else ".")
+            ),
+            "source": "local",
+        }
+        return RecoveryAssessment(result, ambiguous, red_flags)
+
+    @staticmethod
+    def _latest(window: HistoryFrame, name: str) -> Optional[float]:
+        if not window.masks[name][-1]:
+            return None
+        return float(window.values[name][-1])
+
+    def _baseline(
+        self,
+        window: HistoryFrame,
+        name: str,
+        baselines: Optional[RollingStats],
+        as_of: date,
+    ):
+        """
+        ((mean, std), days) over all days of the window before the last one.
+        """
+        if baselines is not None:
+            prior = baselines.prior_baseline(name, self.baseline_days, as_of)
+            if prior is not None:
+                return prior
+
+        prior = window.values[name][:-1][window.masks[name][:-1]]
+        if not len(prior):
+            return (np.nan, np.nan), 0
+        return (float(prior.mean()), float(prior.std())), len(prior)
+
+    @staticmethod
+    def _rising_days(window: HistoryFrame, name: str) -> int:
+        # Consecutive day-over-day increases ending at the last day
+        values = window.values[name][window.masks[name]]
+        rises = np.diff(values) > 0
+        if not len(rises) or not rises[-1]:
+            return 0
+        falls = np.flatnonzero(~rises)
+        return int(len(rises) - (falls[-1] + 1 if len(falls) else 0))
+
+
+_RECOMMENDATIONS = {
+    "poor": {
+        "action": "Active Recovery",
+        "intensity_level": "Low",
+        "advice": "Stress and resting heart rate are both up. Keep today to light activity only.",
+    },
+    "moderate": {
+        "action": "Maintenance",
+        "intensity_level": "Moderate",
+        "advice": "Recovery is partial. Train at a moderate effort and avoid max efforts.",
+    },
+    "good": {
+        "action": "Maintenance",
+        "intensity_level": "Moderate",
+        "advice": "Recovery looks good. Proceed with planned training.",
+    },
+    "excellent": {
+        "action": "Train Hard",
+        "intensity_level": "High",
+        "advice": "RHR is stable and HRV is at or above baseline. High intensity is fine today.",
+    },
+}
@@ -0,0 +1,283 @@
+import logging
+import math
+from collections import deque
+from datetime import date
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+try:
+    from app.models.garmin_data import GarminData
+except ImportError:
+    # Fallback for local testing if path setup is different
+    import os
+    import sys
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+    from app.models.garmin_data import GarminData
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# GarminData fields with a rolling baseline
+ROLLING_METRICS = (
+    "resting_heart_rate",
+    "hrv",
+    "stress_score",
+    "steps",
+    "total_sleep_minutes",
+)
+# Calendar-day windows; each also has an EWMA with span equal to the window
+ROLLING_WINDOWS = (7, 28, 90)
+
+# Bump when the persisted layout changes; older states are rebuilt from scratch
+STATE_VERSION = 1
+
+
+class _Window:
+    """
+    Sliding calendar window over (day ordinal, value) pairs.
+    Keeps running sums for mean/variance and monotonic deques for min/max,
+    so pushing a day is amortized O(1).
+    """
+
+    __slots__ = ("days", "entries", "total", "total_sq", "mins", "maxs")
+
+    def __init__(self, days: int):
+        self.days = days
+        self.entries: Deque[Tuple[int, float]] = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.mins: Deque[Tuple[int, float]] = deque()
+        self.maxs: Deque[Tuple[int, float]] = deque()
+
+    def push(self, day: int, value: float):
+        self.entries.append((day, value))
+        self.total += value
+        self.total_sq += value * value
+        while self.mins and self.mins[-1][1] >= value:
+            self.mins.pop()
+        self.mins.append((day, value))
+        while self.maxs and self.maxs[-1][1] <= value:
+            self.maxs.pop()
+        self.maxs.append((day, value))
+        self._evict(day)
+
+    def pop_last(self):
+        """
+        Remove the most recent entry (used when the latest day is revised).
+        Min/max deques are rebuilt from the window, which is bounded by its length.
+        """
+        _, value = self.entries.pop()
+        self.total -= value
+        self.total_sq -= value * value
+        self.mins.clear()
+        self.maxs.clear()
+        for day, value in self.entries:
+            while self.mins and self.mins[-1][1] >= value:
+                self.mins.pop()
+            self.mins.append((day, value))
+            while self.maxs and self.maxs[-1][1] <= value:
+                self.maxs.pop()
+            self.maxs.append((day, value))
+
+    def _evict(self, day: int):
+        # Keep days in (day - window, day]
+        oldest = day - self.days
+        while self.entries and self.entries[0][0] <= oldest:
+            _, value = self.entries.popleft()
+            self.total -= value
+            self.total_sq -= value * value
+        while self.mins and self.mins[0][0] <= oldest:
+            self.mins.popleft()
+        while self.maxs and self.maxs[0][0] <= oldest:
+            self.maxs.popleft()
+
+    def summary(self) -> Dict[str, Any]:
+        count = len(self.entries)
+        if not count:
+            return {
+                "count": 0,
+                "mean": None,
+                "variance": None,
+                "std": None,
+                "min": None,
+                "max": None,
+            }
+        mean = self.total / count
+        variance = max(self.total_sq / count - mean * mean, 0.0)
+        return {
+            "count": count,
+            "mean": mean,
+            "variance": variance,
+            "std": math.sqrt(variance),
+            "min": self.mins[0][1],
+            "max": self.maxs[0][1],
+        }
+
+
+class MetricStats:
+    """
+    Rolling mean, variance, min/max and EWMA of one metric over several windows.
+    Days are expected in ascending order; re-ingesting the latest day replaces it,
+    and an older day triggers a replay of the retained window.
+    """
+
+    def __init__(self, windows: Tuple[int, ...] = ROLLING_WINDOWS):
+        self.windows = {days: _Window(days) for days in windows}
+        self.ewma: Dict[int, Optional[float]] = {days: None for days in windows}
+        # EWMA before the latest day, so a revision of that day is exact
+        self._prev_ewma: Dict[int, Optional[float]] = dict(self.ewma)
+        self.last_day: Optional[int] = None
+
+    @property
+    def _longest(self) -> _Window:
+        return self.windows[max(self.windows)]
+
+    def update(self, day: int, value: Optional[float]):
+        if self.last_day is not None and day < self.last_day:
+            self._replay(day, value)
+            return
+        if day == self.last_day:
+            for window in self.windows.values():
+                window.pop_last()
+            self.ewma = dict(self._prev_ewma)
+            self.last_day = (
+                self._longest.entries[-1][0] if self._longest.entries else None
+            )
+        if value is None:
+            return
+
+        for window in self.windows.values():
+            window.push(day, value)
+        self._prev_ewma = dict(self.ewma)
+        for days, previous in self.ewma.items():
+            alpha = 2.0 / (days + 1)
+            self.ewma[days] = (
+                value if previous is None else previous + alpha * (value - previous)
+            )
+        self.last_day = day
+
+    def _replay(self, day: int, value: Optional[float]):
+        """
+        Rebuild from the longest window with an out-of-order day applied.
+        The EWMA restarts from the retained days, so it is approximate after a backfill.
+        """
+        entries = {d: v for d, v in self._longest.entries}
+        if value is None:
+            entries.pop(day, None)
+        else:
+            entries[day] = value
+        self.__init__(tuple(self.windows))
+        for d in sorted(entries):
+            self.update(d, entries[d])
+
+    def summary(self, days: int) -> Dict[str, Any]:
+        return {**self.windows[days].summary(), "ewma": self.ewma[days]}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "entries": list(self._longest.entries),
+            "ewma": {str(days): value for days, value in self.ewma.items()},
+            "prev_ewma": {str(days): value for days, value in self._prev_ewma.items()},
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: Dict[str, Any], windows: Tuple[int, ...] = ROLLING_WINDOWS
+    ) -> "MetricStats":
+        stats = cls(windows)
+        for day, value in data["entries"]:
+            for window in stats.windows.values():
+                window.push(day, value)
+            stats.last_day = day
+        stats.ewma = {days: data["ewma"].get(str(days)) for days in windows}
+        stats._prev_ewma = {days: data["prev_ewma"].get(str(days)) for days in windows}
+        return stats
+
+
+class RollingStats:
+    """
+    Per-user rolling statistics for the recovery metrics, maintained on ingest.
+    GarminService feeds every newly fetched day through ingest() and persists the
+    state in the local store, so baselines are read without touching the history.
+    """
+
+    def __init__(self, windows: Tuple[int, ...] = ROLLING_WINDOWS):
+        self.window_days = tuple(windows)
+        self.metrics = {name: MetricStats(self.window_days) for name in ROLLING_METRICS}
+
+    def ingest(self, summaries: Iterable[GarminData]):
+        for summary in summaries:
+            day = summary.date.toordinal()
+            for name, stats in self.metrics.items():
+                value = getattr(summary, name)
+                stats.update(day, float(value) if value is not None else None)
+
+    def end_date(self, metric: str) -> Optional[date]:
+        """
+        Latest day with a value for the metric.
+        """
+        last_day = self.metrics[metric].last_day
+        return date.fromordinal(last_day) if last_day is not None else None
+
+    def baseline(self, metric: str, days: int) -> Dict[str, Any]:
+        """
+        count/mean/variance/std/min/max over the `days` window ending at end_date,
+        plus the EWMA with the same span.
+        """
+        return {
+            **self.metrics[metric].summary(days),
+            "end_date": self.end_date(metric),
+        }
+
+    def prior_baseline(
+        self, metric: str, days: int, as_of: date
+    ) -> Optional[Tuple[Tuple[float, float], int]]:
+        """
+        ((mean, std), count) over the `days` window ending at as_of, excluding as_of
+        itself. Derived from the running sums in O(1); None unless the latest value
+        is from as_of and the window is tracked.
+        """
+        stats = self.metrics[metric]
+        if days not in stats.windows or stats.last_day != as_of.toordinal():
+            return None
+        window = stats.windows[days]
+        latest = window.entries[-1][1]
+        count = len(window.entries) - 1
+        if count <= 0:
+            return (math.nan, math.nan), 0
+        mean = (window.total - latest) / count
+        variance = max((window.total_sq - latest * latest) / count - mean * mean, 0.0)
+        return (mean, math.sqrt(variance)), count
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        All baselines as {metric: {"7d": {...}, ...}}.
+        """
+        return {
+            name: {f"{days}d": self.baseline(name, days) for days in self.window_days}
+            for name in self.metrics
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION,
+            "windows": list(self.window_days),
+            "metrics": {name: stats.to_dict() for name, stats in self.metrics.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["RollingStats"]:
+        """
+        Restore a persisted state, or None if it was written by another layout.
+        """
+        if (
+            data.get("version") != STATE_VERSION
+            or tuple(data["windows"]) != ROLLING_WINDOWS
+        ):
+            return None
+        stats = cls()
+        for name, metric in data["metrics"].items():
+            if name in stats.metrics:
+                stats.metrics[name] = MetricStats.from_dict(metric, stats.window_days)
+        return stats
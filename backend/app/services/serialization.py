@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+from datetime import date, datetime
+from typing import Any
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "orjson" (default when installed) or "json"
+JSON_BACKEND = os.getenv("FITSENSE_JSON_BACKEND", "orjson" if orjson else "json")
+if JSON_BACKEND == "orjson" and orjson is None:
+    logger.warning(
+        "FITSENSE_JSON_BACKEND=orjson but orjson is not installed; using json"
+    )
+    JSON_BACKEND = "json"
+
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson is not None else 0
+)
+
+
+def _default(obj: Any) -> Any:
+    """
+    Fallback for types neither backend handles natively.
+    """
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+def dumpb(obj: Any) -> bytes:
+    """
+    Compact JSON (no indentation, no spaces after separators) as UTF-8 bytes.
+    Dates and datetimes are written as ISO 8601 strings.
+    """
+    if JSON_BACKEND == "orjson":
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return dumps(obj).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """
+    Compact JSON as a str, e.g. for LLM prompts.
+    """
+    if JSON_BACKEND == "orjson":
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode(
+            "utf-8"
+        )
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default)
+
+
+class CompactJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumpb (orjson when installed).
+    Return an instance directly from an endpoint to also skip FastAPI's
+    jsonable_encoder pass over the content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumpb(content)
@@ -0,0 +1,480 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from app.models.garmin_data import GarminActivity, GarminData
+    from app.models.history_frame import ACTIVITY_FIELDS, SUMMARY_FIELDS
+    from app.services.garmin_store import GarminStore
+except ImportError:
+    # Fallback for local testing if path setup is different
+    import os
+    import sys
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+    from app.models.garmin_data import GarminActivity, GarminData
+    from app.models.history_frame import ACTIVITY_FIELDS, SUMMARY_FIELDS
+    from app.services.garmin_store import GarminStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_USER_PREFIX = "synthetic-"
+ACTIVITY_TYPES = ("running", "cycling", "strength")
+
+# Expected episodes per user per year
+ILLNESS_RATE = 1.5
+OVERTRAINING_RATE = 0.5
+
+# Share of days where the watch did not record HRV / sleep
+HRV_MISSING_RATE = 0.03
+SLEEP_MISSING_RATE = 0.02
+
+# Rows per executemany batch when writing to the store
+STORE_BATCH_SIZE = 5000
+
+
+@dataclass
+class SyntheticPopulation:
+    """
+    A generated fleet of users sharing one calendar.
+    Daily summaries are [users, days] float arrays (NaN where missing) keyed by
+    GarminData field; activities are flat arrays sorted by user then start time,
+    with activity_offsets[u]:activity_offsets[u + 1] selecting user u's rows.
+    Episodes record the injected illness and overtraining blocks as ground truth.
+    """
+
+    user_ids: List[str]
+    dates: np.ndarray  # datetime64[D]
+    summaries: Dict[str, np.ndarray]
+    activities: Dict[str, np.ndarray]
+    activity_offsets: np.ndarray
+    episodes: List[Dict[str, Any]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._user_index = {user_id: i for i, user_id in enumerate(self.user_ids)}
+
+    def has_user(self, user_id: str) -> bool:
+        return user_id in self._user_index
+
+    @property
+    def num_activities(self) -> int:
+        return len(self.activities["start_time"])
+
+    def _day_range(self, start_date: date, end_date: date) -> slice:
+        lo = np.searchsorted(self.dates, np.datetime64(start_date, "D"))
+        hi = np.searchsorted(self.dates, np.datetime64(end_date, "D"), "right")
+        return slice(lo, hi)
+
+    def _activity_range(self, user: int, start_date: date, end_date: date) -> slice:
+        lo, hi = self.activity_offsets[user], self.activity_offsets[user + 1]
+        starts = self.activities["start_time"][lo:hi]
+        first = np.searchsorted(starts, np.datetime64(start_date, "s"))
+        last = np.searchsorted(starts, np.datetime64(end_date + timedelta(days=1), "s"))
+        return slice(lo + first, lo + last)
+
+    def summary_rows(
+        self, user: int, days: slice = slice(None)
+    ) -> List[Dict[str, Any]]:
+        """
+        Daily summaries of one user as GarminData-shaped dicts.
+        """
+        dates = self.dates[days].astype(object)
+        columns = {}
+        for name, kind in SUMMARY_FIELDS.items():
+            values = self.summaries[name][user, days]
+            present = ~np.isnan(values)
+            cast = np.where(present, values, 0).astype(kind).tolist()
+            columns[name] = [v if p else None for v, p in zip(cast, present.tolist())]
+        return [
+            {"date": day, **{name: column[i] for name, column in columns.items()}}
+            for i, day in enumerate(dates)
+        ]
+
+    def activity_rows(self, rows: slice) -> List[Dict[str, Any]]:
+        """
+        Activities (a slice of the flat arrays) as GarminActivity-shaped dicts.
+        """
+        columns = {
+            "activity_type": self.activities["activity_type"][rows].tolist(),
+            "start_time": self.activities["start_time"][rows].astype(object).tolist(),
+        }
+        for name, kind in ACTIVITY_FIELDS.items():
+            values = self.activities[name][rows]
+            present = ~np.isnan(values)
+            cast = np.where(present, values, 0).astype(kind).tolist()
+            columns[name] = [v if p else None for v, p in zip(cast, present.tolist())]
+        count = len(columns["activity_type"])
+        return [
+            {name: column[i] for name, column in columns.items()} for i in range(count)
+        ]
+
+    def daily_summaries(
+        self, user_id: str, start_date: date, end_date: date
+    ) -> List[GarminData]:
+        rows = self.summary_rows(
+            self._user_index[user_id], self._day_range(start_date, end_date)
+        )
+        return [GarminData(**row) for row in rows]
+
+    def iter_activities(
+        self, user_id: str, start_date: date, end_date: date
+    ) -> Iterator[GarminActivity]:
+        rows = self._activity_range(self._user_index[user_id], start_date, end_date)
+        for row in self.activity_rows(rows):
+            yield GarminActivity(**row)
+
+    def write_jsonl(self, path: str) -> int:
+        """
+        Write every record as one JSON line: daily summaries, activities and
+        episodes, each tagged with user_id and kind. Returns the number of lines.
+        """
+        lines = 0
+        with open(path, "w") as f:
+            for user, user_id in enumerate(self.user_ids):
+                batch = [
+                    {"user_id": user_id, "kind": "daily_summary", **row}
+                    for row in self.summary_rows(user)
+                ]
+                batch += [
+                    {"user_id": user_id, "kind": "activity", **row}
+                    for row in self.activity_rows(
+                        slice(
+                            self.activity_offsets[user], self.activity_offsets[user + 1]
+                        )
+                    )
+                ]
+                f.writelines(json.dumps(record, default=str) + "\n" for record in batch)
+                lines += len(batch)
+            for episode in self.episodes:
+                f.write(json.dumps({"kind": "episode", **episode}) + "\n")
+                lines += 1
+        return lines
+
+    def write_store(self, store: GarminStore) -> int:
+        """
+        Bulk load every user into the local store and mark their range as synced.
+        Returns the number of rows written.
+        """
+        first, last = self.dates[0].astype(object), self.dates[-1].astype(object)
+        written = 0
+        daily_rows, activity_rows = [], []
+        for user, user_id in enumerate(self.user_ids):
+            for row in self.summary_rows(user):
+                daily_rows.append(
+                    (user_id, row["date"].isoformat(), json.dumps(row, default=str))
+                )
+            for row in self.activity_rows(
+                slice(self.activity_offsets[user], self.activity_offsets[user + 1])
+            ):
+                activity_rows.append(
+                    (
+                        user_id,
+                        row["start_time"].isoformat(),
+                        row["activity_type"],
+                        json.dumps(row, default=str),
+                    )
+                )
+            if len(daily_rows) + len(activity_rows) >= STORE_BATCH_SIZE:
+                written += store.import_rows(daily_rows, activity_rows)
+                daily_rows, activity_rows = [], []
+        written += store.import_rows(daily_rows, activity_rows)
+
+        for user_id in self.user_ids:
+            store.update_sync_state(user_id, first, last)
+        return written
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "SyntheticPopulation":
+        """
+        Load a population written by write_jsonl.
+        """
+        summaries: Dict[str, List[Dict[str, Any]]] = {}
+        activities: Dict[str, List[Dict[str, Any]]] = {}
+        episodes = []
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                kind = record.pop("kind")
+                if kind == "episode":
+                    episodes.append(record)
+                    continue
+                user_id = record.pop("user_id")
+                target = summaries if kind == "daily_summary" else activities
+                target.setdefault(user_id, []).append(record)
+
+        user_ids = sorted(set(summaries) | set(activities))
+        all_days = sorted({row["date"] for rows in summaries.values() for row in rows})
+        dates = np.arange(
+            np.datetime64(all_days[0], "D"), np.datetime64(all_days[-1], "D") + 1
+        )
+
+        daily = {
+            name: np.full((len(user_ids), len(dates)), np.nan)
+            for name in SUMMARY_FIELDS
+        }
+        flat: Dict[str, list] = {
+            name: [] for name in ("activity_type", "start_time", *ACTIVITY_FIELDS)
+        }
+        offsets = [0]
+        for user, user_id in enumerate(user_ids):
+            rows = summaries.get(user_id, [])
+            index = (
+                np.array([row["date"] for row in rows], dtype="datetime64[D]")
+                - dates[0]
+            ).astype(int)
+            for name in SUMMARY_FIELDS:
+                daily[name][user, index] = [
+                    np.nan if row.get(name) is None else row[name] for row in rows
+                ]
+            rows = sorted(
+                activities.get(user_id, []), key=lambda row: row["start_time"]
+            )
+            for name in flat:
+                flat[name].extend(
+                    np.nan if row.get(name) is None else row[name] for row in rows
+                )
+            offsets.append(offsets[-1] + len(rows))
+
+        arrays = {
+            name: np.array(values, dtype=np.float64)
+            for name, values in flat.items()
+            if name in ACTIVITY_FIELDS
+        }
+        arrays["activity_type"] = np.array(flat["activity_type"], dtype=str)
+        arrays["start_time"] = np.array(flat["start_time"], dtype="datetime64[s]")
+        return cls(user_ids, dates, daily, arrays, np.array(offsets), episodes)
+
+
+def _episode_mask(
+    rng: np.random.Generator,
+    users: int,
+    days: int,
+    rate_per_day: float,
+    min_days: int,
+    max_days: int,
+) -> Tuple[np.ndarray, List[Tuple[int, int, int]]]:
+    """
+    Random episodes per user: returns a [users, days] mask and (user, start, end) tuples.
+    """
+    counts = rng.poisson(rate_per_day * days, size=users)
+    user = np.repeat(np.arange(users), counts)
+    start = rng.integers(0, days, size=len(user))
+    end = np.minimum(start + rng.integers(min_days, max_days + 1, size=len(user)), days)
+
+    # Mark each episode with +1 at its start and -1 after its end, then cumulate
+    edges = np.zeros((users, days + 1), dtype=np.int32)
+    np.add.at(edges, (user, start), 1)
+    np.add.at(edges, (user, end), -1)
+    mask = np.cumsum(edges, axis=1)[:, :days] > 0
+    return mask, list(zip(user.tolist(), start.tolist(), end.tolist()))
+
+
+def generate_population(
+    users: int,
+    years: float = 1.0,
+    seed: int = 0,
+    end_date: Optional[date] = None,
+) -> SyntheticPopulation:
+    """
+    Generate a reproducible synthetic population.
+
+    Each user gets their own baselines, training habits and episodes. Daily training
+    load (TRIMP) drives fitness/fatigue; fatigue above fitness, a shared AR(1) "strain"
+    factor and illness push RHR and stress up and HRV and sleep down together.
+    Overtraining blocks raise training frequency and duration for two to four weeks.
+    Everything is vectorized over users; only the recurrences loop over days.
+    """
+    rng = np.random.default_rng(seed)
+    end_date = end_date or date.today()
+    n_days = max(int(round(years * 365)), 1)
+    dates = np.arange(
+        np.datetime64(end_date - timedelta(days=n_days - 1), "D"),
+        np.datetime64(end_date, "D") + 1,
+    )
+    weekday = (dates.astype(int) + 3) % 7  # 1970-01-01 was a Thursday
+    shape = (users, n_days)
+
+    def per_user(mean: float, std: float, low: float, high: float) -> np.ndarray:
+        return np.clip(rng.normal(mean, std, users), low, high)[:, None]
+
+    # Per-user baselines; HRV is anti-correlated with RHR
+    age = per_user(40, 11, 18, 75)
+    max_hr = 208 - 0.7 * age + rng.normal(0, 5, (users, 1))
+    rhr_base = per_user(57, 6, 42, 78)
+    hrv_base = np.clip(110 - 1.1 * rhr_base + rng.normal(0, 8, (users, 1)), 18, 120)
+    stress_base = per_user(30, 7, 12, 55)
+    sleep_base = per_user(430, 30, 330, 520)
+    steps_base = np.exp(rng.normal(np.log(8000), 0.3, (users, 1)))
+    weight = per_user(74, 12, 45, 130)
+    sessions_per_week = per_user(3.5, 1.2, 1, 6.5)
+    type_weights = rng.dirichlet(np.ones(len(ACTIVITY_TYPES)), users)
+
+    # Episodes
+    illness, illness_spans = _episode_mask(rng, users, n_days, ILLNESS_RATE / 365, 3, 8)
+    overtraining, overtraining_spans = _episode_mask(
+        rng, users, n_days, OVERTRAINING_RATE / 365, 14, 28
+    )
+
+    # Training days and sessions (at most one per day)
+    weekend = weekday >= 5
+    train_prob = sessions_per_week / 7 * np.where(weekend, 1.3, 0.9)[None, :]
+    train_prob = np.where(overtraining, np.minimum(train_prob * 1.7, 0.95), train_prob)
+    trained = (rng.random(shape) < train_prob) & ~illness
+
+    session_type = np.argmax(
+        rng.random(shape)[..., None] < np.cumsum(type_weights, axis=1)[:, None, :],
+        axis=2,
+    )
+    base_minutes = np.array([45.0, 70.0, 50.0])[session_type]
+    duration = base_minutes * np.exp(rng.normal(0, 0.3, shape))
+    duration *= np.where(overtraining, 1.4, 1.0)
+    reserve = np.clip(
+        rng.beta(5, 3, shape) * np.where(session_type == 2, 0.8, 1.0), 0.2, 0.95
+    )
+    trimp = np.where(trained, duration * reserve * 0.64 * np.exp(1.92 * reserve), 0.0)
+
+    # Fitness/fatigue and the shared strain factor are recurrences over days
+    fitness, fatigue = np.zeros(shape), np.zeros(shape)
+    strain = np.zeros(shape)
+    k_fit, k_fat = np.exp(-1 / 42), np.exp(-1 / 7)
+    fit = np.full(users, 40.0)
+    fat = np.full(users, 40.0)
+    s = np.zeros(users)
+    shocks = rng.normal(0, 0.5, shape)
+    for d in range(n_days):
+        fit = k_fit * fit + (1 - k_fit) * trimp[:, d]
+        fat = k_fat * fat + (1 - k_fat) * trimp[:, d]
+        s = 0.7 * s + shocks[:, d]
+        fitness[:, d], fatigue[:, d], strain[:, d] = fit, fat, s
+
+    overreach = np.clip((fatigue - fitness) / np.maximum(fitness, 20.0), 0, None)
+    ill = illness.astype(float)
+    monday = (weekday == 0)[None, :]
+
+    def noise(std: float) -> np.ndarray:
+        return rng.normal(0, std, shape)
+
+    rhr = rhr_base - 0.03 * (fitness - 40) + 6 * overreach + 1.2 * strain + 8 * ill
+    rhr += noise(1.2)
+    hrv = hrv_base * (1 - 0.25 * overreach - 0.05 * strain - 0.3 * ill) + noise(3)
+    stress = stress_base + 12 * overreach + 5 * strain + 20 * ill + 5 * monday
+    stress += noise(5)
+    sleep = sleep_base - 10 * strain + 35 * weekend[None, :] + 30 * ill + noise(25)
+    steps = steps_base * (1 + 0.15 * ~weekend[None, :]) * (1 - 0.6 * ill)
+    steps += np.where(trained & (session_type == 0), duration * 160, 0) + noise(1200)
+
+    sleep = np.clip(sleep, 200, 660)
+    stress = np.clip(stress, 5, 95)
+    summaries = {
+        "resting_heart_rate": np.clip(rhr, 35, 110),
+        "hrv": np.clip(hrv, 8, 160),
+        "stress_score": stress,
+        "steps": np.clip(steps, 300, None),
+        "total_sleep_minutes": sleep,
+        "deep_sleep_minutes": sleep * np.clip(0.17 + noise(0.03), 0.05, 0.3),
+        "rem_sleep_minutes": sleep * np.clip(0.22 + noise(0.03), 0.1, 0.35),
+        "awake_minutes": np.clip(15 + 10 * ill + noise(8), 0, 90),
+        "sleep_score": np.clip(
+            55 + (sleep - 360) / 6 - 0.3 * (stress - 30) + noise(5), 20, 100
+        ),
+        "body_battery": np.clip(95 - 0.8 * stress - 20 * overreach + noise(6), 5, 100),
+        "active_minutes": np.where(trained, duration, 0) + np.clip(steps / 250, 0, 90),
+        "calories_burned": 1500 + 8 * weight + steps * 0.04 + trimp * 4,
+        "weight_kg": np.round(weight + np.cumsum(noise(0.05), axis=1), 1),
+        "body_fat_percentage": np.round(
+            np.repeat(per_user(20, 6, 6, 40), n_days, 1), 1
+        ),
+    }
+    summaries["light_sleep_minutes"] = (
+        summaries["total_sleep_minutes"]
+        - summaries["deep_sleep_minutes"]
+        - summaries["rem_sleep_minutes"]
+    )
+    summaries["muscle_mass_kg"] = np.round(
+        weight * (1 - summaries["body_fat_percentage"] / 100) * 0.55, 1
+    ) * np.ones(shape)
+    summaries["hrv"][rng.random(shape) < HRV_MISSING_RATE] = np.nan
+    sleep_missing = rng.random(shape) < SLEEP_MISSING_RATE
+    for name in (
+        "sleep_score",
+        "total_sleep_minutes",
+        "deep_sleep_minutes",
+        "light_sleep_minutes",
+        "rem_sleep_minutes",
+        "awake_minutes",
+    ):
+        summaries[name][sleep_missing] = np.nan
+    summaries = {
+        name: summaries[name] if name in summaries else np.full(shape, np.nan)
+        for name in SUMMARY_FIELDS
+    }
+    for name, kind in SUMMARY_FIELDS.items():
+        if kind is int:
+            summaries[name] = np.round(summaries[name])
+
+    # Activities: np.nonzero walks users then days, so rows come out sorted
+    user, day = np.nonzero(trained)
+    kind = session_type[user, day]
+    minutes = duration[user, day]
+    hr_reserve = reserve[user, day]
+    avg_hr = rhr_base[user, 0] + hr_reserve * (max_hr[user, 0] - rhr_base[user, 0])
+    start_hour = np.where(rng.random(len(user)) < 0.6, 7, 18) + rng.normal(
+        0, 1, len(user)
+    )
+    speed = np.where(kind == 0, 9.0, 25.0) * (0.7 + 0.6 * hr_reserve)  # km/h
+    distance = np.where(kind == 2, np.nan, speed * minutes / 60)
+    nan = np.full(len(user), np.nan)
+    activities = {
+        "activity_type": np.array(ACTIVITY_TYPES)[kind],
+        "start_time": dates[day].astype("datetime64[s]")
+        + (np.clip(start_hour, 5, 21) * 3600).astype("timedelta64[s]"),
+        "duration_minutes": np.round(minutes, 1),
+        "distance_km": np.round(distance, 2),
+        "avg_pace": np.where(kind == 0, np.round(minutes / distance, 2), nan),
+        "avg_hr": np.round(avg_hr),
+        "max_hr": np.round(
+            np.minimum(avg_hr + rng.uniform(10, 25, len(user)), max_hr[user, 0])
+        ),
+        "elevation_gain": np.where(
+            kind == 2, nan, np.round(distance * rng.uniform(2, 15, len(user)))
+        ),
+        "vo2_max": np.where(
+            kind == 0, np.round(np.clip(15 + fitness[user, day] * 0.35, 25, 70)), nan
+        ),
+        "exercise_count": np.where(kind == 2, rng.integers(5, 10, len(user)), nan),
+        "set_count": np.where(kind == 2, rng.integers(15, 30, len(user)), nan),
+        "aerobic_training_effect": np.round(
+            np.clip(1 + 4 * hr_reserve * np.sqrt(minutes / 60), 0, 5), 1
+        ),
+        "anaerobic_training_effect": np.round(
+            np.clip(rng.gamma(2, 0.5, len(user)), 0, 5), 1
+        ),
+    }
+    for name in ACTIVITY_FIELDS:
+        activities.setdefault(name, nan.copy())
+        activities[name] = activities[name].astype(np.float64)
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(user, minlength=users))))
+
+    user_ids = [f"{SYNTHETIC_USER_PREFIX}{i:05d}" for i in range(users)]
+    episodes = [
+        {
+            "user_id": user_ids[u],
+            "type": kind_name,
+            "start": str(dates[start]),
+            "end": str(dates[end - 1]),
+        }
+        for kind_name, spans in (
+            ("illness", illness_spans),
+            ("overtraining", overtraining_spans),
+        )
+        for u, start, end in spans
+    ]
+    return SyntheticPopulation(
+        user_ids, dates, summaries, activities, offsets, episodes
+    )
@@ -0,0 +1,231 @@
+import logging
+import math
+from datetime import date, datetime
+from typing import Any, Container, Dict, Iterable, Optional
+
+try:
+    from app.models.garmin_data import GarminActivity
+    from app.models.history_frame import HistoryFrame
+except ImportError:
+    # Fallback for local testing if path setup is different
+    import os
+    import sys
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+    from app.models.garmin_data import GarminActivity
+    from app.models.history_frame import HistoryFrame
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-day decay of each exponentially weighted load component.
+# Acute/chronic follow the EWMA-ACWR convention (alpha = 2 / (N + 1) for 7 and 28 days);
+# fitness/fatigue follow Banister's impulse-response model (time constants 42 and 7 days).
+LOAD_DECAY = {
+    "acute_load": 1 - 2 / (7 + 1),
+    "chronic_load": 1 - 2 / (28 + 1),
+    "fitness": math.exp(-1 / 42),
+    "fatigue": math.exp(-1 / 7),
+}
+
+# Used until the user's own values are known
+DEFAULT_RESTING_HR = 60.0
+DEFAULT_MAX_HR = 190.0
+# TRIMP per minute for sessions without heart rate: per point of aerobic training
+# effect (TE 3.0 is about a 70% heart-rate-reserve session), or a flat easy-effort rate
+TRIMP_PER_TE_MINUTE = 0.57
+DEFAULT_TRIMP_PER_MINUTE = 0.84
+
+# Re-fetched activities from this many recent days replace their earlier contribution
+DEDUPE_DAYS = 7
+
+# Bump when the persisted layout changes; older states are rebuilt from scratch
+STATE_VERSION = 1
+
+
+def activity_load(
+    duration_minutes: Optional[float],
+    avg_hr: Optional[float],
+    max_hr: float,
+    resting_hr: float,
+    aerobic_training_effect: Optional[float] = None,
+) -> float:
+    """
+    Banister TRIMP for one session: minutes x HRr x 0.64 x e^(1.92 x HRr), where HRr
+    is the heart-rate reserve fraction. Falls back to training effect, then duration.
+    """
+    if not duration_minutes:
+        return 0.0
+    if avg_hr and max_hr > resting_hr:
+        reserve = min(max((avg_hr - resting_hr) / (max_hr - resting_hr), 0.0), 1.0)
+        return duration_minutes * reserve * 0.64 * math.exp(1.92 * reserve)
+    if aerobic_training_effect:
+        return duration_minutes * TRIMP_PER_TE_MINUTE * aerobic_training_effect
+    return duration_minutes * DEFAULT_TRIMP_PER_MINUTE
+
+
+class TrainingLoadModel:
+    """
+    Per-user fitness-fatigue model maintained as exponentially weighted recurrences.
+    Every component is linear in the daily loads, so an activity is folded in with one
+    multiply-add whatever its date: later days decay the state forward, earlier days
+    add a pre-decayed contribution. Activities from the last DEDUPE_DAYS are
+    remembered by key so a re-fetch replaces rather than double counts them.
+    """
+
+    def __init__(self, resting_hr: float = DEFAULT_RESTING_HR):
+        self.resting_hr = resting_hr
+        self.peak_hr: Optional[float] = None
+        self.day: Optional[int] = None  # ordinal the values are expressed at
+        self.first_day: Optional[int] = None
+        self.values = {name: 0.0 for name in LOAD_DECAY}
+        self.activities = 0
+        self._recent: Dict[str, Any] = {}  # key -> [day, load]
+
+    @staticmethod
+    def activity_key(activity: GarminActivity) -> str:
+        """
+        Dedupe key of an activity, matching the activities table's primary key.
+        """
+        return f"{activity.start_time.isoformat()}|{activity.activity_type}"
+
+    def ingest(self, activities: Iterable[GarminActivity], stored: Container[str] = ()):
+        """
+        Fold a batch of activities in, oldest first, so a newest-first batch (the
+        order Garmin returns) is matched against the remembered keys before they
+        age out of the dedupe window.
+        Keys in `stored` belong to activities already folded in by an earlier sync;
+        they are only applied again while remembered, replacing their old load.
+        """
+        for activity in sorted(activities, key=lambda activity: activity.start_time):
+            key = self.activity_key(activity)
+            if key in stored and key not in self._recent:
+                continue
+            if activity.max_hr and activity.max_hr > (self.peak_hr or 0):
+                self.peak_hr = float(activity.max_hr)
+            load = activity_load(
+                activity.duration_minutes,
+                activity.avg_hr,
+                self.peak_hr or DEFAULT_MAX_HR,
+                self.resting_hr,
+                activity.aerobic_training_effect,
+            )
+            self.add(activity.start_time.date().toordinal(), load, key)
+
+    def add(self, day: int, load: float, key: Optional[str] = None):
+        """
+        Fold a load on a given day (ordinal) into every component.
+        """
+        if key is not None and key in self._recent:
+            old_day, old_load = self._recent.pop(key)
+            self._apply(old_day, -old_load)
+            self.activities -= 1
+
+        self._apply(day, load)
+        self.activities += 1
+        if key is not None and day > self.day - DEDUPE_DAYS:
+            self._recent[key] = [day, load]
+            self._recent = {
+                k: v for k, v in self._recent.items() if v[0] > self.day - DEDUPE_DAYS
+            }
+
+    def _apply(self, day: int, load: float):
+        self.first_day = day if self.first_day is None else min(self.first_day, day)
+        if self.day is None:
+            self.day = day
+        elif day > self.day:
+            for name, decay in LOAD_DECAY.items():
+                self.values[name] *= decay ** (day - self.day)
+            self.day = day
+        for name, decay in LOAD_DECAY.items():
+            self.values[name] += (1 - decay) * load * decay ** (self.day - day)
+
+    def snapshot(self, as_of: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Loads decayed to as_of (default: today), with the acute:chronic workload
+        ratio and form (fitness minus fatigue, Banister's performance proxy).
+        Each component is divided by the weight its window has actually seen, so a
+        short history is not read as a sudden rise in load.
+        """
+        as_of = as_of or date.today()
+        values = dict(self.values)
+        if self.day is not None:
+            gap = max(as_of.toordinal() - self.day, 0)
+            span = max(as_of.toordinal() - self.first_day + 1, 1)
+            values = {
+                name: value * LOAD_DECAY[name] ** gap / (1 - LOAD_DECAY[name] ** span)
+                for name, value in values.items()
+            }
+        chronic = values["chronic_load"]
+        return {
+            "as_of": as_of.isoformat(),
+            **{name: round(value, 1) for name, value in values.items()},
+            "acwr": round(values["acute_load"] / chronic, 2) if chronic > 0 else None,
+            "form": round(values["fitness"] - values["fatigue"], 1),
+            "activities_counted": self.activities,
+            "load_unit": "TRIMP",
+        }
+
+    @classmethod
+    def from_history(
+        cls, history: HistoryFrame, resting_hr: Optional[float] = None
+    ) -> "TrainingLoadModel":
+        """
+        Build a model from the activities in a HistoryFrame (used when no persisted
+        state exists). The resting HR defaults to the frame's mean.
+        """
+        if resting_hr is None:
+            rhr = history.column("resting_heart_rate")
+            resting_hr = float(rhr.mean()) if rhr.count() else DEFAULT_RESTING_HR
+        model = cls(resting_hr)
+
+        values, masks = history.activity_values, history.activity_masks
+        if masks["max_hr"].any():
+            model.peak_hr = float(values["max_hr"][masks["max_hr"]].max())
+
+        def field(name: str, index: int) -> Optional[float]:
+            return float(values[name][index]) if masks[name][index] else None
+
+        days = history.activity_start.astype("datetime64[D]").astype(int)
+        # datetime64[D] counts days from 1970-01-01
+        epoch = date(1970, 1, 1).toordinal()
+        for index in range(history.num_activities):
+            load = activity_load(
+                field("duration_minutes", index),
+                field("avg_hr", index),
+                model.peak_hr or DEFAULT_MAX_HR,
+                model.resting_hr,
+                field("aerobic_training_effect", index),
+            )
+            model.add(int(days[index]) + epoch, load)
+        return model
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION,
+            "resting_hr": self.resting_hr,
+            "peak_hr": self.peak_hr,
+            "day": self.day,
+            "first_day": self.first_day,
+            "values": self.values,
+            "activities": self.activities,
+            "recent": self._recent,
+            "updated_at": datetime.now().isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["TrainingLoadModel"]:
+        """
+        Restore a persisted state, or None if it was written by another layout.
+        """
+        if data.get("version") != STATE_VERSION:
+            return None
+        model = cls(data["resting_hr"])
+        model.peak_hr = data["peak_hr"]
+        model.day = data["day"]
+        model.first_day = data["first_day"]
+        model.values = {name: data["values"].get(name, 0.0) for name in LOAD_DECAY}
+        model.activities = data["activities"]
+        model._recent = data["recent"]
+        return model
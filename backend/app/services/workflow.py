@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One step of a workflow.
+    `run` is awaited with the results of the stages named in `after` as keyword
+    arguments (e.g. after=("history",) calls run(history=...)).
+    """
+
+    name: str
+    run: Callable[..., Awaitable[Any]]
+    after: Tuple[str, ...] = ()
+
+
+def _check_graph(stages: Dict[str, Stage]):
+    """
+    Raise ValueError for unknown dependencies and cycles (which would deadlock).
+    """
+    for stage in stages.values():
+        unknown = [name for name in stage.after if name not in stages]
+        if unknown:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown {unknown}")
+
+    done = set()
+    pending = dict(stages)
+    while pending:
+        ready = [
+            name
+            for name, stage in pending.items()
+            if all(dep in done for dep in stage.after)
+        ]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages {sorted(pending)}")
+        for name in ready:
+            done.add(name)
+            del pending[name]
+
+
+async def run_stages(
+    stages: Iterable[Stage], workflow: str = "workflow"
+) -> Dict[str, Any]:
+    """
+    Run a graph of stages, starting each one as soon as the stages it depends on
+    have finished, so independent stages overlap and the total time is roughly
+    that of the longest chain.
+    Returns the result of every stage by name. If a stage fails, the stages still
+    running are cancelled and the exception is raised.
+    """
+    by_name: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage {stage.name!r}")
+        by_name[stage.name] = stage
+    _check_graph(by_name)
+
+    tasks: Dict[str, asyncio.Task] = {}
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    async def execute(stage: Stage) -> Any:
+        inputs = {name: await tasks[name] for name in stage.after}
+        stage_start = time.perf_counter()
+        result = await stage.run(**inputs)
+        timings[stage.name] = time.perf_counter() - stage_start
+        return result
+
+    for stage in by_name.values():
+        tasks[stage.name] = asyncio.ensure_future(execute(stage))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    logger.info(
+        f"{workflow} finished in {time.perf_counter() - started:.2f}s ("
+        + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+        + ")"
+    )
+    return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,121 @@
+import argparse
+import os
+import sys
+import time
+import timeit
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the backend directory to sys.path so we can import app modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+# Client setup needs some key; no request is sent unless --live is given
+LIVE_KEY = os.getenv("GEMINI_API_KEY")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-placeholder-key")
+
+try:
+    import google.generativeai as genai
+    from google.generativeai import client as genai_client
+    from google.generativeai.types import HarmBlockThreshold, HarmCategory
+
+    from app.services.ai_agents.analysis_agent import AnalysisAgent
+    from app.services.ai_agents.gemini_client import SAFETY_SETTINGS, get_model
+except ImportError as e:
+    print(f"Error importing app modules: {e}")
+    sys.exit(1)
+
+
+def per_call_setup_before(agent: AnalysisAgent, system_prompt: str, reconfigure: bool):
+    """
+    What BaseAgent.run did before every Gemini call (optionally with the
+    genai.configure that every agent/metric constructor repeated).
+    """
+    if reconfigure:
+        genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    model = genai.GenerativeModel(
+        model_name=agent.model_name, system_instruction=system_prompt
+    )
+    safety_settings = {
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+    }
+    config = genai.types.GenerationConfig(**agent.generation_config)
+    # generate_content fetches the client lazily on a fresh model
+    model._client = genai_client.get_default_generative_client()
+    return model, safety_settings, config
+
+
+def per_call_setup_after(agent: AnalysisAgent, system_prompt: str):
+    """
+    What BaseAgent.run does now: shared model, settings and config.
+    """
+    model = get_model(agent.model_name, system_prompt)
+    if model._client is None:
+        model._client = genai_client.get_default_generative_client()
+    return model, SAFETY_SETTINGS, agent._generation_config
+
+
+def live_latency(agent: AnalysisAgent, system_prompt: str, calls: int, shared: bool):
+    """
+    Mean wall time of real generate_content calls (needs GEMINI_API_KEY).
+    """
+    started = time.perf_counter()
+    for _ in range(calls):
+        if shared:
+            model, safety, config = per_call_setup_after(agent, system_prompt)
+        else:
+            model, safety, config = per_call_setup_before(agent, system_prompt, True)
+        model.generate_content(
+            "Reply with {}", safety_settings=safety, generation_config=config
+        )
+    return (time.perf_counter() - started) / calls * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Per-call Gemini setup overhead before and after model reuse."
+    )
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument(
+        "--live",
+        type=int,
+        default=0,
+        help="Also time this many real calls each way (needs GEMINI_API_KEY)",
+    )
+    args = parser.parse_args()
+
+    agent = AnalysisAgent(cache=None)
+    system_prompt = agent._build_system_prompt()
+
+    cases = (
+        (
+            "before: new model per call",
+            lambda: per_call_setup_before(agent, system_prompt, False),
+        ),
+        (
+            "before: + genai.configure",
+            lambda: per_call_setup_before(agent, system_prompt, True),
+        ),
+        ("after: shared model", lambda: per_call_setup_after(agent, system_prompt)),
+    )
+    print(f"Per-call setup ({args.number} calls, best of 3):")
+    for name, func in cases:
+        seconds = min(timeit.repeat(func, number=args.number, repeat=3))
+        print(f"  {name:28s} {seconds / args.number * 1e6:8.1f} us")
+
+    if args.live:
+        if not LIVE_KEY:
+            print("--live needs GEMINI_API_KEY")
+            sys.exit(1)
+        print(f"\nEnd-to-end latency ({args.live} calls each):")
+        print(
+            f"  before  {live_latency(agent, system_prompt, args.live, False):8.1f} ms"
+        )
+        print(
+            f"  after   {live_latency(agent, system_prompt, args.live, True):8.1f} ms"
+        )
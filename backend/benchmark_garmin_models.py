@@ -0,0 +1,132 @@
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+from datetime import timedelta
+
+import numpy as np
+
+# Add the backend directory to sys.path so we can import app modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+try:
+    from app.models.garmin_data import GarminData
+    from app.models.history_frame import SUMMARY_FIELDS, HistoryFrame, _columns
+    from app.services.garmin_store import _SUMMARY_LIST, _validate_rows
+    from app.services.synthetic_data import generate_population
+except ImportError as e:
+    print(f"Error importing app modules: {e}")
+    sys.exit(1)
+
+
+def per_call(func, number: int) -> float:
+    """
+    Best-of-3 microseconds per call.
+    """
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def peak_kib(func) -> float:
+    """
+    Peak KiB allocated while running func once.
+    """
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def getattr_columns(rows, fields):
+    """
+    Reference: one getattr per field per row (the previous HistoryFrame builder).
+    """
+    values, masks = {}, {}
+    for name in fields:
+        raw = [getattr(row, name) for row in rows]
+        masks[name] = np.fromiter((v is not None for v in raw), dtype=bool)
+        values[name] = np.fromiter(
+            (v if v is not None else np.nan for v in raw), dtype=np.float64
+        )
+    return values, masks
+
+
+def report(title: str, cases, number: int, unit: str = "us"):
+    print(title)
+    scale = 1000 if unit == "ms" else 1
+    for name, func in cases:
+        print(
+            f"  {name:34s} {per_call(func, number) / scale:7.2f} {unit}"
+            f"  peak {peak_kib(func):7.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark GarminData construction, store reads and dumps."
+    )
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    population = generate_population(1, args.days / 365 + 0.1, seed=7)
+    end_date = population.dates[-1].astype(object)
+    start_date = end_date - timedelta(days=args.days - 1)
+    rows = population.summary_rows(0, population._day_range(start_date, end_date))
+    summaries = [GarminData(**row) for row in rows]
+    payloads = [summary.model_dump_json() for summary in summaries]
+    row, summary, payload = rows[-1], summaries[-1], payloads[-1]
+
+    report(
+        f"Per day ({args.number} calls, best of 3):",
+        [
+            ("GarminData(**row)", lambda: GarminData(**row)),
+            (
+                "GarminData.model_construct(**row)",
+                lambda: GarminData.model_construct(**row),
+            ),
+            (
+                "model_validate_json (store row)",
+                lambda: GarminData.model_validate_json(payload),
+            ),
+            (
+                "model_dump(exclude=raw_data_id)",
+                lambda: summary.model_dump(exclude={"raw_data_id"}),
+            ),
+            (
+                "to_record(exclude=raw_data_id)",
+                lambda: summary.to_record(exclude={"raw_data_id"}),
+            ),
+        ],
+        args.number,
+    )
+
+    number = max(args.number // 1000, 5)
+    report(
+        f"\nHistory of {len(rows)} days ({number} calls, best of 3):",
+        [
+            (
+                "store read, per row",
+                lambda: [GarminData.model_validate_json(p) for p in payloads],
+            ),
+            ("store read, batched", lambda: _validate_rows(_SUMMARY_LIST, payloads)),
+            (
+                "agent dicts, model_dump",
+                lambda: [s.model_dump(exclude={"raw_data_id"}) for s in summaries],
+            ),
+            (
+                "agent dicts, to_record",
+                lambda: [s.to_record(exclude={"raw_data_id"}) for s in summaries],
+            ),
+            (
+                "columns, getattr per field",
+                lambda: getattr_columns(summaries, SUMMARY_FIELDS),
+            ),
+            ("columns, single pass", lambda: _columns(summaries, SUMMARY_FIELDS)),
+            ("HistoryFrame.from_models", lambda: HistoryFrame.from_models(summaries)),
+        ],
+        number,
+        unit="ms",
+    )
@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import re
+import sys
+import timeit
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add the backend directory to sys.path so we can import app modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+try:
+    import google.generativeai as genai
+
+    from app.services import coach_orchestrator
+    from app.services.coach_orchestrator import CoachOrchestrator
+    from app.services.garmin_service import GarminService
+    from app.services.prompt_encoding import PROMPT_FORMATS
+    from app.services.serialization import JSON_BACKEND
+except ImportError as e:
+    print(f"Error importing app modules: {e}")
+    sys.exit(1)
+
+USER_PROFILE = {
+    "fitness_level": "intermediate",
+    "goals": ["half marathon", "strength"],
+    "equipment": ["dumbbells"],
+    "limitations": [],
+}
+_ROUGH_TOKEN = re.compile(r"\w+|[^\w\s]|\s+")
+
+SCHEDULED_WORKOUT = {
+    "workout_type": "running",
+    "intensity": "high",
+    "duration_min": 60,
+    "exercises": ["intervals"],
+}
+
+
+def indented_json(user_input) -> str:
+    """
+    The previous prompt encoding: json.dumps with indent=2 and a date hook.
+    """
+
+    def json_serial(obj):
+        if isinstance(obj, (datetime.date, datetime.datetime)):
+            return obj.isoformat()
+        raise TypeError(f"Type {type(obj)} not serializable")
+
+    return json.dumps(user_input, indent=2, default=json_serial)
+
+
+def capture_agent_inputs(days: int):
+    """
+    Run every workflow on mock data and record the input each agent would send.
+    Agent calls are short-circuited, so no Gemini key is needed.
+    """
+    # Make the AnalysisAgent run even when recovery is scored locally
+    coach_orchestrator.RECOVERY_NARRATION = True
+    orchestrator = CoachOrchestrator(GarminService())
+    captured = {}
+
+    for agent in (
+        orchestrator.analysis_agent,
+        orchestrator.planning_agent,
+        orchestrator.adaptation_agent,
+        orchestrator.insights_agent,
+    ):
+
+        async def arun(user_input, context=None, agent=agent):
+            captured.setdefault(agent, user_input)
+            return {"status": "error", "error": "captured", "metadata": {}}
+
+        agent.arun = arun
+
+    async def run_workflows():
+        await orchestrator.agenerate_weekly_plan(USER_PROFILE)
+        await orchestrator.aget_daily_guidance(SCHEDULED_WORKOUT)
+        await orchestrator.aget_insights(days_back=days)
+        history = await orchestrator._afetch_recent_history(days)
+        await orchestrator.async_garmin_service.aclose()
+        return history
+
+    history = asyncio.run(run_workflows())
+    captured["raw history"] = {
+        "daily_summaries": history.summary_dicts(),
+        "activities": history.activity_dicts(),
+    }
+    return captured
+
+
+def count_tokens(text: str) -> str:
+    """
+    Gemini token count when GEMINI_API_KEY is set, otherwise a rough offline
+    estimate (~ prefix): one token per word, punctuation mark or whitespace run.
+    """
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return f"~{len(_ROUGH_TOKEN.findall(text))}"
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(os.getenv("GEMINI_MODEL", "gemini-pro"))
+    return str(model.count_tokens(text).total_tokens)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare prompt encodings (indented, compact JSON, tabular) per agent."
+    )
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    captured = capture_agent_inputs(args.days)
+    encoders = {"indent=2": indented_json, **PROMPT_FORMATS}
+    print(f"JSON backend: {JSON_BACKEND}. Cells: chars / tokens / us per encode")
+    print(f"{'input':24s}" + "".join(f"{name:>26s}" for name in encoders))
+    for agent, user_input in captured.items():
+        if isinstance(agent, str):
+            name = agent
+        else:
+            name = f"{type(agent).__name__} ({agent.prompt_format})"
+        cells = []
+        for encode in encoders.values():
+            text = encode(user_input)
+            seconds = min(timeit.repeat(lambda: encode(user_input), number=args.number))
+            cells.append(
+                f"{len(text)} / {count_tokens(text)} / {seconds / args.number * 1e6:.0f}"
+            )
+        print(f"{name:24s}" + "".join(f"{cell:>26s}" for cell in cells))
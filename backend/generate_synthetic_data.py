@@ -0,0 +1,97 @@
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+# Add the backend directory to sys.path so we can import app modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+try:
+    from app.models.history_frame import HistoryFrame
+    from app.services.garmin_service import GarminService
+    from app.services.garmin_store import GarminStore
+    from app.services.recovery_scoring import BASELINE_DAYS, RecoveryScorer
+    from app.services.synthetic_data import generate_population
+except ImportError as e:
+    print(f"Error importing app modules: {e}")
+    sys.exit(1)
+
+
+def benchmark(population, days: int):
+    """
+    Time history loading and recovery scoring for every user through GarminService.
+    """
+    service = GarminService(synthetic=population)
+    scorer = RecoveryScorer()
+    end_date = population.dates[-1].astype(object)
+    start_date = end_date - timedelta(days=days)
+
+    load_seconds = score_seconds = 0.0
+    for user_id in population.user_ids:
+        started = time.perf_counter()
+        summaries, activities = service.get_history(
+            user_id, "internal", "internal", start_date, end_date
+        )
+        history = HistoryFrame.from_models(summaries, activities)
+        load_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        scorer.assess(history)
+        score_seconds += time.perf_counter() - started
+
+    users = len(population.user_ids)
+    print(f"History load ({days} days): {load_seconds / users * 1000:.2f} ms/user")
+    print(f"Recovery scoring:          {score_seconds / users * 1000:.3f} ms/user")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic Garmin population for load testing."
+    )
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--end-date",
+        type=date.fromisoformat,
+        default=None,
+        help="Last generated day (default: today)",
+    )
+    parser.add_argument("--jsonl", help="Write the population to this JSONL file")
+    parser.add_argument(
+        "--store",
+        help="Bulk load the population into the SQLite store at this path",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Time history loading and recovery scoring for every user",
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    population = generate_population(args.users, args.years, args.seed, args.end_date)
+    print(
+        f"Generated {len(population.user_ids)} users x {len(population.dates)} days, "
+        f"{population.num_activities} activities and {len(population.episodes)} "
+        f"episodes in {time.perf_counter() - started:.2f}s"
+    )
+
+    if args.jsonl:
+        started = time.perf_counter()
+        lines = population.write_jsonl(args.jsonl)
+        print(
+            f"Wrote {lines} lines to {args.jsonl} in {time.perf_counter() - started:.2f}s"
+        )
+
+    if args.store:
+        started = time.perf_counter()
+        rows = population.write_store(GarminStore(args.store))
+        print(
+            f"Wrote {rows} rows to {args.store} in {time.perf_counter() - started:.2f}s"
+        )
+
+    if args.benchmark:
+        benchmark(population, BASELINE_DAYS)
@@ -0,0 +1,72 @@
+import pytest
+
+from app.services import garmin_client_registry
+from app.services.garmin_client_registry import GarminClientRegistry, GarminSession
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(garmin_client_registry.time, "monotonic", lambda: now[0])
+    return now
+
+
+def session(name):
+    return GarminSession(client=object(), display_name=name)
+
+
+def test_least_recently_used_session_is_evicted(clock):
+    registry = GarminClientRegistry(max_size=2)
+    registry.put("a", session("a"))
+    registry.put("b", session("b"))
+    registry.get("a")
+
+    registry.put("c", session("c"))
+
+    assert "b" not in registry
+    assert registry.get("a").display_name == "a"
+    assert len(registry) == 2
+
+
+def test_idle_sessions_expire(clock):
+    registry = GarminClientRegistry(idle_seconds=60)
+    registry.put("a", session("a"))
+    registry.put("b", session("b"))
+
+    clock[0] += 45
+    registry.get("b")
+    clock[0] += 30
+
+    assert registry.get("a") is None
+    assert registry.get("b") is not None
+
+
+def test_membership_does_not_mark_sessions_as_used(clock):
+    registry = GarminClientRegistry(max_size=2, idle_seconds=60)
+    registry.put("a", session("a"))
+    registry.put("b", session("b"))
+
+    assert "a" in registry
+    registry.put("c", session("c"))
+    assert "a" not in registry
+
+    clock[0] += 45
+    assert "c" in registry
+    clock[0] += 30
+    assert "c" not in registry
+
+
+def test_loader_restores_missing_sessions(clock):
+    loaded = []
+
+    def loader(user_id):
+        loaded.append(user_id)
+        return session(user_id) if user_id == "cached" else None
+
+    registry = GarminClientRegistry(loader=loader)
+
+    assert registry.get("cached").display_name == "cached"
+    assert registry.get("cached") is not None
+    assert registry.get("unknown") is None
+    assert "unknown" not in registry
+    assert loaded == ["cached", "unknown"]
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_async_garmin_service
+from app.main import app
+from app.services.async_garmin_service import AsyncGarminService
+from app.services.garmin_service import GarminService
+from app.services.garmin_session_cache import GarminSessionCache
+
+ALICE = {"email": "alice@example.com", "password": "alice-pw", "days": 1}
+MALLORY = {"email": "mallory@example.com", "password": "mallory-pw", "days": 1}
+
+
+class FakeGarthClient:
+    """
+    Logs in to one account per email without any network access.
+    """
+
+    oauth2_token = None
+
+    def configure(self, **kwargs):
+        pass
+
+    def login(self, email, password):
+        self.username = email.split("@")[0]
+
+    def dumps(self):
+        return json.dumps({"username": self.username})
+
+    def loads(self, tokens):
+        self.username = json.loads(tokens)["username"]
+
+    def refresh_oauth2(self):
+        pass
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    service = GarminService(session_cache=GarminSessionCache(str(tmp_path)))
+    monkeypatch.setattr(service, "_new_client", FakeGarthClient)
+    async_service = AsyncGarminService(service)
+
+    async def connectapi(user_id, session, path):
+        return []
+
+    async_service._connectapi = connectapi
+    app.dependency_overrides[get_async_garmin_service] = lambda: async_service
+    yield service
+    app.dependency_overrides.clear()
+
+
+def sync(body, user_token=None):
+    headers = {"X-FitSense-User-Token": user_token} if user_token else {}
+    return TestClient(app).post("/api/garmin/sync/alice", json=body, headers=headers)
+
+
+def test_other_account_cannot_take_over_a_user_id(service):
+    alice_token = sync(ALICE).json()["user_token"]
+
+    assert sync(MALLORY).status_code == 403
+    assert sync(MALLORY, user_token="guessed").status_code == 403
+
+    session = service.clients.get("alice")
+    assert session.client.username == "alice"
+    assert service.authorize("alice", alice_token)
+
+
+def test_same_credentials_can_log_in_again(service):
+    sync(ALICE)
+
+    response = sync(ALICE)
+
+    assert response.status_code == 200
+    assert service.authorize("alice", response.json()["user_token"])
+
+
+def test_current_token_allows_linking_another_account(service):
+    alice_token = sync(ALICE).json()["user_token"]
+
+    response = sync(MALLORY, user_token=alice_token)
+
+    assert response.status_code == 200
+    assert service.clients.get("alice").client.username == "mallory"
+    assert not service.authorize("alice", alice_token)
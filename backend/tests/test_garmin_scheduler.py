@@ -0,0 +1,133 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import garmin_scheduler
+from app.services.garmin_scheduler import (
+    BACKOFF_MAX_SECONDS,
+    GarminRequestScheduler,
+    GarminThrottledError,
+)
+
+
+def http_error(status, retry_after=None):
+    headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    request = httpx.Request("GET", "https://connectapi.garmin.com/test")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(str(status), request=request, response=response)
+
+
+def failing(*errors, result="ok"):
+    """
+    A call raising the given errors in turn, then returning `result`.
+    """
+    remaining = list(errors)
+    calls = []
+
+    def call():
+        calls.append(None)
+        if remaining:
+            raise remaining.pop(0)
+        return result
+
+    call.calls = calls
+    return call
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(garmin_scheduler.time, "sleep", recorded.append)
+    return recorded
+
+
+@pytest.fixture
+def scheduler():
+    return GarminRequestScheduler(
+        global_rate=1000, global_burst=1000, account_rate=1000, account_burst=1000
+    )
+
+
+def test_transient_errors_are_retried(scheduler, sleeps):
+    call = failing(http_error(503), httpx.ConnectError("reset"))
+
+    assert scheduler.call("u", call) == "ok"
+    assert len(call.calls) == 3
+    assert len(sleeps) == 2
+    snapshot = scheduler.snapshot()
+    assert (snapshot["retries"], snapshot["failures"]) == (2, 0)
+
+
+def test_client_errors_are_not_retried(scheduler, sleeps):
+    call = failing(http_error(404))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        scheduler.call("u", call)
+    assert len(call.calls) == 1
+    assert sleeps == []
+    assert scheduler.snapshot()["failures"] == 1
+
+
+def test_gives_up_after_max_retries(sleeps):
+    scheduler = GarminRequestScheduler(1000, 1000, 1000, 1000, max_retries=2)
+    call = failing(*(http_error(502) for _ in range(5)))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        scheduler.call("u", call)
+    assert len(call.calls) == 3
+    assert all(0 <= delay <= BACKOFF_MAX_SECONDS for delay in sleeps)
+
+
+def test_retry_after_is_honored_up_to_the_cap(scheduler, sleeps):
+    call = failing(http_error(429, retry_after="2"))
+
+    assert scheduler.call("u", call) == "ok"
+    assert sleeps[0] >= 2
+    assert scheduler.snapshot()["throttled"] == 1
+
+
+def test_long_retry_after_fails_fast(scheduler, sleeps):
+    call = failing(http_error(429, retry_after=str(int(BACKOFF_MAX_SECONDS) + 60)))
+
+    with pytest.raises(GarminThrottledError) as raised:
+        scheduler.call("u", call)
+    assert raised.value.retry_after == BACKOFF_MAX_SECONDS + 60
+    assert isinstance(raised.value.__cause__, httpx.HTTPStatusError)
+    assert sleeps == []
+    assert len(call.calls) == 1
+
+
+def test_global_rate_is_halved_on_429_and_recovers_additively(scheduler, sleeps):
+    scheduler.call("u", failing(http_error(429), http_error(429)))
+    # Two halvings, then one additive step for the successful call
+    assert scheduler.snapshot()["global_rate"] == pytest.approx(1000 / 4 + 10)
+
+    for _ in range(200):
+        scheduler.call("u", failing())
+    assert scheduler.snapshot()["global_rate"] == 1000
+
+
+def test_global_rate_has_a_floor(scheduler, sleeps):
+    for _ in range(10):
+        scheduler._on_throttled()
+    assert scheduler.snapshot()["global_rate"] == scheduler.min_global_rate
+
+
+def test_async_calls_are_retried(scheduler, monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(garmin_scheduler.asyncio, "sleep", fake_sleep)
+    errors = [http_error(500)]
+
+    async def call():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert asyncio.run(scheduler.acall("u", call)) == "ok"
+    assert len(delays) == 1
+    assert scheduler.snapshot()["retries"] == 1
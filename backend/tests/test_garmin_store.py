@@ -0,0 +1,216 @@
+import re
+from datetime import date, datetime, timedelta
+
+from app.models.garmin_data import GarminActivity, GarminData
+from app.services.garmin_client_registry import GarminSession
+from app.services.garmin_scheduler import GarminRequestScheduler
+from app.services.garmin_service import GarminService
+from app.services.garmin_store import GarminStore
+
+START = date(2026, 1, 1)
+RANGE_PATH = re.compile(
+    r"(?:/(\d{4}-\d\d-\d\d)/(\d{4}-\d\d-\d\d)$)"
+    r"|(?:fromDate=(\d{4}-\d\d-\d\d)&untilDate=(\d{4}-\d\d-\d\d))"
+)
+ACTIVITY_PATH = re.compile(r"startDate=(\S+?)&endDate=(\S+?)&start=(\d+)&limit=(\d+)")
+
+
+class FakeConnect:
+    """
+    Stand-in for a garth client: every range endpoint reports every day, the
+    per-day user summary reports calories, and the activity search returns one
+    run per day.
+    """
+
+    def __init__(self):
+        self.ranges = []
+        self.per_day = []
+
+    def connectapi(self, path):
+        match = ACTIVITY_PATH.search(path)
+        if match:
+            start, end = date.fromisoformat(match[1]), date.fromisoformat(match[2])
+            offset, limit = int(match[3]), int(match[4])
+            runs = [
+                {
+                    "activityType": {"typeKey": "running"},
+                    "startTimeLocal": f"{day}T07:00:00",
+                    "duration": 1800,
+                    "averageHR": 140,
+                }
+                for day in days_between(start, end)
+            ]
+            return runs[offset : offset + limit]
+
+        match = re.search(r"calendarDate=(\S+)|dailySleepData/.*date=(\S+)", path)
+        if match:
+            if match[1]:
+                self.per_day.append("user_summary")
+                return {"totalKilocalories": 2100}
+            self.per_day.append("sleep")
+            return {}
+
+        match = RANGE_PATH.search(path)
+        if match is None:
+            return {}
+        start, end = (date.fromisoformat(value) for value in match.groups() if value)
+        self.ranges.append((start, end))
+        return [
+            {
+                "calendarDate": day.isoformat(),
+                "sleepScore": 80,
+                "totalSleepTimeInSeconds": 28800,
+                "value": 50,
+                "overallStressLevel": 25,
+                "totalSteps": 8000,
+            }
+            for day in days_between(start, end)
+        ]
+
+
+def days_between(start, end):
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def make_service(tmp_path):
+    # No pacing: the fake answers instantly
+    scheduler = GarminRequestScheduler(1000, 1000, 1000, 1000)
+    service = GarminService(
+        store=GarminStore(str(tmp_path / "garmin.db")), scheduler=scheduler
+    )
+    client = FakeConnect()
+    service.clients.put("u", GarminSession(client=client, display_name="runner"))
+    return service, client
+
+
+def sync(service, start, end):
+    return service.sync_range("u", "internal", "internal", start, end)
+
+
+def test_store_round_trip_survives_reopen(tmp_path):
+    path = str(tmp_path / "garmin.db")
+    store = GarminStore(path)
+    summaries = [
+        GarminData(date=START + timedelta(days=offset), steps=1000 + offset)
+        for offset in range(3)
+    ]
+    activity = GarminActivity(
+        activity_type="running",
+        start_time=datetime(2026, 1, 2, 7, 0),
+        duration_minutes=30.0,
+        distance_km=5.0,
+        avg_hr=140,
+    )
+    store.upsert_daily_summaries("u", summaries)
+    store.upsert_activities("u", [activity])
+    store.update_sync_state("u", START, START + timedelta(days=2))
+
+    reopened = GarminStore(path)
+    end = START + timedelta(days=2)
+    assert [row.steps for row in reopened.get_daily_summaries("u", START, end)] == [
+        1000,
+        1001,
+        1002,
+    ]
+    [stored] = reopened.get_activities("u", START, end)
+    assert (stored.start_time, stored.avg_hr) == (activity.start_time, 140)
+    assert reopened.get_sync_state("u") == (START, end)
+    assert reopened.get_daily_summaries("other", START, end) == []
+
+
+def test_sync_fetches_only_days_from_the_watermark(tmp_path):
+    service, client = make_service(tmp_path)
+    counts = sync(service, START, START + timedelta(days=9))
+    assert counts == {"fetched_days": 10, "fetched_activities": 10}
+    assert service.store.get_sync_state("u") == (START, START + timedelta(days=9))
+    # Calories have no range endpoint: each day fetches its user summary, not its sleep
+    summaries = service.store.get_daily_summaries("u", START, START + timedelta(days=9))
+    assert [summary.calories_burned for summary in summaries] == [2100] * 10
+    assert client.per_day == ["user_summary"] * 10
+
+    client.ranges.clear()
+    counts = sync(service, START, START + timedelta(days=11))
+
+    # The watermark day is fetched again in case it was synced while in progress
+    assert counts["fetched_days"] == 3
+    assert set(client.ranges) == {
+        (START + timedelta(days=9), START + timedelta(days=11))
+    }
+    assert service.store.get_sync_state("u") == (START, START + timedelta(days=11))
+
+
+def test_sync_backfills_days_before_the_first_date(tmp_path):
+    service, client = make_service(tmp_path)
+    sync(service, START, START + timedelta(days=4))
+    client.ranges.clear()
+
+    counts = sync(service, START - timedelta(days=3), START + timedelta(days=4))
+
+    # Three backfilled days plus the watermark day (a single day, so not a range)
+    assert set(client.ranges) == {
+        (START - timedelta(days=3), START - timedelta(days=1))
+    }
+    assert counts["fetched_days"] == 4
+    assert service.store.get_sync_state("u") == (
+        START - timedelta(days=3),
+        START + timedelta(days=4),
+    )
+    summaries = service.store.get_daily_summaries(
+        "u", START - timedelta(days=3), START + timedelta(days=4)
+    )
+    assert len(summaries) == 8
+
+
+def test_history_is_read_from_the_store_after_sync(tmp_path):
+    service, client = make_service(tmp_path)
+    end = START + timedelta(days=6)
+    summaries, activities = service.get_history("u", "internal", "internal", START, end)
+
+    assert [summary.date for summary in summaries] == days_between(START, end)
+    assert len(list(activities)) == 7
+    assert service.get_rolling_stats("u").end_date("steps") == end
+
+
+def payload_count(store):
+    return store._conn.execute("SELECT COUNT(*) FROM raw_payloads").fetchone()[0]
+
+
+def test_replaced_rows_do_not_leave_raw_payloads_behind(tmp_path):
+    store = GarminStore(str(tmp_path / "garmin.db"))
+    start_time = datetime(2026, 1, 1, 7, 0)
+
+    # Today's summary and activity are re-fetched (with new raw data) many times
+    for steps in range(5):
+        store.upsert_daily_summaries(
+            "u", [GarminData(date=START, steps=steps, raw_data={"steps": steps})]
+        )
+        store.upsert_activities(
+            "u",
+            [
+                GarminActivity(
+                    activity_type="running",
+                    start_time=start_time,
+                    duration_minutes=30.0 + steps,
+                    distance_km=5.0,
+                    raw_data={"duration": 30 + steps},
+                )
+            ],
+        )
+    assert payload_count(store) == 2
+
+    [summary] = store.get_daily_summaries("u", START, START)
+    assert store.get_raw_payload(summary.raw_data_id) == {"steps": 4}
+
+    # A payload still referenced by another row is kept
+    store.upsert_daily_summaries(
+        "u",
+        [GarminData(date=START + timedelta(days=1), steps=4, raw_data={"steps": 4})],
+    )
+    store.upsert_daily_summaries(
+        "u", [GarminData(date=START, steps=9, raw_data={"steps": 9})]
+    )
+    assert payload_count(store) == 3
+    [later] = store.get_daily_summaries(
+        "u", START + timedelta(days=1), START + timedelta(days=1)
+    )
+    assert store.get_raw_payload(later.raw_data_id) == {"steps": 4}
@@ -0,0 +1,75 @@
+import json
+import random
+
+import pytest
+
+from app.services.ai_agents.json_stream import JSONArrayStreamParser
+
+PLAN = {
+    "week_summary": 'Build week with "quotes", {braces} and [brackets]',
+    "daily_plans": [
+        {
+            "day": "Monday",
+            "workout_type": "run",
+            "notes": 'Easy pace \\ keep HR < 140, then "strides" ]}',
+            "exercises": [{"name": "strides", "sets": [1, 2, 3]}],
+        },
+        {"day": "Tuesday", "workout_type": "rest", "exercises": []},
+        {"day": "Wednesday", "workout_type": "intervals", "notes": "6x800m {hard}"},
+    ],
+    "total_weekly_load": 320,
+}
+
+
+def feed_all(parser, chunks):
+    elements = []
+    for chunk in chunks:
+        elements += parser.feed(chunk)
+    return elements
+
+
+def split(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, 40)))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_any_chunking_matches_a_full_parse(seed):
+    text = "```json\n" + json.dumps(PLAN, indent=2) + "\n```"
+    parser = JSONArrayStreamParser("daily_plans")
+
+    assert feed_all(parser, split(text, random.Random(seed))) == PLAN["daily_plans"]
+    assert parser.done
+
+
+def test_character_by_character():
+    parser = JSONArrayStreamParser("daily_plans")
+    assert feed_all(parser, json.dumps(PLAN)) == PLAN["daily_plans"]
+
+
+def test_elements_are_returned_as_soon_as_they_close():
+    parser = JSONArrayStreamParser("daily_plans")
+
+    assert parser.feed('{"daily_plans": [{"day": "Mon') == []
+    assert parser.feed('day"}, {"day": ') == [{"day": "Monday"}]
+    assert parser.feed('"Tuesday"}') == [{"day": "Tuesday"}]
+    assert not parser.done
+    assert parser.feed('], "daily_plans_extra": [{"day": "x"}]}') == []
+    assert parser.done
+
+
+def test_key_split_across_chunks():
+    parser = JSONArrayStreamParser("daily_plans")
+    preamble = "x" * 500
+
+    assert parser.feed(preamble + '{"daily_') == []
+    assert parser.feed('plans"') == []
+    assert parser.feed(': [{"day": "Monday"}]}') == [{"day": "Monday"}]
+
+
+def test_malformed_elements_are_skipped():
+    parser = JSONArrayStreamParser("daily_plans")
+
+    elements = parser.feed('{"daily_plans": [{"day": Monday}, {"day": "Tuesday"}]}')
+
+    assert elements == [{"day": "Tuesday"}]
@@ -0,0 +1,62 @@
+import asyncio
+from datetime import date, timedelta
+
+from app.services.async_garmin_service import AsyncGarminService
+from app.services.garmin_client_registry import GarminSession
+from app.services.garmin_scheduler import GarminRequestScheduler
+from app.services.garmin_service import GarminService
+from app.services.garmin_store import GarminStore
+from app.services.prefetch_scheduler import DailyPrefetcher
+
+
+def make_prefetcher(tmp_path, idle_seconds=3600):
+    service = GarminService(
+        store=GarminStore(str(tmp_path / "garmin.db")),
+        scheduler=GarminRequestScheduler(1000, 1000, 1000, 1000),
+    )
+    service.clients.idle_seconds = idle_seconds
+    session = GarminSession(client=object(), display_name="runner")
+    service.clients.put("u", session)
+    async_service = AsyncGarminService(service)
+
+    async def connectapi(user_id, session, path):
+        return []
+
+    async_service._connectapi = connectapi
+    return DailyPrefetcher(async_service), session
+
+
+def test_refresh_does_not_mark_the_session_as_used(tmp_path):
+    prefetcher, session = make_prefetcher(tmp_path)
+    session.last_used -= 600
+    last_used = session.last_used
+
+    entry = asyncio.run(prefetcher.refresh("u"))
+
+    assert entry.day == date.today()
+    assert session.last_used == last_used
+
+    # A regular request does count as use
+    today = date.today()
+    asyncio.run(
+        prefetcher.async_garmin_service.get_history(
+            "u", "internal", "internal", today - timedelta(days=1), today
+        )
+    )
+    assert session.last_used > last_used
+
+
+def test_polled_users_still_idle_expire(tmp_path):
+    prefetcher, session = make_prefetcher(tmp_path, idle_seconds=60)
+    prefetcher.register("u")
+
+    session.last_used -= 50
+    asyncio.run(prefetcher.refresh_all())
+    assert prefetcher.get("u") is not None
+
+    # 70 idle seconds in total, however often the user was polled
+    session.last_used -= 20
+    asyncio.run(prefetcher.refresh_all())
+
+    assert "u" not in prefetcher.async_garmin_service.service.clients
+    assert prefetcher.get("u") is None
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.garmin_data import GarminData
+from app.models.history_frame import HistoryFrame
+from app.services.coach_orchestrator import CoachOrchestrator
+from app.services.garmin_service import GarminService
+
+TODAY = date(2026, 3, 2)
+
+
+def make_history(stress, rhr, hrv, days=14):
+    """
+    Steady baseline days (stress 25, RHR 50, HRV 60 +/- 5) followed by `today`.
+    """
+    summaries = [
+        GarminData(
+            date=TODAY - timedelta(days=offset),
+            stress_score=25,
+            resting_heart_rate=50,
+            hrv=60 + (5 if offset % 2 else -5),
+        )
+        for offset in range(days, 0, -1)
+    ]
+    summaries.append(
+        GarminData(date=TODAY, stress_score=stress, resting_heart_rate=rhr, hrv=hrv)
+    )
+    return HistoryFrame.from_models(summaries)
+
+
+@pytest.fixture
+def orchestrator():
+    orchestrator = CoachOrchestrator(GarminService())
+    calls = []
+
+    async def arun(user_input, context=None):
+        calls.append(user_input)
+        return orchestrator.agent_response
+
+    orchestrator.agent_calls = calls
+    orchestrator.agent_response = {"status": "error", "error": "service down"}
+    orchestrator.analysis_agent.arun = arun
+    return orchestrator
+
+
+def assess(orchestrator, history):
+    return asyncio.run(orchestrator._aassess_recovery(history, {}, None, as_of=TODAY))
+
+
+def test_poor_recovery_is_scored_locally(orchestrator):
+    result = assess(orchestrator, make_history(stress=70, rhr=58, hrv=45))
+
+    assert result["recovery_status"] == "poor"
+    assert result["source"] == "local"
+    assert orchestrator.agent_calls == []
+
+
+def test_excellent_recovery_is_scored_locally(orchestrator):
+    result = assess(orchestrator, make_history(stress=20, rhr=49, hrv=66))
+
+    assert result["recovery_status"] == "excellent"
+    assert result["recovery_score"] >= 80
+    assert orchestrator.agent_calls == []
+
+
+def test_ambiguous_recovery_uses_the_agent(orchestrator):
+    agent_analysis = {
+        "recovery_status": "good",
+        "recovery_score": 70,
+        "key_metrics_summary": {},
+        "trends_identified": [],
+    }
+    orchestrator.agent_response = {"status": "success", "data": dict(agent_analysis)}
+
+    # High stress alone is a single red flag
+    result = assess(orchestrator, make_history(stress=60, rhr=50, hrv=60))
+
+    assert len(orchestrator.agent_calls) == 1
+    context = orchestrator.agent_calls[0]["data"]
+    assert context["local_assessment"]["source"] == "local"
+    assert result == agent_analysis
+
+
+def test_agent_failure_keeps_the_local_assessment(orchestrator):
+    result = assess(orchestrator, make_history(stress=60, rhr=50, hrv=60))
+
+    assert len(orchestrator.agent_calls) == 1
+    assert result["source"] == "local"
+    assert "Flag: High stress" in result["trends_identified"]
+    assert "Analysis service unavailable" not in result["trends_identified"]
+
+
+def test_unparseable_agent_response_keeps_the_local_assessment(orchestrator):
+    orchestrator.agent_response = {"status": "success", "data": "not json"}
+
+    result = assess(orchestrator, make_history(stress=60, rhr=50, hrv=60))
+
+    assert result["source"] == "local"
+
+
+def test_agent_failure_without_local_scores_returns_the_fallback(orchestrator):
+    # Too few days for a baseline, so there is nothing local to fall back to
+    result = assess(orchestrator, make_history(stress=60, rhr=50, hrv=60, days=1))
+
+    assert result["source"] == "fallback"
+    assert result["trends_identified"] == ["Analysis service unavailable"]
@@ -0,0 +1,129 @@
+import json
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.garmin_data import GarminData
+from app.services.garmin_store import GarminStore
+from app.services.rolling_stats import RollingStats
+
+START = date(2026, 1, 1)
+
+
+def summaries(days=40, seed=7):
+    rng = random.Random(seed)
+    return [
+        GarminData(
+            date=START + timedelta(days=offset),
+            resting_heart_rate=rng.randint(45, 60),
+            hrv=rng.randint(40, 90) if offset % 5 else None,
+        )
+        for offset in range(days)
+    ]
+
+
+def window_values(rows, metric, days, end):
+    return [
+        getattr(row, metric)
+        for row in rows
+        if end - timedelta(days=days) < row.date <= end
+        and getattr(row, metric) is not None
+    ]
+
+
+def windows(stats):
+    # Everything but the EWMA, which only approximates after a replay
+    return {
+        (metric, window, key): value
+        for metric, baselines in stats.snapshot().items()
+        for window, baseline in baselines.items()
+        for key, value in baseline.items()
+        if key != "ewma"
+    }
+
+
+def test_windows_match_a_full_recomputation():
+    rows = summaries()
+    stats = RollingStats()
+    stats.ingest(rows)
+
+    end = rows[-1].date
+    for metric in ("resting_heart_rate", "hrv"):
+        for days in (7, 28):
+            values = window_values(rows, metric, days, end)
+            baseline = stats.baseline(metric, days)
+            assert baseline["count"] == len(values)
+            assert baseline["mean"] == pytest.approx(np.mean(values))
+            assert baseline["std"] == pytest.approx(np.std(values))
+            assert (baseline["min"], baseline["max"]) == (min(values), max(values))
+
+
+def test_out_of_order_ingest_matches_in_order():
+    rows = summaries()
+    in_order = RollingStats()
+    in_order.ingest(rows)
+
+    shuffled = list(rows)
+    random.Random(3).shuffle(shuffled)
+    out_of_order = RollingStats()
+    out_of_order.ingest(shuffled)
+
+    assert windows(out_of_order) == pytest.approx(windows(in_order))
+
+
+def test_revising_the_latest_day_replaces_it():
+    rows = summaries()
+    revised = RollingStats()
+    revised.ingest(rows)
+    revised.ingest([rows[-1].model_copy(update={"resting_heart_rate": 99})])
+
+    expected = RollingStats()
+    expected.ingest(rows[:-1])
+    expected.ingest([rows[-1].model_copy(update={"resting_heart_rate": 99})])
+
+    assert revised.snapshot() == expected.snapshot()
+    assert revised.baseline("resting_heart_rate", 7)["max"] == 99
+
+
+def test_prior_baseline_excludes_the_scored_day():
+    rows = summaries()
+    stats = RollingStats()
+    stats.ingest(rows)
+
+    end = rows[-1].date
+    (mean, std), count = stats.prior_baseline("resting_heart_rate", 28, end)
+    values = window_values(rows, "resting_heart_rate", 27, end - timedelta(days=1))
+    assert count == len(values)
+    assert (mean, std) == pytest.approx((np.mean(values), np.std(values)))
+
+    # Only defined while as_of is the latest day with a value
+    assert (
+        stats.prior_baseline("resting_heart_rate", 28, end - timedelta(days=1)) is None
+    )
+    assert stats.prior_baseline("resting_heart_rate", 14, end) is None
+
+
+def test_state_round_trips_through_the_store(tmp_path):
+    stats = RollingStats()
+    stats.ingest(summaries())
+
+    store = GarminStore(str(tmp_path / "garmin.db"))
+    store.save_rolling_stats("u", json.loads(json.dumps(stats.to_dict())))
+    restored = RollingStats.from_dict(
+        GarminStore(str(tmp_path / "garmin.db")).get_rolling_stats("u")
+    )
+
+    assert restored.snapshot() == stats.snapshot()
+    # Both continue identically
+    extra = GarminData(date=START + timedelta(days=40), resting_heart_rate=52, hrv=70)
+    stats.ingest([extra])
+    restored.ingest([extra])
+    assert restored.snapshot() == stats.snapshot()
+
+
+def test_state_from_another_layout_is_ignored():
+    state = RollingStats().to_dict()
+    assert RollingStats.from_dict({**state, "version": state["version"] + 1}) is None
+    assert RollingStats.from_dict({**state, "windows": [7]}) is None
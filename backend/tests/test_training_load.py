@@ -0,0 +1,127 @@
+import json
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models.garmin_data import GarminActivity
+from app.services.garmin_service import GarminService
+from app.services.garmin_store import GarminStore
+from app.services.training_load import DEDUPE_DAYS, TrainingLoadModel
+
+START = date(2026, 1, 1)
+
+
+def run(day, minutes=45.0, avg_hr=145):
+    return GarminActivity(
+        activity_type="running",
+        start_time=datetime.combine(START + timedelta(days=day), datetime.min.time())
+        + timedelta(hours=7),
+        duration_minutes=minutes,
+        distance_km=minutes / 6,
+        avg_hr=avg_hr,
+        max_hr=185,
+    )
+
+
+def snapshot(model, day=60):
+    return model.snapshot(START + timedelta(days=day))
+
+
+def test_out_of_order_adds_match_in_order():
+    loads = [(START.toordinal() + day, 20.0 + day % 7 * 15) for day in range(50)]
+    in_order = TrainingLoadModel()
+    for day, load in loads:
+        in_order.add(day, load)
+
+    shuffled = list(loads)
+    random.Random(5).shuffle(shuffled)
+    out_of_order = TrainingLoadModel()
+    for day, load in shuffled:
+        out_of_order.add(day, load)
+
+    assert out_of_order.values == pytest.approx(in_order.values)
+    assert snapshot(out_of_order) == snapshot(in_order)
+
+
+def test_refetched_activities_are_not_double_counted():
+    activities = [run(day) for day in range(30)]
+    model = TrainingLoadModel()
+    model.ingest(activities)
+    before = snapshot(model)
+
+    # A sync re-fetches the last days from the watermark
+    model.ingest(activities[-3:])
+
+    assert snapshot(model) == before
+    assert model.activities == 30
+
+
+def test_newest_first_refetch_is_not_double_counted():
+    model = TrainingLoadModel()
+    model.ingest([run(day) for day in range(11)])
+
+    # Garmin's activity search returns the newest activity first
+    model.ingest([run(day) for day in range(20, 9, -1)])
+
+    assert model.activities == 21
+    expected = TrainingLoadModel()
+    expected.ingest([run(day) for day in range(21)])
+    assert snapshot(model) == snapshot(expected)
+
+
+def test_resync_of_old_days_is_deduped_against_the_store(tmp_path):
+    service = GarminService(store=GarminStore(str(tmp_path / "garmin.db")))
+    service.store_activities("u", [run(day) for day in range(40)])
+    before = snapshot(service.get_training_load("u"))
+
+    # A watermark stuck on an old day re-fetches weeks past the dedupe window
+    service.store_activities("u", [run(day) for day in range(45, 9, -1)])
+
+    model = service.get_training_load("u")
+    assert model.activities == 46
+    expected = TrainingLoadModel(resting_hr=model.resting_hr)
+    expected.ingest([run(day) for day in range(46)])
+    assert snapshot(model) == snapshot(expected)
+    assert snapshot(model) != before
+
+
+def test_refetched_activity_replaces_the_old_load():
+    model = TrainingLoadModel()
+    model.ingest([run(day) for day in range(29)] + [run(29, minutes=30)])
+    model.ingest([run(29, minutes=90)])
+
+    expected = TrainingLoadModel()
+    expected.ingest([run(day) for day in range(29)] + [run(29, minutes=90)])
+    assert snapshot(model) == snapshot(expected)
+
+
+def test_only_recent_activities_are_remembered():
+    model = TrainingLoadModel()
+    model.ingest([run(day) for day in range(30)])
+
+    remembered_days = {day for day, _ in model._recent.values()}
+    assert len(remembered_days) == DEDUPE_DAYS
+    assert min(remembered_days) > model.day - DEDUPE_DAYS
+
+
+def test_state_round_trips_through_the_store(tmp_path):
+    activities = [run(day) for day in range(30)]
+    model = TrainingLoadModel(resting_hr=52)
+    model.ingest(activities)
+
+    GarminStore(str(tmp_path / "garmin.db")).save_training_load("u", model.to_dict())
+    restored = TrainingLoadModel.from_dict(
+        GarminStore(str(tmp_path / "garmin.db")).get_training_load("u")
+    )
+
+    assert snapshot(restored) == snapshot(model)
+    # Dedupe keys survive the round trip
+    restored.ingest(activities[-2:] + [run(30)])
+    model.ingest([run(30)])
+    assert snapshot(restored) == snapshot(model)
+
+
+def test_state_from_another_version_is_ignored():
+    state = json.loads(json.dumps(TrainingLoadModel().to_dict()))
+    assert TrainingLoadModel.from_dict({**state, "version": 0}) is None